@@ -0,0 +1,14 @@
+# coding: utf8
+from editable import *
+
+def metrics():
+    '''
+    the metrics of SQLEDITABLE (Prometheus text format).
+    only for the local scraper. e.g.) /app/plugin_sqleditable/metrics
+    the editables are counted when they are created with metrics=True
+    (or METRICS_AVAILABLE = True in editable.py).
+    '''
+    if not request.is_local:
+        raise HTTP(403)
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4'
+    return METRICS.exposition()
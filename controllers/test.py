@@ -47,6 +47,25 @@ def doctest_header():
     True
     >>> header.test6.has_attr('inset.multiple')
     True
+    >>> header.test3 is header['test3']
+    True
+    >>> [f.name for f in header.writable()]
+    ['test3', 'test5', 'test6']
+    >>> header.test3.length
+    [0, 512]
+    >>> header.test20 is None
+    True
+    >>> header.test1.label = 'x'    #doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    AttributeError: FieldInfo object is immutable.
+    >>> import copy, pickle
+    >>> copy.copy(header.test3).length
+    [0, 512]
+    >>> copy.deepcopy(header.test6).inset['theset']
+    ['val1', 'val2', 'val3']
+    >>> field = pickle.loads(pickle.dumps(header.test2))
+    >>> field.label, field.is_key()
+    ('TEST2', True)
     '''
     pass
 
@@ -79,6 +98,8 @@ def doctest_record():
     None
     >>> print record.key_list()
     ['test1', 'test2']
+    >>> [v for f, v in record.header.values({'test2': '7', 'test3': 'x'}, 'readable')]
+    [7, 'x', None, None]
     '''
     pass
 
@@ -151,3 +172,692 @@ def doctest_recordarray():
     4 849
     '''
     pass
+
+def doctest_recordarray_columnar():
+    '''
+    >>> import datetime
+    >>> head = [{'default': '', 'field': 'test1', 'readable': False, 'type': 'string', 'writable': False},
+    ... {'default': 0, 'field': 'test2', 'readable': True, 'type': 'integer', 'writable': False},
+    ... {'default': '', 'field': 'test3', 'length': [0, 512], 'readable': True, 'type': 'string', 'writable': True}]
+    >>> data = [{'test1': 849L, 'test3': 'xxxx1', 'test2': 2L},
+    ... {'test1': 99L, 'test3': 'xxxx2', 'test2': 5L}]
+    >>> array = RecordArray(data, head, ['test1'], columnar=True)
+    >>> len(array)
+    2
+    >>> for r in array:
+    ...     for f,v in r.writable():
+    ...         print f.name,v
+    test3 xxxx1
+    test3 xxxx2
+    >>> array[1]['__rechash__'] = 'hash'
+    >>> array[0].has_field('__rechash__')
+    False
+    >>> array.column('__rechash__')
+    [None, 'hash']
+    >>> array.append(Record({'test1': 1L, 'test2': '7', 'test3': 'new'}, head))
+    >>> print array[2].test2
+    7
+    >>> array.column('test3')
+    ['xxxx1', 'xxxx2', 'new']
+    >>> array.key_values()
+    ['849', '99', '1']
+    >>> array.set_column('__inphash__', ['a', 'b', 'c'])
+    >>> print array[1]['__inphash__']
+    b
+    >>> del array[2]['test3']
+    >>> print array[2].test3
+    None
+    >>> array[3]    #doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    IndexError: list index out of range
+    '''
+    pass
+
+def doctest_xml_tag():
+    '''
+    >>> print xml_escape('<a href="x">&\\'</a>')
+    &lt;a href=&quot;x&quot;&gt;&amp;&#x27;&lt;/a&gt;
+    >>> print xml_tag('td', 'x', {'_id': 'cell_0_a_', '_class': 'c', '_disabled': True, '_style': False})
+    <td class="c" disabled="disabled" id="cell_0_a_">x</td>
+    >>> print xml_tag('input/', attributes={'_type': 'checkbox', '_checked': None, '_value': 'off'})
+    <input type="checkbox" value="off" />
+    '''
+    pass
+
+def doctest_lrucache():
+    '''
+    >>> cache = LRUCache(maxsize=2)
+    >>> cache('color/item.color/x', lambda: [(1, 'red')])
+    [(1, 'red')]
+    >>> cache('color/item.color/x', lambda: [])
+    [(1, 'red')]
+    >>> cache('/item.size/x', lambda: [('S', 'S')])
+    [('S', 'S')]
+    >>> cache.invalidate('color')
+    >>> cache('color/item.color/x', lambda: [])
+    []
+    >>> cache('unit/item.unit/x', lambda: [])
+    []
+    >>> len(cache.entries)
+    2
+    >>> cache.clear()
+    >>> len(cache.entries)
+    0
+    '''
+    pass
+
+def doctest_hash_backends():
+    '''
+    >>> from hashlib import md5
+    >>> h = SaltedHash(md5, b'salt')
+    >>> h.update(b'abc|')
+    >>> h.hexdigest() == md5(b'abc|salt').hexdigest()
+    True
+    >>> h = Crc32Hash()
+    >>> h.update(b'abc|')
+    >>> h.hexdigest()
+    'feee5547'
+    >>> sorted(k for k in HASH_BACKENDS if k != 'blake2b')
+    ['crc32', 'md5', 'sha256']
+    '''
+    pass
+
+def doctest_instrument():
+    '''
+    >>> seen = []
+    >>> instrument = Instrument(callback=seen.append, headers=False)
+    >>> with instrument.phase('check_formkey'):
+    ...     pass
+    >>> instrument.record('db_cud', 0.0125)
+    >>> instrument.count('rows_changed', 2)
+    >>> instrument.count('queries')
+    >>> [n for n, s in instrument.phases]
+    ['check_formkey', 'db_cud']
+    >>> instrument.timing_header().split(', ')[1]
+    'db_cud;dur=12.500'
+    >>> instrument.stats_header()
+    'queries=1; rows_changed=2'
+    >>> instrument.finish()
+    >>> instrument.finish()
+    >>> len(seen)
+    1
+    >>> with NULL_PHASE:
+    ...     pass
+    >>> class Adapter(object):
+    ...     def execute(self, sql):
+    ...         return sql
+    >>> class DB(object):
+    ...     _adapter = Adapter()
+    >>> db = DB()
+    >>> first, second = Instrument(headers=False), Instrument(headers=False)
+    >>> first.attach(db), second.attach(db)
+    (True, False)
+    >>> db._adapter.execute('SELECT 1;')
+    'SELECT 1;'
+    >>> first.counts, second.counts
+    ({'queries': 1}, {})
+    >>> counted = db._adapter.execute
+    >>> db._adapter.execute = lambda sql: counted(sql).lower()
+    >>> first.finish()
+    >>> db._adapter.execute('SELECT 2;')
+    'select 2;'
+    >>> first.counts
+    {'queries': 1}
+    >>> second.attach(db)
+    True
+    >>> second.finish()
+    >>> db._adapter.execute('SELECT 3;'), second.counts
+    ('select 3;', {})
+    >>> del db._adapter.execute
+    >>> first = Instrument(headers=False)
+    >>> first.attach(db)
+    True
+    >>> first.finish()
+    >>> 'execute' in vars(db._adapter)
+    False
+    '''
+    pass
+
+def doctest_metrics():
+    '''
+    >>> metrics = MetricsRegistry(buckets=(0.1, 1))
+    >>> metrics.inc('saves_total', {'table': 'item', 'status': 'accepted'})
+    >>> metrics.inc('saves_total', {'status': 'accepted', 'table': 'item'}, 2)
+    >>> metrics.value('saves_total', {'table': 'item', 'status': 'accepted'})
+    3
+    >>> metrics.observe('save_seconds', 0.05, {'table': 'item'})
+    >>> metrics.observe('save_seconds', 5, {'table': 'item'})
+    >>> print metrics.exposition()
+    # TYPE sqleditable_saves_total counter
+    sqleditable_saves_total{status="accepted",table="item"} 3
+    # TYPE sqleditable_save_seconds histogram
+    sqleditable_save_seconds_bucket{table="item",le="0.1"} 1
+    sqleditable_save_seconds_bucket{table="item",le="1.0"} 1
+    sqleditable_save_seconds_bucket{table="item",le="+Inf"} 2
+    sqleditable_save_seconds_sum{table="item"} 5.05
+    sqleditable_save_seconds_count{table="item"} 2
+    <BLANKLINE>
+    >>> metrics.clear()
+    >>> metrics.exposition()
+    '\\n'
+
+    the editables count only with metrics (opt-in), the errors by their tag
+    >>> request = editable_request()
+    >>> db = editable_db()
+    >>> SQLEDITABLE(db.item, touch_device=False).metrics is None
+    True
+    >>> editable = SQLEDITABLE(db.item, touch_device=False, metrics=metrics)
+    >>> error = EditableRejected('Table-hash mismatch.', 'hash_mismatches_total',
+    ...                          kind='table')
+    >>> editable.metrics_error(error, time.time())
+    >>> editable.metrics_error(RuntimeError('Table-hash mismatch.'), time.time())
+    >>> metrics.value('hash_mismatches_total', {'table': 'item', 'kind': 'table'})
+    1
+    >>> metrics.value('rejected_total', {'table': 'item', 'reason': 'error'})
+    1
+    '''
+    pass
+
+def editable_request(**post_vars):
+    '''
+    plain request of the doctests (current.request is replaced).
+    '''
+    current.request = Storage(post_vars=Storage(post_vars),
+                              vars=Storage(post_vars), get_vars=Storage(),
+                              env=Storage(), ajax=False)
+    return current.request
+
+def editable_db(rows=5):
+    '''
+    in-memory database of the doctests: item (name, qty, color).
+    '''
+    db = DAL('sqlite:memory')
+    db.define_table('color', Field('name'))
+    db.color.bulk_insert([{'name': c} for c in ('red', 'green', 'blue')])
+    db.define_table('item', Field('name', requires=IS_LENGTH(20, 1)),
+                    Field('qty', 'integer', requires=IS_INT_IN_RANGE(0, 100)),
+                    Field('color', 'reference color',
+                          requires=IS_IN_DB(db, 'color.id', '%(name)s')))
+    db.item.bulk_insert([{'name': 'n%d' % i, 'qty': i, 'color': 1}
+                                                        for i in range(rows)])
+    return db
+
+def editable_render(make, session):
+    '''
+    render the editable of make() -> (contents of editable, formkey, formname)
+    '''
+    editable_request()
+    editable = make()
+    editable.accepts(current.request.post_vars, session)
+    tree = editable.build_editable()[0]
+    return tree, tree.element(_id=FORMKEY_ID)['_value'], editable.formname
+
+def editable_post(make, session, tree, formkey, formname, **kwargs):
+    '''
+    post the contents of editable (html) -> (editable, status)
+        kwargs : options of accepts
+    '''
+    request = editable_request(formkey=formkey, formname=formname,
+                               **{EDITABLE_ID: CAT(*tree.components).xml()})
+    editable = make()
+    return editable, editable.accepts(request.post_vars, session, **kwargs)
+
+def doctest_dirty_tracking():
+    '''
+    >>> db = editable_db()
+    >>> session = Storage(test=True)
+    >>> make = lambda: SQLEDITABLE(db.item, dirty_tracking=True, touch_device=False)
+    >>> tree, formkey, formname = editable_render(make, session)
+    >>> for rowno in (0, 1):
+    ...     tree.element(_id='cell_%d_name_' % rowno)[0] = 'edit%d' % rowno
+    ...     tree.element(_id='k(%d)' % rowno)['_data-dirty'] = '1'
+    ...     editable, status = editable_post(make, session, tree, formkey, formname)
+    ...     print status, len(editable.o_record), db.item[rowno + 1].name
+    ...     tree = editable.refresh_editable(editable.editable)
+    ...     formkey = tree.element(_id=FORMKEY_ID)['_value']
+    True 1 edit0
+    True 1 edit1
+    >>> tree.element(_id='k(0)')['_data-dirty'] is None
+    True
+    '''
+    pass
+
+def doctest_as_json():
+    '''
+    >>> request = editable_request()
+    >>> header = Header([{'field': 'id', 'type': 'integer', 'writable': False},
+    ...                  {'field': 'qty', 'type': 'integer'},
+    ...                  {'field': 'price', 'type': 'number'},
+    ...                  {'field': 'size', 'inset': {'zero': '',
+    ...                             'items': [('S', 'small'), ('L', 'large')]}},
+    ...                  {'field': 'total', 'type': 'integer', 'virtual': True,
+    ...                   'method': True}], ['id'])
+    >>> record = RecordArray([{'id': 1, 'qty': '3', 'price': '1.5', 'size': 'S',
+    ...                        'total': lambda: '6'}], header)
+    >>> editable = EDITABLE(record, header, touch_device=False)
+    >>> editable.accepts(current.request.post_vars, Storage(test=True))
+    False
+    >>> data = json.loads(editable.as_json(readonly=True))
+    >>> row = data['rows'][0]
+    >>> print row[:3], row[4], row[3] == 'S'
+    [1, 3, 1.5] 6 True
+    >>> data['inset']['size']['multiple']
+    False
+    >>> sorted(json.loads(editable.as_json())) == ['cells', 'formkey',
+    ...                 'formname', 'header', 'inset', 'key', 'rows']
+    True
+    '''
+    pass
+
+def doctest_column_check():
+    '''
+    the column checks give the value of the validators (pydal) for the plain
+    inputs. the other values are left to the validators.
+    >>> def compare(requires, values):
+    ...     results = compile_column_check(requires)(values)
+    ...     for value, result in zip(values, results):
+    ...         print repr(value), 'validator' if result is VALIDATION_FALLBACK else (result, requires(value) == (result, None))
+    >>> compare(IS_NOT_EMPTY(), [' x ', 'x', '', '  ', None])
+    ' x ' validator
+    'x' ('x', True)
+    '' validator
+    '  ' validator
+    None validator
+    >>> compare(IS_EMPTY_OR(IS_INT_IN_RANGE(0, 10)), [' 3 ', '3', '', '  ', None, '30', '3\\n'])
+    ' 3 ' validator
+    '3' (3, True)
+    '' (None, True)
+    '  ' (None, True)
+    None (None, True)
+    '30' validator
+    '3\\n' validator
+    >>> compare(IS_EMPTY_OR(IS_LENGTH(3)), [' abc ', 'abc', '', None])
+    ' abc ' validator
+    'abc' ('abc', True)
+    '' (None, True)
+    None (None, True)
+    >>> compare(IS_DATE(), ['2020-01-05', '2020-1-5', '2020-02-30', ' 2020-01-05'])
+    '2020-01-05' (datetime.date(2020, 1, 5), True)
+    '2020-1-5' (datetime.date(2020, 1, 5), True)
+    '2020-02-30' validator
+    ' 2020-01-05' validator
+
+    one pass for the column of the plain inputs
+    >>> compile_column_check(IS_INT_IN_RANGE(0, 10))([str(i) for i in range(10)])
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+    >>> compile_column_check(IS_DECIMAL_IN_RANGE(0, 10))(['1.50', '+3', '10'])
+    [Decimal('1.50'), Decimal('3'), Decimal('10')]
+    >>> print compile_column_check(IS_MATCH('.*'))
+    None
+    '''
+    pass
+
+def doctest_delta():
+    '''
+    >>> payload = json.dumps({'keys': [['MQ==', 'hash1'], ['Mg==', 'hash2'],
+    ...                                ['', '']],
+    ...                       'rows': [{'r': 1, 'i': 'inphash', 'd': False,
+    ...                                 'v': {'name': 'x'}}]})
+    >>> delta = EditableDelta(payload)
+    >>> print len(delta.keys), len(delta.rows), delta.rows[0]['r']
+    3 1 1
+    >>> delta.key_cell(1) == ['Mg==', 'hash2']
+    True
+    >>> print delta.key_cell(3), delta.key_cell(True)
+    None None
+    >>> delta.tablehash_items() == [('1', 'hash1'), ('2', 'hash2'), ('', '')]
+    True
+    >>> delta = EditableDelta(payload.encode())
+    >>> delta.update_key(2, {'key_value': 'Mw==', 'record_hash': 'hash3'})
+    >>> delta.tablehash_items()[2] == ('3', 'hash3')
+    True
+
+    malformed payloads
+    >>> keys = [['MQ==', 'hash1'], ['Mg==', 'hash2']]
+    >>> for data in ('{"keys": [', [], {'keys': 'MQ=='}, {'keys': [['MQ==']]},
+    ...              {'keys': [['MQ==', None]]}, {'keys': keys, 'rows': [1]},
+    ...              {'keys': keys, 'rows': [{'r': 0, 'v': []}]},
+    ...              {'keys': keys, 'rows': [{'v': {}}]},
+    ...              {'keys': keys, 'rows': [{'r': '0', 'v': {}}]},
+    ...              {'keys': keys, 'rows': [{'r': True, 'v': {}}]},
+    ...              {'keys': keys, 'rows': [{'r': 2, 'v': {}}]},
+    ...              {'keys': keys, 'rows': [{'r': 1, 'v': {}},
+    ...                                      {'r': 1, 'v': {}}]}):
+    ...     try:
+    ...         EditableDelta(data if isinstance(data, (str, dict)) else
+    ...                                                     json.dumps(data))
+    ...     except RuntimeError as e:
+    ...         print e
+    Invalid delta payload.
+    Invalid delta payload.
+    Invalid delta payload.
+    Invalid delta payload.
+    Invalid delta payload.
+    Invalid delta payload.
+    Invalid delta payload.
+    Invalid delta payload.
+    Invalid delta payload.
+    Invalid delta payload.
+    Invalid delta payload.
+    Invalid delta payload.
+    '''
+    pass
+
+def doctest_form_token():
+    '''
+    >>> request = editable_request()
+    >>> header = Header([{'field': 'id', 'type': 'integer'}, {'field': 'name'}],
+    ...                                                                 ['id'])
+    >>> tokens = LRUCache(prefix='doctest_form_token/')
+    >>> def make(key='secret', expire=60, formname='test'):
+    ...     editable = EDITABLE(RecordArray([{'id': 1, 'name': 'a'}], header),
+    ...                         header, form_token_key=key, touch_device=False,
+    ...                         form_token_expire=expire, form_token_cache=tokens)
+    ...     editable.formname = formname
+    ...     return editable
+    >>> def read(editable, token):
+    ...     try:
+    ...         return editable.read_formkey(token)
+    ...     except RuntimeError as e:
+    ...         return str(e)
+    >>> editable = make()
+    >>> editable.form_tablehash = 'tablehash'
+    >>> token = editable.issue_formkey('formkey')
+
+    round trip: the tablehash and the salt are restored
+    >>> other = make()
+    >>> print read(other, token), other.form_tablehash
+    True tablehash
+    >>> other.hash_salt == editable.hash_salt
+    True
+
+    expiry
+    >>> expired = make(expire=-1)
+    >>> expired.form_tablehash = 'tablehash'
+    >>> print read(make(), expired.issue_formkey('formkey'))
+    Formkey has expired.
+
+    tampered signature & payload
+    >>> payload, signature = token.rsplit(FORM_TOKEN_SEPARATOR, 1)
+    >>> print read(make(), payload + FORM_TOKEN_SEPARATOR + signature[::-1])
+    Invalid formkey.
+    >>> print read(make(), payload[::-1] + FORM_TOKEN_SEPARATOR + signature)
+    Invalid formkey.
+    >>> print read(make(), 'formkey')
+    Invalid formkey.
+
+    issued under a different key or for another form
+    >>> print read(make(key='other'), token)
+    Invalid formkey.
+    >>> print read(make(formname='other'), token)
+    Invalid formkey.
+
+    single-use: a replayed submit is refused (the page windows only read it)
+    >>> def check(editable, token):
+    ...     try:
+    ...         return editable.check_formkey(token)
+    ...     except RuntimeError as e:
+    ...         return str(e)
+    >>> print check(make(), token)
+    True
+    >>> print read(make(), token), check(make(), token)
+    True Formkey has already been used.
+    >>> print check(make(), editable.issue_formkey('formkey2'))
+    True
+    '''
+    pass
+
+def doctest_key_token():
+    '''
+    >>> request = editable_request()
+    >>> header = Header([{'field': 'id', 'type': 'integer'}, {'field': 'name'}],
+    ...                                                                 ['id'])
+    >>> editable = EDITABLE(RecordArray([{'id': 1, 'name': 'a'}], header),
+    ...                     header, table_hash_mode='row', touch_device=False)
+    >>> def check(id, recordhash, keytoken):
+    ...     record = Record({'id': id, 'name': 'b'}, header)
+    ...     record[RECORD_HASH_FIELD] = recordhash
+    ...     record[KEY_TOKEN_FIELD] = keytoken
+    ...     try:
+    ...         return editable.check_keytoken(record)
+    ...     except RuntimeError as e:
+    ...         return str(e)
+    >>> keytoken = editable.generate_keytoken('1', 'rechash')
+    >>> print check(1, 'rechash', keytoken)
+    True
+    >>> print check(2, 'rechash', keytoken)
+    Key-token mismatch.
+    >>> print check(1, 'changed', keytoken)
+    Key-token mismatch.
+    >>> print check(1, 'rechash', keytoken[::-1])
+    Key-token mismatch.
+    >>> print check(1, 'rechash', None)
+    Key-token mismatch.
+    '''
+    pass
+
+def doctest_db_read():
+    '''
+    the keys of the record list are converted like the read rows.
+    >>> request = editable_request()
+    >>> db = editable_db()
+    >>> editable = SQLEDITABLE(db.item, record=['03', 1, '3', (2,)],
+    ...                        touch_device=False)
+    >>> [(rec.id, rec.name) for rec in editable.record]
+    [(3, 'n2'), (1, 'n0'), (2, 'n1')]
+
+    the keys without record are skipped.
+    >>> editable = SQLEDITABLE(db.item, record=[99, '2', 1], touch_device=False)
+    >>> [rec.id for rec in editable.record]
+    [2, 1]
+    '''
+    pass
+
+def doctest_bulk_write():
+    '''
+    the deletes & inserts are batched, the updates are written one by one.
+    >>> db = editable_db(4)
+    >>> session = Storage(test=True)
+    >>> make = lambda: SQLEDITABLE(db.item, maxrow=5, deletable=True,
+    ...                            touch_device=False)
+    >>> tree, formkey, formname = editable_render(make, session)
+    >>> tree.element(_id='cell_0_name_')[0] = 'edit0'
+    >>> tree.element(_id='cell_1_qty_')[0] = '50'
+    >>> tree.element(_id='d(2)')['_value'] = 'on'
+    >>> tree.element(_id='cell_4_name_')[0] = 'new'
+    >>> tree.element(_id='cell_4_qty_')[0] = '7'
+    >>> tree.element(_id='cell_4_color_')[0] = '2'
+    >>> del db._timings[:]
+    >>> editable, status = editable_post(make, session, tree, formkey, formname,
+    ...                                  bulk_write=True)
+    >>> print status, editable.errors
+    True []
+    >>> print [sql.split()[0] for sql, _ in db._timings]
+    ['SELECT', 'SELECT', 'SELECT', 'DELETE', 'UPDATE', 'UPDATE', 'INSERT', 'SELECT']
+    >>> [(row.id, row.name, row.qty, row.color) for row in db(db.item).select()]
+    [(1, 'edit0', 0, 1), (2, 'n1', 50, 1), (4, 'n3', 3, 1), (5, 'new', 7, 2)]
+
+    a record deleted meanwhile stops the write
+    >>> tree, formkey, formname = editable_render(make, session)
+    >>> tree.element(_id='cell_0_name_')[0] = 'edit1'
+    >>> db(db.item.id == 1).delete()
+    1
+    >>> editable, status = editable_post(make, session, tree, formkey, formname,
+    ...                                  bulk_write=True, parcel_update=False)
+    >>> print status, editable.errors
+    False ['record has been deleted']
+
+    the rows a bulk delete misses are marked (no record hash check here)
+    >>> def unhashed():
+    ...     editable = make()
+    ...     editable.record_hash_available = False
+    ...     return editable
+    >>> tree, formkey, formname = editable_render(unhashed, session)
+    >>> tree.element(_id='d(0)')['_value'] = 'on'
+    >>> tree.element(_id='d(1)')['_value'] = 'on'
+    >>> db(db.item.id == 4).delete()
+    1
+    >>> editable, status = editable_post(unhashed, session, tree, formkey,
+    ...                                  formname, bulk_write=True)
+    >>> print status, editable.errors
+    False ['record has been deleted']
+    >>> [editable.cell_error_class in str(editable.editable.element(_id='cell_%d_name_' % r)['_class']) for r in (0, 1)]
+    [False, True]
+    >>> db(db.item.id == 2).count()
+    1
+        '''
+    pass
+
+def doctest_select_mode():
+    '''
+    'shared': the options of an inset column are emitted once (js config),
+    the cells hold the value & the label of the option.
+    >>> db = editable_db(3)
+    >>> def render(select_mode):
+    ...     request = editable_request()
+    ...     editable = SQLEDITABLE(db.item, select_mode=select_mode,
+    ...                            touch_device=False)
+    ...     editable.accepts(request.post_vars, Storage(test=True))
+    ...     parts = editable.build_editable()
+    ...     return editable, parts[0], parts[3].xml()
+    >>> editable, html, script = render('shared')
+    >>> print html.xml().count('<option'), script.count('green')
+    0 1
+    >>> editable.build_js_config()['options']['color'] == {'multiple': False,
+    ...     'items': [['', ''], ['3', 'blue'], ['2', 'green'], ['1', 'red']]}
+    True
+    >>> for r in range(3):
+    ...     cell = html.element(_id='cell_%d_color_' % r)
+    ...     label = html.elements('span.' + FIELD_SELECT_LABEL_CLASS)[r]
+    ...     print cell[0], label[0]
+    1 red
+    1 red
+    1 red
+
+    'cell': a SELECT with all the options in every cell
+    >>> editable, html, script = render('cell')
+    >>> print html.xml().count('<option'), script.count('green')
+    12 0
+    '''
+    pass
+
+def doctest_autocomplete():
+    '''
+    >>> db = editable_db(3)
+    >>> db(db.item.id == 2).update(color=3)
+    1
+    >>> session = Storage(test=True)
+    >>> make = lambda: SQLEDITABLE(db.item, autocomplete=['color'],
+    ...                            touch_device=False)
+
+    the labels of the values in the rows only
+    >>> tree, formkey, formname = editable_render(make, session)
+    >>> [label[0] for label in tree.elements('span.' + FIELD_SELECT_LABEL_CLASS)]
+    ['red', 'blue', 'red']
+    >>> print tree.xml().count('green')
+    0
+
+    search (the first AUTOCOMPLETE_LIMIT options that start with the text)
+    >>> db.color.bulk_insert([{'name': 'c%02d' % i} for i in range(30)])
+    ... # doctest: +ELLIPSIS
+    [...]
+    >>> def search(text):
+    ...     request = editable_request(**{AUTOCOMPLETE_VAR: text,
+    ...                                   AUTOCOMPLETE_FIELD_VAR: 'color'})
+    ...     request.ajax = True
+    ...     return json.loads(make().fetch_search())
+    >>> search('gr') == [['2', 'green']]
+    True
+    >>> items = search('c')
+    >>> print len(items), AUTOCOMPLETE_LIMIT, items[0][1], items[-1][1]
+    20 20 c00 c19
+    >>> search('x')
+    []
+
+    a value outside the IS_IN_DB set is rejected on save
+    >>> tree.element(_id='cell_0_color_')[0] = '99'
+    >>> editable, status = editable_post(make, session, tree, formkey, formname)
+    >>> print status, db.item[1].color
+    False 1
+    >>> print editable.errors[0].lower()
+    value not in database
+    '''
+    pass
+
+def doctest_check_recordhashes():
+    '''
+    the recordhashes of the records are checked with one keyed read.
+    >>> request = editable_request()
+    >>> db = editable_db(4)
+    >>> editable = SQLEDITABLE(db.item, touch_device=False)
+    >>> records = list(enumerate(editable.record))
+    >>> db(db.item.id == 2).update(qty=50)
+    1
+    >>> db(db.item.id == 3).delete()
+    1
+    >>> new = Record({'name': 'new'}, editable.header)
+    >>> new[NEWRECORD_FLAG_FIELD] = True
+    >>> dummy = Record({'name': ''}, editable.header)
+    >>> dummy[RECORD_HASH_FIELD] = DUMMY_RECORD_HASH_VALUE
+    >>> del db._timings[:]
+    >>> statuses = editable.check_recordhashes(records + [(4, new), (5, dummy)])
+    >>> [statuses[r] for r in range(6)]
+    [True, False, 'notexit', True, True, 'dummy']
+    >>> len(db._timings)
+    1
+    '''
+    pass
+
+def doctest_pagination():
+    '''
+    windows of maxrow rows (one more row is read for has_next).
+    >>> db = editable_db(6)
+    >>> def window(keyset=False, **vars):
+    ...     editable_request().vars.update(vars)
+    ...     editable = SQLEDITABLE(db.item, maxrow=3, paginate=True,
+    ...                            keyset=keyset, touch_device=False)
+    ...     w = editable.window
+    ...     return ([rec.id for rec in editable.record], w.page, w.has_prev,
+    ...                                     w.has_next, w.first, w.last)
+    >>> window()
+    ([1, 2, 3], 1, False, True, None, None)
+    >>> window(_page='2')
+    ([4, 5, 6], 2, True, False, None, None)
+    >>> window(_page='3')
+    ([], 3, True, False, None, None)
+    >>> window(_page='x')[:2], window(_page='-1')[:2]
+    (([1, 2, 3], 1), ([1, 2, 3], 1))
+
+    keyset: the window after/before the key of the neighbour row
+    >>> window(keyset=True)
+    ([1, 2, 3], 1, False, True, '1', '3')
+    >>> window(keyset=True, _after='3')
+    ([4, 5, 6], 1, True, False, '4', '6')
+    >>> window(keyset=True, _before='4')
+    ([1, 2, 3], 1, False, True, '1', '3')
+    >>> window(keyset=True, _before='3')
+    ([1, 2], 1, False, True, '1', '2')
+    >>> window(keyset=True, _after='6')
+    ([], 1, True, False, None, None)
+
+    fetch_window: the rows of the page & the formkey of the replaced window
+    is retired
+    >>> session = Storage(test=True)
+    >>> make = lambda: SQLEDITABLE(db.item, maxrow=3, paginate=True,
+    ...                            touch_device=False)
+    >>> tree, formkey, formname = editable_render(make, session)
+    >>> request = editable_request()
+    >>> request.vars.update(_page='2', formkey=formkey)
+    >>> request.ajax = True
+    >>> editable = make()
+    >>> editable.accepts(request.post_vars, session)
+    False
+    >>> contents = DIV(editable.fetch_window())
+    >>> keys = [contents.element(_id='k(%d)' % r)[KEY_ID_TAG_ATTR]
+    ...                                                     for r in range(3)]
+    >>> [base64.b64decode(k) for k in keys] == [b'4', b'5', b'6']
+    True
+    >>> formkey in session[FORMKEY_STRING.format(formname)]
+    False
+    '''
+    pass
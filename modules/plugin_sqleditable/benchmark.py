@@ -0,0 +1,402 @@
+#!/usr/bin/env python
+# coding: utf8
+
+# SQLEDITABLE plugin for web2py flamework
+# benchmark of the render, readout and save paths
+# License: LGPLv3
+
+'''
+benchmark of SQLEDITABLE against synthetic tables (in-memory SQLite).
+
+usage (web2py shell):
+    python web2py.py -S <app> -M -R \\
+        applications/<app>/modules/plugin_sqleditable/benchmark.py -A [options]
+
+    --scenario NAME : run the scenario only (repeatable). default: all
+    --repeat N      : runs of each scenario, the best time is kept.
+    --baseline PATH : baseline file (json).
+    --save          : store the results as the baseline.
+    --tolerance R   : allowed ratio of slowdown / memory growth.
+
+each phase records the wall time, the peak memory (tracemalloc) and the
+number of queries. the exit status is 1 when a phase regressed against
+the baseline.
+'''
+
+from gluon import current, DAL, Field, IS_LENGTH, IS_INT_IN_RANGE, \
+                  IS_FLOAT_IN_RANGE, IS_DATE, IS_IN_DB
+from gluon.html import DIV
+from gluon.storage import Storage
+from editable import SQLEDITABLE, FORMKEY_ID, SUBMIT_MODE_HTML, \
+                     SUBMIT_MODE_DELTA, SELECT_MODE_CELL, SELECT_MODE_SHARED, \
+                     CELL_ID_FORMAT
+import argparse
+import datetime
+import json
+import re
+import sys
+import time
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+BENCHMARK_SCENARIOS             = [
+    {'name': 'small', 'rows': 10, 'columns': 5},
+    {'name': 'inset', 'rows': 1000, 'columns': 20, 'inset': 2},
+    {'name': 'shared', 'rows': 1000, 'columns': 20, 'inset': 2,
+                                            'select_mode': SELECT_MODE_SHARED},
+    {'name': 'remote', 'rows': 1000, 'columns': 20, 'inset': 2,
+                                                        'autocomplete': True},
+    {'name': 'composite', 'rows': 1000, 'columns': 10, 'composite': True},
+    {'name': 'wide', 'rows': 5000, 'columns': 60, 'inset': 4},
+    {'name': 'delta', 'rows': 5000, 'columns': 20, 'inset': 2,
+                                                'submit_mode': SUBMIT_MODE_DELTA},
+    {'name': 'large', 'rows': 50000, 'columns': 10, 'inset': 1,
+                                                'submit_mode': SUBMIT_MODE_DELTA}]
+BENCHMARK_PHASES                = ['define_header', 'db_read', 'build_editable',
+                                   'xml', 'readout_editable', 'check_tablehash',
+                                   'db_cud']
+BENCHMARK_TABLE                 = 'bench'
+BENCHMARK_REF_TABLE             = 'bench_ref'
+BENCHMARK_REF_ROWS              = 300
+BENCHMARK_COLUMN_TYPES          = ['string', 'integer', 'double', 'date',
+                                   'boolean']
+BENCHMARK_INSERT_CHUNK          = 1000
+BENCHMARK_CHANGED_RATIO         = 0.1
+BENCHMARK_REPEAT                = 3
+BENCHMARK_TOLERANCE             = 0.2
+BENCHMARK_MIN_TIME              = 0.005
+BENCHMARK_MIN_PEAK              = 65536
+BENCHMARK_BASELINE              = 'sqleditable_benchmark.json'
+BENCHMARK_DATE                  = datetime.date(2000, 1, 1)
+BENCHMARK_URL                   = '/benchmark'
+
+def make_db(scenario):
+    '''
+    in-memory database of the scenario.
+        rows      : number of rows.
+        columns   : number of the fields (except the keys).
+        composite : True: keyed table with the key ('k1', 'k2').
+        inset     : number of the IS_IN_DB fields (dropdowns).
+    '''
+    db = DAL('sqlite:memory')
+    db.define_table(BENCHMARK_REF_TABLE, Field('name'))
+    db[BENCHMARK_REF_TABLE].bulk_insert([{'name': 'ref%d' % i}
+                                        for i in range(BENCHMARK_REF_ROWS)])
+    composite = scenario.get('composite', False)
+    inset = scenario.get('inset', 0)
+    fields = []
+    if composite:
+        fields += [Field('k1', 'integer'), Field('k2', 'integer')]
+    types = {}
+    for c in range(scenario['columns']):
+        name = 'c%d' % c
+        if c < inset:
+            types[name] = 'inset'
+            fields.append(Field(name, 'integer', requires=IS_IN_DB(db,
+                        '{0}.id'.format(BENCHMARK_REF_TABLE), '%(name)s')))
+            continue
+        ftype = BENCHMARK_COLUMN_TYPES[c % len(BENCHMARK_COLUMN_TYPES)]
+        types[name] = ftype
+        if ftype == 'string':
+            fields.append(Field(name, requires=IS_LENGTH(64)))
+        elif ftype == 'integer':
+            fields.append(Field(name, 'integer',
+                                requires=IS_INT_IN_RANGE(0, 1000000)))
+        elif ftype == 'double':
+            fields.append(Field(name, 'double',
+                                requires=IS_FLOAT_IN_RANGE(0, 1000000)))
+        elif ftype == 'date':
+            fields.append(Field(name, 'date', requires=IS_DATE()))
+        else:
+            fields.append(Field(name, 'boolean'))
+    options = {'primarykey': ['k1', 'k2']} if composite else {}
+    table = db.define_table(BENCHMARK_TABLE, *fields, **options)
+
+    def row(i):
+        r = {}
+        if composite:
+            r.update(k1=i // 10, k2=i % 10)
+        for name, ftype in types.items():
+            if ftype == 'inset':
+                r[name] = 1 + i % BENCHMARK_REF_ROWS
+            elif ftype == 'string':
+                r[name] = 'v%d_%s' % (i, name)
+            elif ftype == 'integer':
+                r[name] = i % 1000
+            elif ftype == 'double':
+                r[name] = i / 4.0
+            elif ftype == 'date':
+                r[name] = BENCHMARK_DATE + datetime.timedelta(days=i % 3650)
+            else:
+                r[name] = i % 2 == 0
+        return r
+
+    for start in range(0, scenario['rows'], BENCHMARK_INSERT_CHUNK):
+        end = min(start + BENCHMARK_INSERT_CHUNK, scenario['rows'])
+        table.bulk_insert([row(i) for i in range(start, end)])
+    db.commit()
+    return db
+
+class PhaseTimer(object):
+    '''
+    times the phases (methods of SQLEDITABLE) and counts the queries.
+    the methods are patched on the class while the timer is entered.
+        db     : DAL object (the queries of its adapter are counted).
+        memory : True: peak memory by tracemalloc (slower).
+    result: {phase: {'time': seconds, 'queries': n, 'peak': bytes}}
+    '''
+    def __init__(self, db, phases=BENCHMARK_PHASES, memory=False):
+        self.db = db
+        self.phases = phases
+        self.memory = memory and tracemalloc is not None and \
+                                            hasattr(tracemalloc, 'reset_peak')
+        self.queries = 0
+        self.depth = 0
+        self.result = {}
+        self.patched = []
+
+    def __enter__(self):
+        adapter = self.db._adapter
+        execute = adapter.execute
+
+        def counted(*args, **kwargs):
+            self.queries += 1
+            return execute(*args, **kwargs)
+        adapter.execute = counted
+        for phase in self.phases:
+            method = getattr(SQLEDITABLE, phase, None)
+            if method is None:
+                continue
+            self.patched.append((phase, SQLEDITABLE.__dict__.get(phase)))
+            setattr(SQLEDITABLE, phase, self.wrap(phase, method))
+        if self.memory:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.memory:
+            tracemalloc.stop()
+        for phase, method in self.patched:
+            if method is None:
+                delattr(SQLEDITABLE, phase)
+            else:
+                setattr(SQLEDITABLE, phase, method)
+        self.patched = []
+        del self.db._adapter.execute
+        return False
+
+    def wrap(self, phase, method):
+        timer = self
+
+        def timed(*args, **kwargs):
+            return timer.measure(phase, method, *args, **kwargs)
+        return timed
+
+    def measure(self, phase, func, *args, **kwargs):
+        # nested calls of the phases are counted by the outer phase
+        if self.depth:
+            return func(*args, **kwargs)
+        self.depth += 1
+        queries = self.queries
+        if self.memory:
+            tracemalloc.reset_peak()
+            memory = tracemalloc.get_traced_memory()[0]
+        start = time.time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.time() - start
+            self.depth -= 1
+            r = self.result.setdefault(phase, {'time': 0.0, 'queries': 0,
+                                                                'peak': None})
+            r['time'] += elapsed
+            r['queries'] += self.queries - queries
+            if self.memory:
+                peak = tracemalloc.get_traced_memory()[1] - memory
+                r['peak'] = max(r['peak'] or 0, peak)
+
+def html_payload(window, field, run):
+    '''
+    posted markup of the html submit mode: the contents of editable with
+    the cells of the field changed on every n-th row.
+    '''
+    markup = window.xml()
+    if isinstance(markup, bytes):
+        markup = markup.decode('utf8')
+    step = max(int(1 / BENCHMARK_CHANGED_RATIO), 1)
+    cell = re.escape(CELL_ID_FORMAT.format(row=0, field=field)).replace(
+                                                            '0', r'(\d+)', 1)
+    pattern = re.compile(r'(id="{0}"[^>]*>)([^<]*)(</td>)'.format(cell))
+
+    def change(m):
+        if int(m.group(2)) % step:
+            return m.group(0)
+        return '{0}x{1}_{2}{3}'.format(m.group(1), run, m.group(2),
+                                                                m.group(4))
+    return pattern.sub(change, markup)
+
+def delta_payload(editable, field, run):
+    '''
+    posted json of the delta submit mode built from as_json.
+    returns (payload, formkey)
+    '''
+    data = json.loads(editable.as_json())
+    header = [h[0] for h in data['header']]
+    writable = [h[0] for h in data['header'] if h[3] and h[4]]
+    step = max(int(1 / BENCHMARK_CHANGED_RATIO), 1)
+    keys = [c[:2] + c[3:] for c in data['cells']]
+    rows = []
+    for r in range(0, len(data['rows']), step):
+        values = dict(zip(header, data['rows'][r]))
+        v = dict((f, '' if values[f] is None else values[f]
+                        if isinstance(values[f], bool) else str(values[f]))
+                                                            for f in writable)
+        v[field] = 'x{0}_{1}'.format(run, r)
+        rows.append({'r': r, 'i': data['cells'][r][2], 'd': False, 'v': v})
+    return json.dumps({'keys': keys, 'rows': rows}), data['formkey']
+
+def run_once(db, scenario, timer, run=0):
+    '''
+    render the grid, then save the changes of BENCHMARK_CHANGED_RATIO rows.
+    current.request is replaced by a plain request while running.
+    '''
+    request = current.request
+    current.request = Storage(post_vars=Storage(), vars=Storage(),
+                              get_vars=Storage(), env=Storage(), ajax=False)
+    try:
+        render_and_save(db, scenario, timer, run)
+    finally:
+        current.request = request
+
+def render_and_save(db, scenario, timer, run):
+    request = current.request
+    # an empty session is taken as no session
+    session = Storage(benchmark=scenario['name'])
+    submit_mode = scenario.get('submit_mode', SUBMIT_MODE_HTML)
+    options = dict(deletable=True, submit_mode=submit_mode, url=BENCHMARK_URL,
+                   select_mode=scenario.get('select_mode', SELECT_MODE_CELL),
+                   autocomplete=['c%d' % c for c in range(scenario.get('inset',
+                                    0))] if scenario.get('autocomplete') else None,
+                   touch_device=False, options_cache=False, header_cache=False)
+    field = [f.name for f in db[BENCHMARK_TABLE]
+                                    if f.type == 'string'][0]
+    # render
+    editable = SQLEDITABLE(db[BENCHMARK_TABLE], **options)
+    editable.accepts(request.post_vars, session)
+    parts = editable.build_editable()
+    timer.measure('xml', DIV(parts).xml)
+    formname = editable.formname
+    if submit_mode == SUBMIT_MODE_DELTA:
+        payload, formkey = delta_payload(editable, field, run)
+    else:
+        window = parts[0].components[0]
+        formkey = window.element(_id=FORMKEY_ID)['_value']
+        payload = html_payload(window, field, run)
+    # save
+    request.post_vars = Storage({editable.editable_id: payload,
+                                 'formkey': formkey, 'formname': formname})
+    editable = SQLEDITABLE(db[BENCHMARK_TABLE], **options)
+    if not editable.accepts(request.post_vars, session):
+        raise RuntimeError('benchmark save failed: {0}'.format(
+                                                    editable.errors))
+
+def run_scenario(scenario, repeat=BENCHMARK_REPEAT, memory=True):
+    '''
+    the best time of the runs, the peak memory & queries of the last run.
+    '''
+    db = make_db(scenario)
+    result = {}
+    try:
+        for run in range(repeat + (1 if memory else 0)):
+            with PhaseTimer(db, memory=memory and run == repeat) as timer:
+                run_once(db, scenario, timer, run)
+            for phase, r in timer.result.items():
+                best = result.setdefault(phase, dict(r))
+                if run < repeat:
+                    best['time'] = min(best['time'], r['time'])
+                best['queries'] = r['queries']
+                if r['peak'] is not None:
+                    best['peak'] = r['peak']
+    finally:
+        db.close()
+    return result
+
+def compare(results, baseline, tolerance=BENCHMARK_TOLERANCE):
+    '''
+    regressions of the results against the baseline.
+    the differences under BENCHMARK_MIN_TIME/BENCHMARK_MIN_PEAK are ignored.
+    return value: ['scenario/phase: message', ...]
+    '''
+    regressions = []
+    for name, phases in sorted(results.items()):
+        base = baseline.get(name, {})
+        for phase, r in sorted(phases.items()):
+            b = base.get(phase)
+            if not b:
+                continue
+            label = '{0}/{1}: '.format(name, phase)
+            if r['time'] > b['time'] * (1 + tolerance) and \
+                                r['time'] - b['time'] > BENCHMARK_MIN_TIME:
+                regressions.append(label + 'time {0:.4f}s > {1:.4f}s'.format(
+                                                        r['time'], b['time']))
+            if r['queries'] > b['queries']:
+                regressions.append(label + 'queries {0} > {1}'.format(
+                                                    r['queries'], b['queries']))
+            if r.get('peak') and b.get('peak') and \
+                                r['peak'] > b['peak'] * (1 + tolerance) and \
+                                r['peak'] - b['peak'] > BENCHMARK_MIN_PEAK:
+                regressions.append(label + 'peak {0} > {1} bytes'.format(
+                                                        r['peak'], b['peak']))
+    return regressions
+
+def report(results):
+    lines = ['{0:<10} {1:<17} {2:>10} {3:>8} {4:>12}'.format(
+                            'scenario', 'phase', 'time[s]', 'queries', 'peak[B]')]
+    for name, phases in sorted(results.items()):
+        for phase in BENCHMARK_PHASES:
+            r = phases.get(phase)
+            if r is None:
+                continue
+            lines.append('{0:<10} {1:<17} {2:>10.4f} {3:>8} {4:>12}'.format(
+                        name, phase, r['time'], r['queries'],
+                        r['peak'] if r['peak'] is not None else '-'))
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SQLEDITABLE benchmark')
+    parser.add_argument('--scenario', action='append', default=[])
+    parser.add_argument('--repeat', type=int, default=BENCHMARK_REPEAT)
+    parser.add_argument('--baseline', default=BENCHMARK_BASELINE)
+    parser.add_argument('--save', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=BENCHMARK_TOLERANCE)
+    parser.add_argument('--no-memory', dest='memory', action='store_false')
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    scenarios = [s for s in BENCHMARK_SCENARIOS
+                        if not args.scenario or s['name'] in args.scenario]
+    results = {}
+    for scenario in scenarios:
+        results[scenario['name']] = run_scenario(scenario, args.repeat,
+                                                                args.memory)
+    print(report(results))
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print('baseline saved: {0}'.format(args.baseline))
+        return 0
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except IOError:
+        print('no baseline: {0}'.format(args.baseline))
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for r in regressions:
+        print('REGRESSION ' + r)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
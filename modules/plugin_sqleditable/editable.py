@@ -9,10 +9,25 @@ from gluon import *
 from gluon.html import BUTTON
 from gluon.utils import web2py_uuid
 from gluon.storage import Storage
-from gluon._compat import to_bytes
-from hashlib import md5
+from gluon._compat import to_bytes, to_unicode, string_types, integer_types
+from hashlib import md5, sha256
 from os import urandom
+from collections import OrderedDict
+from operator import methodcaller
+from decimal import Decimal, InvalidOperation
 import base64
+import datetime
+import hmac
+import json
+import logging
+import re
+import threading
+import time
+import zlib
+try:
+    from hashlib import blake2b
+except ImportError:
+    blake2b = None
 
 FORMKEY_STRING                  = '_formkey[{0}]'
 FORMNAME                        = 'ajaxform'
@@ -23,6 +38,7 @@ MAX_FORMKEY                     = 5
 POS_FORMKEY_TO_COPY             = -(MAX_FORMKEY - 1)
 FORMNAME_ID                     = 'formname'
 EDITABLE_ID                     = 'editable'
+STATIC_VERSION                  = '1.0.3'
 AJAX_BUTTON_CLASS                  = 'ajax_btn'
 ID_FORMAT                       = '{row:d}_{field:s}'
 CELL_ID_FORMAT                  = 'cell_' + ID_FORMAT +'_'
@@ -30,6 +46,7 @@ PARENT_ID_FORMAT                = 'parent_' + ID_FORMAT +'_'
 DELETABLE_ID_FORMAT             = 'd({row:d})'
 KEY_ID_FORMAT                   = 'k({row:d})'
 KEY_ID_TAG_ATTR                 = '_' + 'data-keyid'
+KEY_TOKEN_TAG_ATTR              = '_' + 'data-keytoken'
 
 MSG_SUCCESS_CLASS               = 'message_success'
 MSG_FAILURE_CLASS               = 'message_failure'
@@ -44,6 +61,7 @@ FIELD_TIME_CLASS                = 'time'
 FIELD_DATETIME_CLASS            = 'datetime'
 FIELD_SELECT_CLASS              = 'select'
 FIELD_SELECT_BOX_CLASS          = 'selectpicker'
+FIELD_SELECT_LABEL_CLASS        = 'select_label'
 NO_EDIT_CLASS                   = 'noedit'
 FIRST_CELL_CLASS                = 'first_cell'
 CLASS_PREFIX_FOR_MOBILE         = 'm'
@@ -58,52 +76,882 @@ NEWRECORD_FLAG_FIELD            = '__newrecord__'
 DELETE_FLAG_FIELD               = '__delete__'
 NOTCHANGED_FLAG_FIELD           = '__notchanged__'
 STORED_KEY_VALUE                = '__stored_key__'
+ROWNO_FIELD                     = '__rowno__'
 
 TABLE_HASH_AVAILABLE            = True
+TABLE_HASH_MODE_TABLE           = 'table'
+TABLE_HASH_MODE_ROW             = 'row'
+KEY_TOKEN_FIELD                 = '__keytoken__'
+KEY_TOKEN_LENGTH                = 32
 RECORD_HASH_AVAILABLE           = True
 RECORD_HASH_FIELD               = '__rechash__'
 RECORD_HASH_TAG_ATTR            = '_' + 'data-rechash'
 INPUT_HASH_FIELD                = '__inphash__'
 INPUT_HASH_TAG_ATTR             = '_' + 'data-inphash'
 DUMMY_RECORD_HASH_VALUE         = 'DUMMY'
+COLUMN_MISSING                  = object()
+VALIDATION_FALLBACK             = object()
 MSG_RECORD_HASH_CHANGED         = 'record has been changed'
 MSG_RECORD_HASH_DELETED         = 'record has been deleted'
 HASH_SALT_LENGTH                = 8
+FORM_TOKEN_KEY                  = None
+FORM_TOKEN_EXPIRE               = 7200
+FORM_TOKEN_SEPARATOR            = '.'
+FORM_TOKEN_CACHE_PREFIX         = 'plugin_sqleditable/formkey/'
+FORM_TOKEN_CACHE_SIZE           = 100000
+HASH_SEPARATOR                  = b'|'
+
+SUBMIT_MODE_HTML                = 'html'
+SUBMIT_MODE_DELTA               = 'delta'
+SELECT_MODE_CELL                = 'cell'
+SELECT_MODE_SHARED              = 'shared'
+DIRTY_TAG_ATTR                  = '_' + 'data-dirty'
+
+READ_CHUNK_SIZE                 = 500
+COMPOSITE_READ_CHUNK_SIZE       = 100
+
+OPTIONS_CACHE_PREFIX            = 'plugin_sqleditable/options/'
+OPTIONS_CACHE_SIZE              = 128
+OPTIONS_CACHE_TTL               = 300
+HEADER_CACHE_PREFIX             = 'plugin_sqleditable/header/'
+HEADER_CACHE_SIZE               = 64
+
+PAGE_SIZE                       = 50
+PAGE_VAR                        = '_page'
+PAGE_AFTER_VAR                  = '_after'
+PAGE_BEFORE_VAR                 = '_before'
+PAGER_CLASS                     = 'editable_pager'
+PAGER_PREV_LABEL                = '<'
+PAGER_NEXT_LABEL                = '>'
+PAGER_LABEL                     = 'Page %(page)s'
+
+VIRTUAL_VAR                     = '_virtual'
+VIRTUAL_CHUNK_SIZE              = 100
+VIRTUAL_HEIGHT                  = 600
+VIRTUAL_OVERSCAN                = 10
+VIRTUAL_SPACER_CLASS            = 'editable_spacer'
+
+AUTOCOMPLETE_VAR                = '_search'
+AUTOCOMPLETE_FIELD_VAR          = '_field'
+AUTOCOMPLETE_LIMIT              = 20
+AUTOCOMPLETE_MIN_LENGTH         = 1
+AUTOCOMPLETE_DELAY              = 250
+AUTOCOMPLETE_INPUT_CLASS        = 'autocomplete'
+
+INSTRUMENT_TIMING_HEADER        = 'Server-Timing'
+INSTRUMENT_STATS_HEADER         = 'X-Editable-Stats'
+INSTRUMENT_LOGGER               = 'plugin_sqleditable'
+
+METRICS_AVAILABLE               = False
+METRICS_PREFIX                  = 'sqleditable_'
+METRICS_BUCKETS                 = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                                   1, 2.5, 5, 10)
+METRICS_ROW_BUCKETS             = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+COLUMN_DATE_FORMAT              = '%Y-%m-%d'
+COLUMN_DATETIME_FORMAT          = '%Y-%m-%d %H:%M:%S'
+COLUMN_INT_PATTERN              = r'[+-]?[0-9]+'
+COLUMN_ID_PATTERN               = r'[0-9]+'
+COLUMN_NUMBER_PATTERN           = r'[+-]?[0-9]+(?:{0}[0-9]+)?'
+COLUMN_DATE_PATTERN             = r'[0-9]{4}-[0-9]{1,2}-[0-9]{1,2}'
+COLUMN_TIME_PATTERN             = r'[0-9]{1,2}:[0-9]{2}(?::[0-9]{2})?'
+COLUMN_DATETIME_PATTERN         = r'[0-9]{4}-[0-9]{1,2}-[0-9]{1,2} [0-9]{2}:[0-9]{2}:[0-9]{2}'
+COLUMN_SEPARATORS               = re.compile(r'[-: ]')
+
+def coerce_integer(value):
+    value = value if value else 0
+    try:
+        value = int(value)
+    except Exception:
+        pass
+    return value
+
+def coerce_number(value):
+    value = value if value else 0
+    try:
+        value = float(value)
+    except Exception:
+        pass
+    return value
+
+def coerce_time(value):
+    if isinstance(value,str):
+        ls = value.split(':')
+        while range(3-len(ls)):
+            ls.append('00')
+        return ':'.join(ls)
+    return value
+
+COERCE_FUNCTIONS                = {'integer': coerce_integer,
+                                   'number': coerce_number,
+                                   'time': coerce_time}
+
+def compile_converter(field):
+    '''
+    build the converter (raw value -> record value) of the field.
+    '''
+    coerce = COERCE_FUNCTIONS.get(field.type)
+    method = field.method
+    argument = field.argument
+
+    def convert(value):
+        if method and value:
+            value = value(argument()) if argument else value()
+        if coerce is None or value == '':
+            return value
+        return coerce(value)
+    return convert
+
+def join_key_values(values):
+    '''
+    key values -> str ex. keyvalue1|keyvalue2|keyvalue3
+    '''
+    value = ''
+    for v in values:
+        value = value + '|' + str(v) if value else str(v)
+    return value
+
+def xml_escape(value):
+    '''
+    escape the value like gluon.html.xmlescape (quote=True).
+    objects that have the xml method are not escaped.
+    '''
+    if hasattr(value, 'xml') and callable(value.xml):
+        value = value.xml()
+        return value.decode('utf8') if isinstance(value, bytes) else value
+    if isinstance(value, bytes):
+        value = value.decode('utf8')
+    elif not isinstance(value, string_types):
+        value = str(value)
+    return value.replace('&', '&amp;').replace('<', '&lt;').\
+                replace('>', '&gt;').replace('"', '&quot;').\
+                replace("'", '&#x27;')
+
+def xml_start_tag(tag, attributes={}):
+    '''
+    build the start tag like gluon.html.DIV.xml.
+        tag        : tag name. 'name/' is the empty tag.
+        attributes : {'_name': value}. True: name, False/None: omitted.
+    '''
+    attr = []
+    for key, value in attributes.items():
+        if value is True:
+            value = key[1:]
+        elif value is False or value is None:
+            continue
+        attr.append((key[1:], value))
+    attr.sort()
+    fa = ''.join([' {0}="{1}"'.format(n, xml_escape(v)) for n, v in attr])
+    if tag[-1:] == '/':
+        return '<{0}{1} />'.format(tag[:-1], fa)
+    return '<{0}{1}>'.format(tag, fa)
+
+def xml_tag(tag, content='', attributes={}):
+    '''
+    build the markup of the tag like gluon.html.DIV.xml.
+        content    : escaped inner markup.
+    '''
+    if tag[-1:] == '/':
+        return xml_start_tag(tag, attributes)
+    return '{0}{1}</{2}>'.format(xml_start_tag(tag, attributes), content, tag)
+
+def options_signature(validator):
+    '''
+    signature of the option list of IS_IN_SET/IS_IN_DB.
+    '''
+    if hasattr(validator, 'ktable'):
+        label = validator.label
+        if callable(label):
+            code = getattr(label, '__code__', None)
+            label = (code.co_filename, code.co_firstlineno) if code \
+                                                            else repr(label)
+        query = getattr(validator.dbset, 'query', None)
+        return (validator.ktable, validator.kfield, validator.fieldnames,
+                label, str(query) if query is not None else None,
+                str(validator.orderby), str(validator.groupby),
+                str(validator.left), validator.distinct, validator.multiple,
+                validator.zero, validator.sort)
+    return (validator.theset, validator.labels, validator.multiple,
+            validator.zero, validator.sort)
+
+def options_cache_key(field, validator):
+    '''
+    cache key of the option list: referenced table/field/signature.
+    '''
+    signature = md5(to_bytes(repr(options_signature(validator)))).hexdigest()
+    return '{0}/{1}/{2}'.format(getattr(validator, 'ktable', ''), field,
+                                                                    signature)
+
+def column_matcher(pattern):
+    '''
+    match of the pattern (full match) for a value and for a whole column.
+    return value: (match(value), match_column(values))
+        match_column: True if all values are str matching the pattern.
+                      one regex pass over the joined column.
+    '''
+    cell = re.compile(r'(?:{0})\Z'.format(pattern))
+    column = re.compile(r'(?:{0})(?:\n(?:{0}))*\Z'.format(pattern))
+    def match(value):
+        return isinstance(value, string_types) and \
+                                            cell.match(value) is not None
+    def match_column(values):
+        if not all(isinstance(v, string_types) for v in values):
+            return False
+        try:
+            joined = '\n'.join(values)
+        except UnicodeError:
+            # python 2: str & unicode
+            return False
+        # no newline in the values: one line per value
+        return joined.count('\n') == len(values) - 1 and \
+                                            column.match(joined) is not None
+    return match, match_column
+
+def compile_column_check(requires, query=False):
+    '''
+    build the check of the common validators for a whole column:
+     check([value, ...]) -> [validated value, ...]
+    the check gives only the results that are the same as the validators
+    (plain inputs), VALIDATION_FALLBACK for the other values (errors,
+    padded or uncommon inputs) that must go through the validators.
+    None: the validators have no column check.
+        query : IS_IN_DB reads the keys of the column (one query). False:
+                IS_IN_DB has a column check only if its set is loaded.
+    '''
+    strip = methodcaller('strip')
+
+    def in_range(numbers, minimum, maximum, closed=True):
+        return (minimum is None or min(numbers) >= minimum) and \
+               (maximum is None or
+                (max(numbers) <= maximum if closed else max(numbers) < maximum))
+
+    def int_in_range(validator):
+        minimum, maximum = validator.minimum, validator.maximum
+        match, match_column = column_matcher(COLUMN_INT_PATTERN)
+        def cell(value):
+            try:
+                if match(value) and \
+                            in_range([int(value)], minimum, maximum, False):
+                    return int(value)
+            except ValueError:
+                pass
+            return VALIDATION_FALLBACK
+        def check(values):
+            try:
+                numbers = list(map(int, values)) if match_column(values) \
+                                                                    else None
+            except ValueError:
+                numbers = None
+            if numbers and in_range(numbers, minimum, maximum, False):
+                return numbers
+            return [cell(v) for v in values]
+        return check
+
+    def number_in_range(validator, convert):
+        minimum, maximum = validator.minimum, validator.maximum
+        dot = validator.dot
+        if not dot:
+            return None
+        match, match_column = column_matcher(
+                                COLUMN_NUMBER_PATTERN.format(re.escape(dot)))
+        def cell(value):
+            if match(value):
+                value = convert(value.replace(dot, '.'))
+                if in_range([value], minimum, maximum):
+                    return value
+            return VALIDATION_FALLBACK
+        def check(values):
+            if match_column(values):
+                numbers = [convert(v.replace(dot, '.')) for v in values] \
+                                    if dot != '.' else list(map(convert, values))
+                if in_range(numbers, minimum, maximum):
+                    return numbers
+            return [cell(v) for v in values]
+        return check
+
+    def length(validator):
+        # the native str only: IS_LENGTH of python 2 encodes the unicode
+        minsize, maxsize = validator.minsize, validator.maxsize
+        def cell(value):
+            try:
+                if isinstance(value, str) and \
+                                minsize <= len(to_unicode(value)) <= maxsize:
+                    return value
+            except UnicodeError:
+                pass
+            return VALIDATION_FALLBACK
+        def check(values):
+            if all(isinstance(v, str) for v in values):
+                try:
+                    sizes = list(map(len, map(to_unicode, values)))
+                    if minsize <= min(sizes) and max(sizes) <= maxsize:
+                        return list(values)
+                except UnicodeError:
+                    pass
+            return [cell(v) for v in values]
+        return check
+
+    def in_set(validator):
+        if validator.multiple:
+            return None
+        if not validator.theset:
+            # anything goes
+            return list
+        keys = set(k for k, _ in validator.options(zero=False))
+        def cell(value):
+            if isinstance(value, string_types) and value in keys:
+                return value
+            return VALIDATION_FALLBACK
+        def check(values):
+            if all(isinstance(v, string_types) for v in values) and \
+                                                        keys.issuperset(values):
+                return list(values)
+            return [cell(v) for v in values]
+        return check
+
+    def in_db(validator):
+        if validator.multiple or getattr(validator, '_and', None) or \
+                                        getattr(validator, 'auto_add', False):
+            return None
+        key = validator.dbset.db[validator.ktable][validator.kfield]
+        if not key.type in ('id', 'integer') or \
+                                        not (query or validator.theset):
+            return None
+        match = column_matcher(COLUMN_ID_PATTERN)[0]
+        def to_id(value):
+            try:
+                return int(value) if match(value) else None
+            except ValueError:
+                return None
+        def check(values):
+            ids = list(map(to_id, values))
+            if validator.theset:
+                theset = set(validator.theset)
+                keys = set(i for i in ids if str(i) in theset)
+            else:
+                wanted = set(ids) - set([None])
+                keys = set(row[validator.kfield] for row in
+                        validator.dbset(key.belongs(wanted)).select(key)) \
+                                                        if wanted else set()
+            return [i if i is not None and i in keys else VALIDATION_FALLBACK
+                                                                for i in ids]
+        return check
+
+    def not_empty(validator):
+        if validator.empty_regex is not None:
+            return None
+        # the padded values go to the validator (stripped by old pydal)
+        def cell(value):
+            if isinstance(value, string_types) and value and \
+                                                    value == value.strip():
+                return value
+            return VALIDATION_FALLBACK
+        def check(values):
+            if all(isinstance(v, string_types) for v in values) and \
+                        all(values) and list(map(strip, values)) == values:
+                return list(values)
+            return [cell(v) for v in values]
+        return check
+
+    def parse(pattern, convert):
+        match, match_column = column_matcher(pattern)
+        def cell(value):
+            try:
+                if match(value):
+                    return convert(*[int(v) for v in
+                                        COLUMN_SEPARATORS.split(value)])
+            except ValueError:
+                pass
+            return VALIDATION_FALLBACK
+        def check(values):
+            if match_column(values):
+                try:
+                    return [convert(*map(int, COLUMN_SEPARATORS.split(v)))
+                                                            for v in values]
+                except ValueError:
+                    pass
+            return [cell(v) for v in values]
+        return check
+
+    def is_date(validator):
+        if str(validator.format) != COLUMN_DATE_FORMAT:
+            return None
+        return parse(COLUMN_DATE_PATTERN, datetime.date)
+
+    def is_time(validator):
+        return parse(COLUMN_TIME_PATTERN, datetime.time)
+
+    def is_datetime(validator):
+        if str(validator.format) != COLUMN_DATETIME_FORMAT or \
+                                            validator.timezone is not None:
+            return None
+        return parse(COLUMN_DATETIME_PATTERN, datetime.datetime)
+
+    def empty_or(validator):
+        if validator.empty_regex is not None:
+            return None
+        other = compile_column_check(validator.other, query)
+        if other is None:
+            return None
+        null = validator.null
+        def check(values):
+            if all(isinstance(v, string_types) for v in values) and \
+                        all(values) and list(map(strip, values)) == values:
+                return other(values)
+            # blank: null. padded: the validators. the others: other
+            results = [null if v is None or isinstance(v, string_types) and
+                                    not v.strip() else VALIDATION_FALLBACK
+                                                                for v in values]
+            rows = [i for i, v in enumerate(values)
+                        if isinstance(v, string_types) and v and v == v.strip()]
+            for i, value in zip(rows, other([values[i] for i in rows])):
+                results[i] = value
+            return results
+        return check
+
+    builders = {'IS_INT_IN_RANGE': int_in_range,
+                'IS_FLOAT_IN_RANGE': lambda v: number_in_range(v, float),
+                'IS_DECIMAL_IN_RANGE': lambda v: number_in_range(v, Decimal),
+                'IS_LENGTH': length,
+                'IS_IN_SET': in_set,
+                'IS_IN_DB': in_db,
+                'IS_NOT_EMPTY': not_empty,
+                'IS_DATE': is_date,
+                'IS_TIME': is_time,
+                'IS_DATETIME': is_datetime,
+                'IS_EMPTY_OR': empty_or}
+    if not isinstance(requires, (list, tuple)):
+        requires = [requires]
+    checks = []
+    for validator in requires:
+        # default validators of pydal are wrapped by DefaultValidatorProxy
+        if type(validator).__name__ == 'DefaultValidatorProxy':
+            validator = validator.obj
+        builder = builders.get(type(validator).__name__)
+        check = builder(validator) if builder else None
+        if check is None:
+            return None
+        checks.append(check)
+    if not checks:
+        return None
+
+    def chain(values):
+        # the next check gets the values passed by the previous one
+        results = list(values)
+        rows = list(range(len(results)))
+        for check in checks:
+            if not rows:
+                break
+            for i, value in zip(rows, check([results[i] for i in rows])):
+                results[i] = value
+            rows = [i for i in rows if results[i] is not VALIDATION_FALLBACK]
+        return results
+    return chain
+
+class LRUCache(object):
+    '''
+    cache of the definitions (option lists, headers) and of the used form
+    tokens. the key of a definition starts with the table name:
+    'tablename/....'
+        maxsize : max entries of the process local cache (LRU).
+        ttl     : seconds to keep the entry. None: no expiration.
+        backend : web2py cache (cache.ram/cache.disk) instead of the
+                  process local cache.
+        prefix  : prefix of the keys.
+    '''
+    def __init__(self, maxsize=OPTIONS_CACHE_SIZE, ttl=OPTIONS_CACHE_TTL,
+                                        backend=None, prefix=OPTIONS_CACHE_PREFIX):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.prefix = prefix
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __call__(self, key, func):
+        key = self.prefix + key
+        if self.backend is not None:
+            return self.backend(key, func, time_expire=self.ttl)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry and (entry[0] is None or entry[0] > now):
+                self.entries[key] = entry
+                return entry[1]
+        value = func()
+        with self.lock:
+            self.entries[key] = (now + self.ttl if self.ttl else None, value)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def add(self, key, ttl=None):
+        '''
+        add the key once (check & set).
+        return value: False if the key is already in the cache.
+            ttl : seconds to keep the key. None: ttl of the cache.
+        '''
+        key = self.prefix + key
+        ttl = ttl or self.ttl
+        if self.backend is not None:
+            marker = web2py_uuid()
+            return self.backend(key, lambda: marker, time_expire=ttl) == marker
+        now = time.time()
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry and (entry[0] is None or entry[0] > now):
+                self.entries[key] = entry
+                return False
+            self.entries[key] = (now + ttl if ttl else None, True)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return True
+
+    def invalidate(self, tablename):
+        '''
+        drop the entries of the table.
+        '''
+        self.clear('{0}/'.format(tablename))
+
+    def clear(self, key=''):
+        prefix = self.prefix + key
+        if self.backend is not None:
+            self.backend.clear(regex='^' + re.escape(prefix))
+            return
+        with self.lock:
+            for k in [k for k in self.entries if k.startswith(prefix)]:
+                del self.entries[k]
+
+OPTIONS_CACHE                   = LRUCache()
+HEADER_CACHE                    = LRUCache(HEADER_CACHE_SIZE, ttl=None,
+                                           prefix=HEADER_CACHE_PREFIX)
+FORM_TOKEN_CACHE                = LRUCache(FORM_TOKEN_CACHE_SIZE,
+                                           ttl=FORM_TOKEN_EXPIRE,
+                                           prefix=FORM_TOKEN_CACHE_PREFIX)
+
+class SaltedHash(object):
+    '''
+    hashlib like object: digest of (data + salt).
+    '''
+    def __init__(self, algorithm, salt=b''):
+        self.hash = algorithm()
+        self.salt = salt
+
+    def update(self, data):
+        self.hash.update(data)
+
+    def hexdigest(self):
+        h = self.hash.copy()
+        h.update(self.salt)
+        return h.hexdigest()
+
+class Crc32Hash(object):
+    '''
+    hashlib like object of zlib.crc32.
+    not cryptographic: only for the input hash (change detection).
+    '''
+    def __init__(self, key=b''):
+        self.value = zlib.crc32(key) & 0xffffffff
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value) & 0xffffffff
+
+    def hexdigest(self):
+        return '{0:08x}'.format(self.value)
+
+HASH_BACKENDS                   = {'md5': lambda key: SaltedHash(md5, key),
+                                   'sha256': lambda key: SaltedHash(sha256, key),
+                                   'crc32': Crc32Hash}
+if blake2b is not None:
+    HASH_BACKENDS['blake2b'] = lambda key: blake2b(key=key, digest_size=16)
+HASH_BACKEND                    = 'blake2b' if blake2b is not None else 'md5'
+INPUT_HASH_BACKEND              = HASH_BACKEND
+
+class InstrumentPhase(object):
+    '''
+    context of a phase: the duration is recorded by the instrument.
+    (instrument None: does nothing)
+    '''
+    __slots__ = ('instrument', 'name', 'start')
+
+    def __init__(self, instrument, name):
+        self.instrument = instrument
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if self.instrument is not None:
+            self.start = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        if self.instrument is not None:
+            self.instrument.record(self.name, time.time() - self.start)
+        return False
+
+NULL_PHASE                      = InstrumentPhase(None, None)
+
+class MetricsRegistry(object):
+    '''
+    in-process counters & histograms (shared by the requests of a process).
+        prefix  : prefix of the metric names.
+        buckets : default upper bounds of the histogram buckets.
+    the labels are a dict. e.g.) {'table': 'item'}
+    exposition() returns the Prometheus text format.
+    '''
+    def __init__(self, prefix=METRICS_PREFIX, buckets=METRICS_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def labels_key(labels):
+        return tuple(sorted(labels.items())) if labels else ()
+
+    def inc(self, name, labels=None, n=1):
+        key = (name, self.labels_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, name, value, labels=None, buckets=None):
+        '''
+        add the value to the histogram. buckets: bounds of the histogram
+        (used when the histogram is created).
+        '''
+        key = (name, self.labels_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                bounds = tuple(sorted(buckets)) if buckets else self.buckets
+                histogram = self.histograms[key] = \
+                                {'bounds': bounds, 'counts': [0] * len(bounds),
+                                 'sum': 0, 'count': 0}
+            for i, bound in enumerate(histogram['bounds']):
+                if value <= bound:
+                    histogram['counts'][i] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def value(self, name, labels=None):
+        return self.counters.get((name, self.labels_key(labels)), 0)
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def exposition(self):
+        def escape(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').\
+                                                        replace('\n', '\\n')
+
+        def labels_text(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ''
+            return '{' + ','.join('{0}="{1}"'.format(k, escape(v))
+                                                    for k, v in items) + '}'
+
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((k, dict(v, counts=list(v['counts'])))
+                                            for k, v in self.histograms.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            name = self.prefix + name
+            if not name in typed:
+                typed.add(name)
+                lines.append('# TYPE {0} counter'.format(name))
+            lines.append('{0}{1} {2}'.format(name, labels_text(labels), value))
+        for (name, labels), histogram in histograms:
+            name = self.prefix + name
+            if not name in typed:
+                typed.add(name)
+                lines.append('# TYPE {0} histogram'.format(name))
+            cumulative = 0
+            for bound, count in zip(histogram['bounds'], histogram['counts']):
+                cumulative += count
+                lines.append('{0}_bucket{1} {2}'.format(name,
+                        labels_text(labels, [('le', float(bound))]), cumulative))
+            lines.append('{0}_bucket{1} {2}'.format(name,
+                        labels_text(labels, [('le', '+Inf')]), histogram['count']))
+            lines.append('{0}_sum{1} {2}'.format(name, labels_text(labels),
+                                                            histogram['sum']))
+            lines.append('{0}_count{1} {2}'.format(name, labels_text(labels),
+                                                            histogram['count']))
+        return '\n'.join(lines) + '\n'
+
+METRICS                         = MetricsRegistry()
+
+class EditableRejected(RuntimeError):
+    '''
+    RuntimeError of the posted editable tagged with the metric it counts.
+        metric : counter of EDITABLE.metrics (see metrics_error)
+        labels : labels of the counter
+    '''
+    def __init__(self, message, metric='rejected_total', **labels):
+        RuntimeError.__init__(self, message)
+        self.metric = metric
+        self.labels = labels
+
+class Instrument(object):
+    '''
+    per-request record of the phases and the counts of EDITABLE.
+        callback : function(instrument) called by finish().
+        headers  : True: Server-Timing & X-Editable-Stats response headers.
+        log      : True: one json line to the logger 'plugin_sqleditable'.
+    phases: [(name, seconds)] in the order of the end of the phases.
+    counts: 'rows_read', 'rows_changed', 'rows_written', 'queries' (DAL
+            queries, see attach), 'payload' (posted characters).
+    '''
+    def __init__(self, callback=None, headers=True, log=False):
+        self.callback = callback
+        self.headers = headers
+        self.log = log
+        self.phases = []
+        self.counts = {}
+        self.adapter = None
+        self.previous = None
+        self.finished = False
+
+    def phase(self, name):
+        return InstrumentPhase(self, name)
+
+    def record(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def attach(self, db):
+        '''
+        count the queries of the DAL object until finish().
+        return value: False when an attached instrument already counts the
+        queries of the adapter (it is not wrapped twice).
+        '''
+        if self.adapter is not None:
+            return self.adapter is db._adapter
+        adapter = db._adapter
+        execute = adapter.execute
+        instrument = getattr(execute, 'instrument', None)
+        if instrument is not None and instrument.adapter is adapter:
+            return False
+
+        def counted(*args, **kwargs):
+            if self.adapter is adapter:
+                self.count('queries')
+            return execute(*args, **kwargs)
+        counted.instrument = self
+        self.previous = vars(adapter).get('execute')
+        adapter.execute = counted
+        self.adapter = adapter
+        return True
+
+    def detach(self):
+        '''
+        restore the execute of the adapter saved by attach. a wrapper set
+        after attach is kept (the counting stops).
+        '''
+        adapter = self.adapter
+        if adapter is None:
+            return
+        self.adapter = None
+        execute = vars(adapter).get('execute')
+        if getattr(execute, 'instrument', None) is self:
+            if self.previous is None:
+                del adapter.execute
+            else:
+                adapter.execute = self.previous
+        self.previous = None
+
+    def as_dict(self):
+        data = dict(self.counts)
+        data['phases'] = [[n, round(s * 1000, 3)] for n, s in self.phases]
+        return data
+
+    def timing_header(self):
+        return ', '.join('{0};dur={1:.3f}'.format(n, s * 1000)
+                                                    for n, s in self.phases)
+
+    def stats_header(self):
+        return '; '.join('{0}={1}'.format(k, self.counts[k])
+                                                    for k in sorted(self.counts))
+
+    def finish(self):
+        '''
+        stop counting and report (once).
+        '''
+        if self.finished:
+            return
+        self.finished = True
+        self.detach()
+        if self.headers:
+            from gluon import current
+            headers = current.response.headers
+            headers[INSTRUMENT_TIMING_HEADER] = self.timing_header()
+            headers[INSTRUMENT_STATS_HEADER] = self.stats_header()
+        if self.log:
+            logging.getLogger(INSTRUMENT_LOGGER).info(
+                                    json.dumps(self.as_dict(), sort_keys=True))
+        if self.callback:
+            self.callback(self)
 
 class FieldInfo(object):
+    '''
+        field info of the header (immutable).
+        the options are resolved once when the Header is created.
+    '''
+    __slots__ = ('field', 'key_fields', 'name', 'readable', 'writable',
+                 'label', 'default', 'type', 'range', 'length', 'inset',
+                 'virtual', 'method', 'argument', 'key')
+
     def __init__(self, field, key_fields):
-        self.field = field
-        self.key_fields = key_fields
+        init = lambda attr, value: object.__setattr__(self, attr, value)
+        init('field', field)
+        init('key_fields', key_fields)
+        init('name', field['field'])
+        init('readable', self.check_status('readable'))
+        init('writable', self.check_status('writable'))
+        if 'label' in field:
+            init('label', field['label'])
+        elif 'field' in field:
+            init('label', field['field'])
+        else:
+            init('label', None)
+        init('default', field['default'] if 'default' in field else '')
+        for attr in ('type', 'range', 'length', 'inset', 'virtual', 'method',
+                                                                    'argument'):
+            init(attr, field[attr] if attr in field else None)
+        init('key', field['field'] in key_fields)
 
     def __getattr__(self, attr):
-        if attr == 'name':
-            return self.field['field']
-        if attr in ('readable', 'writable'):
-            return self.check_status(attr)
-        if attr == 'label':
-            if attr in self.field:
-                return self.field[attr]
-            elif 'field' in self.field:
-                return self.field['field']
-            return None
-        if attr == 'default':
-            if attr in self.field:
-                return self.field[attr]
-            return ''
-        if attr in self.field:
-            return self.field[attr]
+        # options other than the resolved ones. the slots are not set yet
+        # while copy/pickle builds the object, so they stay missing.
+        if attr in FieldInfo.__slots__ or attr.startswith('__'):
+            raise AttributeError(attr)
+        field = object.__getattribute__(self, 'field')
+        if attr in field:
+            return field[attr]
         return None
 
+    def __setattr__(self, attr, value):
+        raise AttributeError('FieldInfo object is immutable.')
+
     def __getitem__(self, field):
-        return self.__getattr__(field)
+        return getattr(self, field)
+
+    def __reduce__(self):
+        return (FieldInfo, (self.field, self.key_fields))
 
     def __repr__(self):
       return str(self.field)
 
     def is_key(self):
-        if self.field['field'] in self.key_fields:
-            return True
-        return False
+        return self.key
 
     def check_status(self, attr):
         if attr in self.field and self.field[attr] is True:
@@ -131,12 +979,26 @@ class Header(object):
         self.header = header
         self.fields = [f['field'] for f in self.header]
         self.key_fields = key_fields
+        # precomputed field info (field names never start with '_')
+        self._info = {}
+        for f in self.header:
+            if not f['field'] in self._info:
+                self._info[f['field']] = FieldInfo(f, key_fields)
+        self._all = [self._info[f] for f in self.fields]
+        self._readable = [f for f in self._all if f.readable is True]
+        self._writable = [f for f in self._readable if f.writable is True]
+        self._virtual = [f for f in self._all if f.virtual is True]
+        self._real = [f for f in self._all if f.virtual is not True]
+        self._key = [self._info.get(k) for k in key_fields]
+        self._lists = {'all': self._all, 'readable': self._readable,
+                       'writable': self._writable, 'virtual': self._virtual,
+                       'real': self._real, 'key': self._key}
+        # compiled converters
+        self._convert = dict([(f.name, compile_converter(f))
+                                                        for f in self._all])
 
     def __getattr__(self, field):
-        if field in self.fields:
-            return FieldInfo(self.header[self.fields.index(field)], self.key_fields)
-        else:
-            return None
+        return self.__dict__.get('_info', {}).get(field)
 
     def __getitem__(self, field):
         return self.__getattr__(field)
@@ -145,38 +1007,55 @@ class Header(object):
       return str(self.fields)
 
     def all(self):
-        for f in self.fields:
-            yield self.__getattr__(f)
+        return iter(self._all)
 
     def readable(self):
-        for f in self.fields:
-            if self.__getattr__(f).readable is True:
-                yield self.__getattr__(f)
+        return iter(self._readable)
 
     def writable(self):
-        for f in self.fields:
-            if self.__getattr__(f).readable is True and self.__getattr__(f).writable is True:
-                yield self.__getattr__(f)
+        return iter(self._writable)
 
     def virtual(self):
-        for f in self.fields:
-            if self.__getattr__(f).virtual is True:
-                yield self.__getattr__(f)
+        return iter(self._virtual)
 
     def real(self):
-        for f in self.fields:
-            if self.__getattr__(f).virtual is not True:
-                yield self.__getattr__(f)
+        return iter(self._real)
 
     def key(self):
-        for k in self.key_fields:
-            yield self.__getattr__(k)
+        return iter(self._key)
 
     def key_list(self):
         return [k for k in self.key_fields]
 
     def has_attr(self, attr):
-        return attr in self.fields
+        return attr in self._info
+
+    def value(self, record, field):
+        '''
+        convert the value of the field in record (dict).
+        '''
+        if field.name in record:
+            return self._convert[field.name](record[field.name])
+        return None
+
+    def column_values(self, column, field):
+        '''
+        convert the values of the field in the column.
+        COLUMN_MISSING (the row without the field) -> None
+        '''
+        convert = self._convert[field.name]
+        return [convert(v) if v is not COLUMN_MISSING else None
+                                                            for v in column]
+
+    def values(self, record, fields='all'):
+        '''
+        convert the values of record (dict) at once.
+            fields : 'all'/'readable'/'writable'/'virtual'/'real'/'key'
+        return value: list of (FieldInfo, value)
+        '''
+        convert = self._convert
+        return [(f, convert[f.name](record[f.name]) if f.name in record
+                                            else None) for f in self._lists[fields]]
 
 class Record(object):
     def __init__(self, record, header, key_fields=[]):
@@ -186,12 +1065,12 @@ class Record(object):
         self.__dict__['header'] = header
 
     def __getattr__(self, field):
-        if not field in self.header.fields:
+        f = self.header[field]
+        if f is None:
             if field in self.record:
                 return self.record[field]
             else:
                 return None
-        f = self.header[field]
         return self.__value(f)
 
     def __getitem__(self, field):
@@ -210,51 +1089,19 @@ class Record(object):
       return str(self.record)
 
     def all(self):
-        for f in self.header.all():
-            yield f, self.__value(f)
+        return iter(self.header.values(self.record, 'all'))
 
     def readable(self):
-        for f in self.header.readable():
-            yield f, self.__value(f)
+        return iter(self.header.values(self.record, 'readable'))
 
     def writable(self):
-        for f in self.header.writable():
-            yield f, self.__value(f)
+        return iter(self.header.values(self.record, 'writable'))
 
     def real(self):
-        for f in self.header.real():
-            yield f, self.__value(f)
+        return iter(self.header.values(self.record, 'real'))
 
     def __value(self, f):
-        if f.name in self.record:
-            if f.method and self.record[f.name]:
-                value = self.record[f.name](f.argument()) if f.argument else self.record[f.name]()
-            else:
-                value = self.record[f.name]
-            if value == '':
-                return value
-            if f.type == 'integer':
-                value = value if value else 0
-                try:
-                    value = int(value)
-                except:
-                    pass
-                return value
-            if f.type == 'number':
-                value = value if value else 0
-                try:
-                    value = float(value)
-                except:
-                    pass
-                return value
-            if f.type == 'time':
-                if isinstance(value,str):
-                    ls = value.split(':')
-                    while range(3-len(ls)):
-                        ls.append('00')
-                    return ':'.join(ls)
-            return value
-        return None
+        return self.header.value(self.record, f)
 
     def key_value(self):
         for f in self.header.key():
@@ -272,27 +1119,269 @@ class Record(object):
     def as_dict(self):
         return self.record
 
-class RecordArray(object):
-    def __init__(self, array, header, key_fields=[]):
+class ColumnRow(object):
+    '''
+        dict-like view of one row of the columnar RecordArray.
+    '''
+    __slots__ = ('array', 'index')
+
+    def __init__(self, array, index):
         self.array = array
+        self.index = index
+
+    def __contains__(self, field):
+        column = self.array.columns.get(field)
+        return column is not None and column[self.index] is not COLUMN_MISSING
+
+    def __getitem__(self, field):
+        if not field in self:
+            raise KeyError(field)
+        return self.array.columns[field][self.index]
+
+    def __setitem__(self, field, value):
+        column = self.array.columns.get(field)
+        if column is None:
+            column = self.array.columns[field] = \
+                                            [COLUMN_MISSING] * len(self.array)
+        column[self.index] = value
+
+    def __delitem__(self, field):
+        if not field in self:
+            raise KeyError(field)
+        self.array.columns[field][self.index] = COLUMN_MISSING
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return str(dict(self.items()))
+
+    def get(self, field, default=None):
+        return self[field] if field in self else default
+
+    def keys(self):
+        return [f for f in self.array.columns if f in self]
+
+    def items(self):
+        return [(f, self[f]) for f in self.keys()]
+
+class RecordArray(object):
+    '''
+        array of records.
+         columnar: False: list of record dicts.
+                   True : one list per field (incl. flags & hashes).
+                          rows are accessed through ColumnRow views.
+                          the columns are built in one pass over array
+                          (any iterable of dicts, ex. a generator of the
+                          rows of select()). hashing and rendering read
+                          the columns (column/values/key_values).
+    '''
+    def __init__(self, array, header, key_fields=[], columnar=False):
         if not isinstance(header, Header):
             header = Header(header, key_fields)
         self.header = header
+        self.columnar = columnar
+        if columnar:
+            self.array = None
+            self.columns = {}
+            self.length = 0
+            for r in array:
+                for field in r:
+                    column = self.columns.get(field)
+                    if column is None:
+                        column = self.columns[field] = \
+                                                [COLUMN_MISSING] * self.length
+                    column.append(r[field])
+                self.length += 1
+                for column in self.columns.values():
+                    if len(column) < self.length:
+                        column.append(COLUMN_MISSING)
+        else:
+            self.array = array
 
     def __iter__(self):
-        for r in self.array:
-            yield Record(r, self.header)
+        if self.columnar:
+            for n in range(self.length):
+                yield Record(ColumnRow(self, n), self.header)
+        else:
+            for r in self.array:
+                yield Record(r, self.header)
 
     def __len__(self):
+        if self.columnar:
+            return self.length
         return len(self.array)
 
     def __getitem__(self, index):
+        if self.columnar:
+            if index < 0:
+                index += self.length
+            if not 0 <= index < self.length:
+                raise IndexError('list index out of range')
+            return Record(ColumnRow(self, index), self.header)
         return Record(self.array[index], self.header)
 
     def append(self, value):
         if not isinstance(value, Record):
             raise TypeError('value mast be a Record object.')
-        self.array.append(value.as_dict())
+        if self.columnar:
+            record = value.as_dict()
+            for column in self.columns.values():
+                column.append(COLUMN_MISSING)
+            self.length += 1
+            row = ColumnRow(self, self.length - 1)
+            for field in list(record.keys()):
+                row[field] = record[field]
+        else:
+            self.array.append(value.as_dict())
+
+    def column(self, field, missing=None):
+        '''
+        raw values of the field for all rows.
+            missing : value of the rows without the field.
+        '''
+        if self.columnar:
+            column = self.columns.get(field)
+            if column is None:
+                return [missing] * self.length
+            if missing is COLUMN_MISSING:
+                return list(column)
+            return [missing if v is COLUMN_MISSING else v for v in column]
+        return [r[field] if field in r else missing for r in self.array]
+
+    def set_column(self, field, values):
+        '''
+        set the values of the field for all rows.
+        '''
+        if self.columnar:
+            self.columns[field] = list(values)
+        else:
+            for r, value in zip(self.array, values):
+                r[field] = value
+
+    def values(self, field):
+        '''
+        converted values of the field (FieldInfo) for all rows like
+        Record[field] (None: no value).
+        '''
+        return self.header.column_values(
+                                self.column(field.name, COLUMN_MISSING), field)
+
+    def key_values(self):
+        '''
+        key value of all rows like EDITABLE.compress_key_value
+        ('keyvalue1|keyvalue2', '' for the new records)
+        '''
+        fields = list(self.header.key())
+        keys = [self.values(f) for f in fields]
+        new = self.column(NEWRECORD_FLAG_FIELD, COLUMN_MISSING)
+        stored = self.column(STORED_KEY_VALUE, COLUMN_MISSING)
+        values = []
+        for n in range(len(self)):
+            if new[n] is not COLUMN_MISSING:
+                values.append('')
+            elif stored[n] is not COLUMN_MISSING:
+                values.append(join_key_values(stored[n][f.name]
+                                                            for f in fields))
+            else:
+                values.append(join_key_values(key[n] for key in keys))
+        return values
+
+class EditableDelta(object):
+    '''
+        payload of the 'delta' submit mode (posted as json).
+         {'keys': [[key_value, record_hash(, key_token)], ...],
+          'rows': [{'r': rowno, 'i': input_hash, 'd': True/False,
+                    'v': {'field1': value1, 'field2': value2, ...}}, ...]}
+
+         - keys: key cell of all rows (base64 key value & recordhash)
+                 used for the tablehash. (& key token of table_hash_mode
+                 'row')
+         - rows: changed/new/deleted rows only.
+
+        the changes made by the server (key & hashes, field values, error
+        cells, deleted rows) are collected and returned by as_json().
+    '''
+    def __init__(self, payload):
+        if isinstance(payload, bytes):
+            payload = payload.decode()
+        if not isinstance(payload, dict):
+            try:
+                payload = json.loads(payload)
+            except ValueError:
+                raise EditableRejected('Invalid delta payload.',
+                                                              reason='payload')
+            if not isinstance(payload, dict):
+                raise EditableRejected('Invalid delta payload.',
+                                                              reason='payload')
+        keys = payload.get('keys') or []
+        rows = payload.get('rows') or []
+        if not isinstance(keys, list) or not isinstance(rows, list) or \
+           not all(isinstance(k, list) and len(k) in (2, 3) and
+                    all(isinstance(v, string_types) for v in k) for k in keys) or \
+           not all(isinstance(r, dict) and isinstance(r.get('v', {}), dict)
+                                                                for r in rows):
+            raise EditableRejected('Invalid delta payload.', reason='payload')
+        # one row per rowno (bool is not a rowno)
+        rownos = [r.get('r') for r in rows]
+        if not all(isinstance(n, integer_types) and not isinstance(n, bool)
+                                    and 0 <= n < len(keys) for n in rownos) or \
+                                            len(set(rownos)) != len(rownos):
+            raise EditableRejected('Invalid delta payload.', reason='payload')
+        self.keys = keys
+        self.rows = rows
+        self.changes = {}
+        self.error_cells = []
+
+    def key_cell(self, rowno):
+        if isinstance(rowno, integer_types) and not isinstance(rowno, bool) \
+                                            and 0 <= rowno < len(self.keys):
+            return self.keys[rowno]
+        return None
+
+    def tablehash_items(self):
+        items = []
+        for value, hash in (k[:2] for k in self.keys):
+            if value:
+                value = base64.b64decode(value.encode()).decode()
+            items.append((value, hash))
+        return items
+
+    def change(self, rowno):
+        return self.changes.setdefault(str(rowno), {})
+
+    def update_key(self, rowno, value):
+        cell = self.key_cell(rowno)
+        if cell is None:
+            return
+        if 'key_value' in value:
+            cell[0] = value['key_value']
+        if 'record_hash' in value:
+            cell[1] = value['record_hash']
+        if 'key_token' in value:
+            cell[2:] = [value['key_token']]
+        self.change(rowno).setdefault('key', {}).update(value)
+
+    def update_field(self, rowno, field, value):
+        if isinstance(value, (list, tuple)):
+            value = ','.join(str(v) for v in value)
+        elif not isinstance(value, bool):
+            value = str(value)
+        self.change(rowno).setdefault('fields', {})[field] = value
+
+    def set_error(self, rowno, field=None):
+        self.error_cells.append([rowno, field])
+
+    def disable(self, rowno):
+        self.change(rowno)['disabled'] = True
+
+    def as_json(self, **kwargs):
+        data = {'rows': self.changes, 'errors': self.error_cells}
+        data.update(kwargs)
+        return json.dumps(data)
 
 class EDITABLE(FORM):
     '''
@@ -318,6 +1407,74 @@ class EDITABLE(FORM):
 
                'method': reserved keyword for Field.Method. (automatic use)
 
+        submit_mode: 'html' : post the whole editable html.      (default)
+                     'delta': post the changed rows only as json.
+        dirty_tracking: True: read only the rows flagged by the client
+                              (data-dirty of the key cell) in 'html' mode.
+                                                                default=False
+        select_mode: 'cell'  : a SELECT with all the options in every cell of
+                               the inset fields.                (default)
+                     'shared': the cells hold the value & the label only.
+                               the options of each column are passed once
+                               (js config) and the SELECT is created when
+                               the cell gets the focus.
+        autocomplete: IS_IN_DB fields edited with a remote search instead of
+                      the option list. (SQLEDITABLE)
+                      [field, ...] or {field: searched field of the
+                      referenced table (None: the first field of the label)}
+         - the options are not read. the labels are read only for the values
+           of the shown rows and the submitted values are checked in one
+           query.
+         - the client posts _search (prefix) & _field, xml() returns
+           [[value, label], ...] (AUTOCOMPLETE_LIMIT items at most).
+         - single-valued IS_IN_DB (or IS_EMPTY_OR(IS_IN_DB)) only.
+
+        hash_backend      : hash of record/table hashes (keyed by the salt).
+        input_hash_backend: hash of input hashes.
+                     name of HASH_BACKENDS ('blake2b', 'md5', 'sha256',
+                     'crc32') or callable(key) -> hashlib like object.
+
+        form_token_key: None: the formkeys & tablehashes are kept in the
+                              session.                          (default)
+                        key : stateless mode. the formkey field carries a
+                              token signed (hmac) with the key that holds the
+                              tablehash, the salt seed, the page window and
+                              the expiry. renders do not write to the
+                              session. the token is single-use like the
+                              formkey of the session: its nonce is kept in
+                              form_token_cache until it expires.
+        form_token_expire: lifetime of the token in seconds.    default=7200
+        form_token_cache : LRUCache of the used tokens.
+                           default: process local (FORM_TOKEN_CACHE).
+                           LRUCache(backend=cache.redis) for the processes
+                           of several servers.
+
+        table_hash_mode: 'table': one hash of all key cells is checked at
+                                  every submit.                 (default)
+                         'row'  : each key cell carries its own signed
+                                  token (hmac of the key value & recordhash)
+                                  and only the submitted rows that are
+                                  changed or deleted are verified.
+
+        paginate: True: show the table in page windows of maxrow rows and
+                        fetch the other windows with ajax. (SQLEDITABLE)
+         - orderby: order of rows                       default=key fields
+         - keyset : True: address the window by the key of the neighbour
+                          row instead of the offset (single key field).
+
+        virtual: True: only the rows in sight are kept in the DOM. the rows
+                       are fetched in chunks of maxrow rows (json) while
+                       scrolling. (SQLEDITABLE)
+                       needs submit_mode 'delta', table_hash_mode 'row' and
+                       vertical=True (the first two are the defaults).
+                                                    default chunk size=100
+
+        metrics: MetricsRegistry of the saves, renders, conflicts and
+                 validation failures (labelled by table).
+                 True: METRICS (the registry of the process)
+                 exported by controllers/plugin_sqleditable.py/metrics.
+                                    default=METRICS_AVAILABLE (not counted)
+
         record : dict of one record
          {'field1':value1, 'field1':value2, ....., '__rechash__':hash}
 
@@ -330,6 +1487,25 @@ class EDITABLE(FORM):
                  oninit=None, **kwargs):
 
         self.editable_id = EDITABLE_ID
+        self.submit_mode = kwargs.get('submit_mode', SUBMIT_MODE_HTML)
+        self.select_mode = kwargs.get('select_mode', SELECT_MODE_CELL)
+        if not self.select_mode in (SELECT_MODE_CELL, SELECT_MODE_SHARED):
+            raise TypeError('select_mode must be "cell" or "shared".')
+        self.select_labels = {}
+        autocomplete = kwargs.get('autocomplete') or {}
+        self.autocomplete = autocomplete if isinstance(autocomplete, dict) \
+                                            else dict.fromkeys(autocomplete)
+        instrument = kwargs.get('instrument')
+        if instrument is True:
+            instrument = Instrument()
+        elif callable(instrument):
+            instrument = Instrument(callback=instrument)
+        self.instrument = instrument or None
+        metrics = kwargs.get('metrics', METRICS_AVAILABLE)
+        if metrics is True:
+            metrics = METRICS
+        self.metrics = metrics or None
+        self.dirty_tracking = kwargs.get('dirty_tracking', False)
 
         if not self.is_ajax():
             if record and callable(record):
@@ -357,6 +1533,8 @@ class EDITABLE(FORM):
             self.ajax_button_value = current.T(DEFAULT_BUTTON_VALUE)
             self.ajax_button_design_class = 'btn btn-primary'
             self.ajax_button_style = 'padding:8px 15px;margin: 10px;'
+            self.pager_button_class = 'btn btn-default'
+            self.virtual_height = VIRTUAL_HEIGHT
             self.ajax_before = kwargs.get('ajax_before', 'jQuery.noop;')
             self.ajax_after = kwargs.get('ajax_after', 'jQuery.noop;')
 
@@ -390,7 +1568,10 @@ class EDITABLE(FORM):
                     key_fields.append(key)
             else:
                 key_fields = [self.table._id.name]
-            header = Header(self.define_header(
+            if self.instrument:
+                self.instrument.attach(self.table._db)
+            with self.instrument_phase('define_header'):
+                header = Header(self.define_header(
                     header, key_fields, self.showid, self.editid), key_fields)
 
         if isinstance(header, Header):
@@ -403,16 +1584,96 @@ class EDITABLE(FORM):
         self.msg_error_id=MSG_ERROR_ID
         self.cell_error_class=CELL_ERROR_CLASS
         self.table_hash_available = TABLE_HASH_AVAILABLE
+        self.table_hash_mode = kwargs.get('table_hash_mode',
+                                                    TABLE_HASH_MODE_TABLE)
         self.record_hash_available = RECORD_HASH_AVAILABLE
         self.hash_salt_length = HASH_SALT_LENGTH
         self.hash_salt = None
+        self.salt_seed = None
+        self.form_token_key = kwargs.get('form_token_key', FORM_TOKEN_KEY)
+        self.form_token_expire = kwargs.get('form_token_expire',
+                                                            FORM_TOKEN_EXPIRE)
+        self.form_token_cache = kwargs.get('form_token_cache') or \
+                                                            FORM_TOKEN_CACHE
+        self.form_token_nonce = None
+        self.form_tablehash = None
+        self.hash_backend = kwargs.get('hash_backend', HASH_BACKEND)
+        self.input_hash_backend = kwargs.get('input_hash_backend',
+                                                        INPUT_HASH_BACKEND)
+        self.body_tablehash = None
         self.hash_table = None
         self.editable = None
+        self.editable_index = None
+        self.window = None
+        self.virtual = False
         self.validate_all = False
         self.errors = None
         self.o_record = None
         self.next = None
 
+    def instrument_phase(self, name):
+        '''
+        context of the phase timed by the instrument.
+        '''
+        return self.instrument.phase(name) if self.instrument else NULL_PHASE
+
+    def instrument_count(self, name, n=1):
+        if self.instrument:
+            self.instrument.count(name, n)
+
+    def instrument_finish(self):
+        if self.instrument:
+            self.instrument.finish()
+
+    def metrics_inc(self, name, n=1, **labels):
+        '''
+        count up the metric of the table (see MetricsRegistry).
+        '''
+        if self.metrics:
+            labels['table'] = self.metrics_table()
+            self.metrics.inc(name, labels, n)
+
+    def metrics_observe(self, name, value, buckets=None, **labels):
+        if self.metrics:
+            labels['table'] = self.metrics_table()
+            self.metrics.observe(name, value, labels, buckets)
+
+    def metrics_table(self):
+        table = getattr(self, 'table', None)
+        return table._tablename if table else ''
+
+    def metrics_render(self, kind, start):
+        self.metrics_inc('renders_total', format=kind)
+        self.metrics_observe('render_seconds', time.time() - start,
+                                                                format=kind)
+
+    def metrics_save(self, status, start, result=None):
+        '''
+        saves, rows per save & latency of the posted editable.
+        '''
+        if not self.metrics:
+            return
+        self.metrics_inc('saves_total',
+                         status=result or ('accepted' if status else 'rejected'))
+        self.metrics_observe('save_seconds', time.time() - start)
+        if status:
+            rows = len([r for r in self.o_record or []
+                                    if not r.has_field(NOTCHANGED_FLAG_FIELD)])
+            self.metrics_observe('save_rows', rows, METRICS_ROW_BUCKETS)
+
+    def metrics_error(self, error, start):
+        '''
+        the error raised by accepts (hash mismatch, formkey, payload).
+        the EditableRejected errors are counted by their metric.
+        '''
+        if not self.metrics:
+            return
+        if isinstance(error, EditableRejected):
+            self.metrics_inc(error.metric, **error.labels)
+        else:
+            self.metrics_inc('rejected_total', reason='error')
+        self.metrics_save(False, start, result='error')
+
     @staticmethod
     def init():
         def extract(func):
@@ -427,8 +1688,10 @@ class EDITABLE(FORM):
         from gluon import current
         response = current.response
         request = current.request
-        response.files.append(URL('static/plugin_sqleditable/js',
-                                                    'mindmup-editabletable.js'))
+        response.files.append(URL('static', '_{0}/{1}'.format(STATIC_VERSION,
+                            'plugin_sqleditable/js/mindmup-editabletable.js')))
+        response.files.append(URL('static', '_{0}/{1}'.format(STATIC_VERSION,
+                                        'plugin_sqleditable/js/sqleditable.js')))
         response._caller=extract
 
     def check_salt(self, salt, code_base64=False):
@@ -449,16 +1712,72 @@ class EDITABLE(FORM):
         else:
             return salt
 
-    def generate_hash(self, text, use_salt=True):
+    def new_hash(self, use_salt=True, backend=None):
+        '''
+        hashlib like object of the hash backend.
+            use_salt : True: keyed by the salt.
+            backend  : None: hash_backend.
+        '''
         if use_salt is False:
             salt = ''
         elif self.hash_salt_length and not self.hash_salt:
-            salt = self.hash_salt = self.check_salt(None)
+            salt = self.hash_salt = self.new_salt()
         else:
             salt = self.hash_salt if self.hash_salt else ''
-        text = to_bytes(text)
-        salt = to_bytes(salt)
-        return md5(text + salt).hexdigest()
+        backend = backend or self.hash_backend
+        if not callable(backend):
+            backend = HASH_BACKENDS[backend]
+        return backend(to_bytes(salt))
+
+    def update_hash(self, h, values):
+        '''
+        feed the values to the hash object (empty values are skipped).
+        '''
+        for v in values:
+            if v:
+                h.update(to_bytes(str(v)))
+                h.update(HASH_SEPARATOR)
+        return h
+
+    def generate_hash(self, text, use_salt=True):
+        return self.update_hash(self.new_hash(use_salt), [text]).hexdigest()
+
+    def generate_tablehash_digest(self, items):
+        '''
+        items: (key value, recordhash) of rows.
+        '''
+        h = self.new_hash()
+        for item in items:
+            self.update_hash(h, item)
+        return h.hexdigest()
+
+    def generate_keytoken(self, key_value, recordhash):
+        '''
+        signed token of a key cell (table_hash_mode='row').
+        hmac of the key value & recordhash keyed by the salt of the formkey.
+        '''
+        if self.hash_salt_length and not self.hash_salt:
+            self.hash_salt = self.new_salt()
+        message = HASH_SEPARATOR.join(to_bytes(str(v)) if v else b''
+                                            for v in (key_value, recordhash))
+        return hmac.new(to_bytes(self.hash_salt or ''), message,
+                                    sha256).hexdigest()[:KEY_TOKEN_LENGTH]
+
+    def check_keytoken(self, record):
+        '''
+        verify the key token of a changed/deleted record.
+        '''
+        if self.table_hash_mode != TABLE_HASH_MODE_ROW or \
+                                    not self.table_hash_available or \
+                                    record.has_field(NOTCHANGED_FLAG_FIELD):
+            return True
+        keytoken = self.generate_keytoken(self.compress_key_value(record),
+                                                    record[RECORD_HASH_FIELD])
+        if hmac.compare_digest(keytoken, str(record[KEY_TOKEN_FIELD] or '')):
+            return True
+        raise EditableRejected('Key-token mismatch.',
+                                     'hash_mismatches_total', kind='key_token')
+        return False
 
     def compress_key_value(self, record):
         '''
@@ -468,38 +1787,57 @@ class EDITABLE(FORM):
         if not record:
             return ''
         elif isinstance(record, Record):
-            value = ''
             if record.has_field(NEWRECORD_FLAG_FIELD) is False:
-                for _, v in record.key_value():
-                    value = value + '|' + str(v) if value else str(v)
-            return value
+                return join_key_values(v for _, v in record.key_value())
+            return ''
         else:
             return record.split('|')
 
     def generate_tablehash(self, formkey):
-        if self.session:
-            keys = []
-            tablehashes = []
-            if self.hash_table:
+        if self.session or self.form_token_key:
+            if self.table_hash_mode == TABLE_HASH_MODE_ROW:
+                # the key cells are signed one by one (generate_keytoken)
+                tablehash = None
+            elif self.hash_table:
                 tablehash = self.hash_table
+            elif self.body_tablehash:
+                # computed with the input hashes in editable_body_rows
+                tablehash = self.body_tablehash
+                self.body_tablehash = None
+            elif isinstance(self.editable, EditableDelta):
+                tablehash = self.generate_tablehash_digest(
+                                            self.editable.tablehash_items())
+            elif self.dirty_tracking and isinstance(self.editable, DIV):
+                # the rows skipped by readout_editable are not in self.record
+                tablehash = self.generate_tablehash_digest(
+                                    self.editable_tablehash_items(self.editable))
+            elif getattr(self.record, 'columnar', False):
+                tablehash = self.generate_tablehash_digest(
+                                zip(self.record.key_values(),
+                                    self.record.column(RECORD_HASH_FIELD)))
             else:
-                for rec in self.record:
-                    keys.append(self.compress_key_value(rec))
-                    if rec.has_field(RECORD_HASH_FIELD):
-                        tablehashes.append(rec[RECORD_HASH_FIELD])
-                keys.extend(tablehashes)
-                serialized = '|'.join(str(k) for k in keys if k)
-                tablehash = self.generate_hash(serialized)
+                tablehash = self.generate_tablehash_digest(
+                    (self.compress_key_value(rec), rec[RECORD_HASH_FIELD])
+                                                        for rec in self.record)
+            if self.form_token_key:
+                # carried by the signed formkey (issue_formkey)
+                self.form_tablehash = tablehash
+                return tablehash
             hash_salt = self.check_salt(self.hash_salt, code_base64=True)
             hashname =  TABLEHASH_STRING.format(self.formname)
+            entry = [tablehash, hash_salt]
+            if self.window:
+                entry.append(dict(self.window))
             self.session[hashname] = list(self.session.get(hashname,[]))[POS_FORMKEY_TO_COPY:] +\
-                                        [[formkey, [tablehash, hash_salt]]]
+                                        [[formkey, entry]]
             return tablehash
         else:
             return None
 
     def generate_formkey(self):
-        if self.session:
+        if self.form_token_key:
+            return web2py_uuid()
+        elif self.session:
             formkey = web2py_uuid()
             keyname =  FORMKEY_STRING.format(self.formname)
             self.session[keyname] = list(self.session.get(keyname,[]))[POS_FORMKEY_TO_COPY:] +\
@@ -518,69 +1856,224 @@ class EDITABLE(FORM):
         # check editable object
         if not editable:
             return False
-        elif not isinstance(editable, DIV):
-            editable = TAG(editable)
+        elif self.table_hash_mode == TABLE_HASH_MODE_ROW:
+            # the key tokens of the submitted rows are checked in readout
+            items = None
+        elif isinstance(editable, EditableDelta):
+            items = editable.tablehash_items()
+        else:
+            if not isinstance(editable, DIV):
+                editable = TAG(editable)
+            items = self.editable_tablehash_items(editable)
 
-        keys = []
-        recordhashes = []
         tablehash = None
-        r = 0
-        cond = True
-        while cond:
-            el = self.pick_element(editable, r, special='key')
-            if el:
-                value = el[KEY_ID_TAG_ATTR]
-                hash = el[RECORD_HASH_TAG_ATTR]
-                if value:
-                    keys.append(base64.b64decode(value.encode()).decode())
-                if hash:
-                    recordhashes.append(hash)
-            else:
-                break
-            r += 1
-        keys.extend(recordhashes)
-        serialized = '|'.join(str(k) for k in keys)
 
-        if self.session:
+        if self.form_token_key:
+            # restored from the signed formkey by check_formkey
+            tablehash = self.form_tablehash
+            if items is None:
+                return True
+            tablehash_editable = self.generate_tablehash_digest(items)
+            if tablehash and tablehash == tablehash_editable:
+                self.hash_table = tablehash
+                return True
+            else:
+                raise EditableRejected('Table-hash mismatch.',
+                                         'hash_mismatches_total', kind='table')
+                return False
+        elif self.session:
             hashname =  TABLEHASH_STRING.format(self.formname)
             tablehashes = dict(self.session.get(hashname, []))
             if(formkey and tablehashes and formkey in tablehashes):
-                (tablehash,hash_salt) = tablehashes[formkey]
+                entry = tablehashes[formkey]
+                (tablehash,hash_salt) = entry[:2]
+                if len(entry) > 2:
+                    self.window = Storage(entry[2])
                 self.hash_salt = self.check_salt(hash_salt)
                 tablehashes.pop(formkey)
                 self.session[hashname] = \
                                     [[k, tablehashes[k]] for k in tablehashes]
-                tablehash_editable = self.generate_hash(serialized)
+                if items is None:
+                    return True
+                tablehash_editable = self.generate_tablehash_digest(items)
                 if tablehash == tablehash_editable:
                     self.hash_table = tablehash
                     return True
                 else:
-                    raise RuntimeError('Table-hash mismatch.')
+                    raise EditableRejected('Table-hash mismatch.',
+                                         'hash_mismatches_total', kind='table')
                     return False
             else:
-                raise RuntimeError('There is not tablehash.')
+                raise EditableRejected('There is not tablehash.',
+                                                            reason='tablehash')
                 return False
         else:
-            raise RuntimeError('There is not session.')
+            raise EditableRejected('There is not session.', reason='session')
             return False
 
+    def editable_tablehash_items(self, editable):
+        '''
+        (key value, recordhash) of the key cells of the html editable.
+        '''
+        items = []
+        r = 0
+        while True:
+            el = self.pick_element(editable, r, special='key')
+            if not el:
+                break
+            value = el[KEY_ID_TAG_ATTR]
+            if value:
+                value = base64.b64decode(value.encode()).decode()
+            items.append((value, el[RECORD_HASH_TAG_ATTR]))
+            r += 1
+        return items
+
+    def retire_formkey(self, formkey):
+        '''
+        remove the formkey and the tablehash of the replaced page window.
+        '''
+        if self.form_token_key or not self.session or not formkey:
+            return
+        keyname =  FORMKEY_STRING.format(self.formname)
+        formkeys = list(self.session.get(keyname, []))
+        if formkey in formkeys:
+            formkeys.remove(formkey)
+            self.session[keyname] = formkeys
+        hashname =  TABLEHASH_STRING.format(self.formname)
+        self.session[hashname] = [[k, v] for k, v in
+                        self.session.get(hashname, []) if k != formkey]
+
     def check_formkey(self, formkey):
-        if self.session:
+        if self.form_token_key:
+            if not self.read_formkey(formkey):
+                return False
+            # single-use like the formkey of the session
+            if not self.form_token_cache.add(self.form_token_nonce,
+                                                    self.form_token_expire):
+                raise EditableRejected('Formkey has already been used.',
+                                                         reason='formkey_used')
+                return False
+            return True
+        elif self.session:
             keyname =  FORMKEY_STRING.format(self.formname)
             formkeys = list(self.session.get(keyname, []))
             if(formkey and formkeys and formkey in formkeys):
                 self.session[keyname].remove(formkey)
                 return True
             else:
-                raise RuntimeError('Too many open browser tabs (MAX {} in one session).'.format(MAX_FORMKEY))
+                raise EditableRejected('Too many open browser tabs (MAX {} in one session).'.format(MAX_FORMKEY),
+                                                     'formkey_exhausted_total')
                 return False
         else:
-            raise RuntimeError('There is not session.')
+            raise EditableRejected('There is not session.', reason='session')
             return False
 
+    def derive_salt(self, seed):
+        '''
+        salt of the stateless mode (secret without the form token key).
+        '''
+        return hmac.new(to_bytes(self.form_token_key), b'salt|' + seed,
+                                    sha256).digest()[:self.hash_salt_length]
+
+    def new_salt(self):
+        '''
+        new salt of the hashes.
+        the stateless mode derives it from a random seed (salt_seed)
+        that is carried by the signed formkey.
+        '''
+        if self.form_token_key and self.hash_salt_length > 0:
+            self.salt_seed = urandom(self.hash_salt_length)
+            return self.derive_salt(self.salt_seed)
+        return self.check_salt(None)
+
+    def sign_form_token(self, payload):
+        return hmac.new(to_bytes(self.form_token_key), b'formkey|' + payload,
+                                                        sha256).hexdigest()
+
+    def issue_formkey(self, formkey):
+        '''
+        value of the formkey field.
+            session mode  : formkey
+            stateless mode: base64(json) + '.' + hmac of
+                            {'k': formkey, 'f': formname, 'e': expiry,
+                             't': [tablehash, salt seed, page window]}
+        '''
+        if not self.form_token_key or formkey is None:
+            return formkey
+        if self.hash_salt_length > 0 and not self.hash_salt:
+            self.hash_salt = self.new_salt()
+        seed = base64.b64encode(self.salt_seed).decode() \
+                                                if self.salt_seed else ''
+        entry = [self.form_tablehash, seed]
+        if self.window:
+            entry.append(dict(self.window))
+        payload = base64.urlsafe_b64encode(to_bytes(json.dumps(
+                {'k': formkey, 'f': self.formname, 't': entry,
+                 'e': int(time.time()) + self.form_token_expire},
+                separators=(',', ':'))))
+        return payload.decode() + FORM_TOKEN_SEPARATOR + \
+                                                self.sign_form_token(payload)
+
+    def read_formkey(self, formkey):
+        '''
+        check the signed formkey of the stateless mode and restore the
+        tablehash, the salt and the page window.
+        '''
+        (payload, _, signature) = str(formkey or '').rpartition(
+                                                        FORM_TOKEN_SEPARATOR)
+        payload = to_bytes(payload)
+        if not payload or not hmac.compare_digest(
+                                    self.sign_form_token(payload), signature):
+            raise EditableRejected('Invalid formkey.', reason='formkey')
+            return False
+        try:
+            token = json.loads(base64.urlsafe_b64decode(payload).decode())
+            (tablehash, seed) = token['t'][:2]
+            nonce = str(token['k'])
+        except (ValueError, TypeError, KeyError):
+            raise EditableRejected('Invalid formkey.', reason='formkey')
+            return False
+        if token.get('f') != self.formname:
+            raise EditableRejected('Invalid formkey.', reason='formkey')
+            return False
+        if token.get('e', 0) < time.time():
+            raise EditableRejected('Formkey has expired.',
+                                                      reason='formkey_expired')
+            return False
+        self.form_token_nonce = nonce
+        self.form_tablehash = tablehash
+        if seed:
+            self.salt_seed = base64.b64decode(seed.encode())
+            self.hash_salt = self.derive_salt(self.salt_seed)
+        if len(token['t']) > 2:
+            self.window = Storage(token['t'][2])
+        return True
+
+    def restore_salt(self, formkey):
+        '''
+        restore the salt of the formkey without consuming the formkey.
+        '''
+        if self.form_token_key:
+            window = self.window
+            self.read_formkey(formkey)
+            self.window = window
+            return True
+        hashname =  TABLEHASH_STRING.format(self.formname)
+        entry = dict(self.session.get(hashname, [])).get(formkey) \
+                                        if self.session and formkey else None
+        if entry is None:
+            raise EditableRejected('There is not tablehash.',
+                                                            reason='tablehash')
+            return False
+        self.hash_salt = self.check_salt(entry[1])
+        return True
+
     def generate_inputhash(self, record):
-        serialized = '|'.join(str(v) for _, v in record.writable() if v)
-        return self.generate_hash(serialized, use_salt=False)
+        return self.generate_inputhash_values(v for _, v in record.writable())
+
+    def generate_inputhash_values(self, values):
+        h = self.new_hash(use_salt=False, backend=self.input_hash_backend)
+        return self.update_hash(h, values).hexdigest()
 
     def check_inputhash(self, record):
         if not record[INPUT_HASH_FIELD]:
@@ -590,6 +2083,9 @@ class EDITABLE(FORM):
         return False
 
     def refresh_editable(self, editable):
+        if isinstance(editable, EditableDelta):
+            return self.refresh_delta(editable)
+
         if self.next and not self.errors:
             script = 'location.href = "{0}"'.format(self.next)
             return DIV(SCRIPT(script, _type='text/javascript'), editable)
@@ -619,12 +2115,12 @@ class EDITABLE(FORM):
         checkboxs = editable.elements(_type='checkbox')
         for checkbox in checkboxs:
             checkbox['_checked'] = True if checkbox['_value']=='on' else False
-        # formkey
+        # formkey & tablehash
         formkey = self.generate_formkey()
-        editable.element(_id=self.formkey_id).attributes['_value'] = formkey
-        # tablehash
         if self.table_hash_available:
             self.generate_tablehash(formkey)
+        self.element_by_id(editable, self.formkey_id).attributes['_value'] = \
+                                                self.issue_formkey(formkey)
         # errors
         if self.errors:
             message = ''
@@ -634,6 +2130,28 @@ class EDITABLE(FORM):
             editable = DIV(message, editable)
         return editable
 
+    def refresh_delta(self, delta):
+        from gluon import current
+        current.response.headers['Content-Type'] = 'application/json'
+        if self.next and not self.errors:
+            return json.dumps({'next': str(self.next)})
+        # formkey
+        formkey = self.generate_formkey()
+        # tablehash
+        if self.table_hash_available:
+            self.generate_tablehash(formkey)
+        messages = [str(error) for error in self.errors] if self.errors else []
+        return delta.as_json(formkey=self.issue_formkey(formkey),
+                                                            messages=messages)
+
+    def row_offset(self):
+        '''
+        line number offset of the page window.
+        '''
+        if self.window and self.maxrow:
+            return (self.window.page - 1) * self.maxrow
+        return 0
+
     def build_editable_header(self):
         head = [TH(self.lineno_label)] if self.lineno else []
         if self.vertical:
@@ -645,13 +2163,16 @@ class EDITABLE(FORM):
         else:
             if self.lineno:
                 maxrow = self.maxrow if self.maxrow else len(self.record)
-                line = [TH('{0:d}'.format(r)) for r in range(1, maxrow+1)]
+                offset = self.row_offset()
+                line = [TH('{0:d}'.format(r)) for r in
+                                        range(offset+1, offset+maxrow+1)]
             else:
                 return None
             head.extend(line)
         return THEAD(TR(head))
 
-    def __field_tag(self, field, value, rowno, p_class, p_style, p_disabled):
+    def __field_tag(self, field, value, rowno, p_class, p_style, p_disabled,
+                                                                html=False):
         id = field.name
         type = field.type
 
@@ -667,29 +2188,54 @@ class EDITABLE(FORM):
                     val += (',' if val else '') + str(v)
             else:
                 val = value
-            text = DIV(val, _style='display:none;',
-                       _id=CELL_ID_FORMAT.format(field=id, row=rowno))
-            opt = [OPTION(l, _value=v) for v, l in field.inset['items']]
-
-            select = SELECT(
-                    opt,
-                    value= value,
-                    _disabled=p_disabled,
-                    _multiple= multiple,
-                    _class=FIELD_SELECT_BOX_CLASS,
-                    _style='width:100%;')
-            value = [text, select]
+            text_attr = {'_style': 'display:none;',
+                         '_id': CELL_ID_FORMAT.format(field=id, row=rowno)}
+            select_attr = {'_disabled': p_disabled,
+                           '_multiple': multiple,
+                           '_class': FIELD_SELECT_BOX_CLASS,
+                           '_style': 'width:100%;'}
+            if self.select_mode == SELECT_MODE_SHARED or \
+                                                field.has_attr('inset.remote'):
+                label = self.inset_label(field, value)
+                label_attr = {'_class': FIELD_SELECT_LABEL_CLASS}
+                if html:
+                    value = XML(xml_tag('div', xml_escape(val), text_attr) +
+                                xml_tag('span', xml_escape(label), label_attr))
+                else:
+                    value = [DIV(val, **text_attr), SPAN(label, **label_attr)]
+            elif html:
+                if not multiple:
+                    selected = [str(value)]
+                elif isinstance(value, (list,tuple)):
+                    selected = [str(v) for v in value]
+                else:
+                    selected = [str(value)]
+                opt = ''.join([xml_tag('option', xml_escape(l),
+                        {'_value': v,
+                         '_selected': 'selected' if str(v) in selected
+                                                                else None})
+                        for v, l in field.inset['items']])
+                value = XML(xml_tag('div', xml_escape(val), text_attr) +
+                            xml_tag('select', opt, select_attr))
+            else:
+                text = DIV(val, **text_attr)
+                opt = [OPTION(l, _value=v) for v, l in field.inset['items']]
+                select = SELECT(opt, value=value, **select_attr)
+                value = [text, select]
             p_class.append(FIELD_SELECT_CLASS)
             p_class.append('parent')
             id_type = PARENT_ID_FORMAT
 
         elif type == 'boolean':
-            value = INPUT(
-                    _type='checkbox',
-                    _checked=True if value else False,
-                    _value = 'on' if value else 'off',
-                    _disabled=p_disabled,
-                    _id=CELL_ID_FORMAT.format(field=id, row=rowno))
+            input_attr = {'_type': 'checkbox',
+                          '_checked': True if value else False,
+                          '_value': 'on' if value else 'off',
+                          '_disabled': p_disabled,
+                          '_id': CELL_ID_FORMAT.format(field=id, row=rowno)}
+            if html:
+                value = XML(xml_tag('input/', attributes=input_attr))
+            else:
+                value = INPUT(**input_attr)
             p_class.append('parent')
             id_type = PARENT_ID_FORMAT
 
@@ -711,36 +2257,100 @@ class EDITABLE(FORM):
         p_class.append(FIELD_CLASS_PREFIX + str(id))
         p_class = ' '.join(p_class) if p_class else False
         p_style = ' '.join(p_style) if p_style else False
-        td = TD(value, _style=p_style, _class =p_class,
-                _disabled=p_disabled, _name=type,
-                _id=id_type.format(field=id, row=rowno))
-        return td
-
-    def __deletable_tag(self, rowno):
-        value = INPUT(_type='checkbox', _checked=False, _value='off',
-                      _id=DELETABLE_ID_FORMAT.format(row=rowno))
-        td = TD(value, _class=DELETABLE_CLASS + ' parent')
-        return td
-
-    def __key_tag(self, record, rowno):
+        td_attr = {'_style': p_style, '_class': p_class,
+                   '_disabled': p_disabled, '_name': type,
+                   '_id': id_type.format(field=id, row=rowno)}
+        if html:
+            if isinstance(value, (list,tuple)):
+                content = ''.join([xml_escape(v) for v in value])
+            else:
+                content = xml_escape(value)
+            return xml_tag('td', content, td_attr)
+        return TD(value, **td_attr)
+
+    def inset_label(self, field, value):
+        '''
+        label of the value of the inset field (shared select_mode).
+        the labels of multiple values are joined with ', '.
+        '''
+        labels = self.select_labels.get(field.name)
+        if labels is None:
+            labels = self.select_labels[field.name] = \
+                    dict((str(v), str(l)) for v, l in field.inset['items'] or [])
+        if isinstance(value, string_types) and ',' in value and \
+                    field.has_attr('inset.multiple') and field.inset['multiple']:
+            value = value.split(',')
+        if isinstance(value, (list, tuple)):
+            return ', '.join(labels.get(str(v), str(v)) for v in value)
+        return labels.get(str(value), str(value))
+
+    def __deletable_tag(self, rowno, html=False):
+        input_attr = {'_type': 'checkbox', '_checked': False, '_value': 'off',
+                      '_id': DELETABLE_ID_FORMAT.format(row=rowno)}
+        td_attr = {'_class': DELETABLE_CLASS + ' parent'}
+        if html:
+            return xml_tag('td', xml_tag('input/', attributes=input_attr),
+                           td_attr)
+        return TD(INPUT(**input_attr), **td_attr)
+
+    def __key_tag(self, key, rowno, html=False):
+        '''
+            key : (key value, recordhash, inputhash) of the row.
+                  None: title.
+        '''
         parm = {}
         if rowno is not None:
             parm[KEY_ID_TAG_ATTR] = \
-                            base64.b64encode(self.compress_key_value(record).encode()).decode()
+                            base64.b64encode(key[0].encode()).decode()
             id = KEY_ID_FORMAT.format(row=rowno)
         else:
             id = False
-        if record:
-            if record.has_field(RECORD_HASH_FIELD):
-                parm[RECORD_HASH_TAG_ATTR] = record[RECORD_HASH_FIELD]
-            if record.has_field(INPUT_HASH_FIELD):
-                parm[INPUT_HASH_TAG_ATTR] = record[INPUT_HASH_FIELD]
-        td = TD(_class=NO_EDIT_CLASS, _id = id, _style="display:none;", **parm)
-        return td
+        if key:
+            (key_value, recordhash, inputhash) = key
+            if recordhash is not None:
+                parm[RECORD_HASH_TAG_ATTR] = recordhash
+            if inputhash is not None:
+                parm[INPUT_HASH_TAG_ATTR] = inputhash
+            if rowno is not None and self.table_hash_available and \
+                            self.table_hash_mode == TABLE_HASH_MODE_ROW:
+                parm[KEY_TOKEN_TAG_ATTR] = self.generate_keytoken(key_value,
+                                                                recordhash)
+        parm.update({'_class': NO_EDIT_CLASS, '_id': id,
+                     '_style': 'display:none;'})
+        if html:
+            return xml_tag('td', attributes=parm)
+        return TD(**parm)
+
+    def __row_tag(self, line, html=False):
+        if html:
+            return xml_tag('tr', ''.join(line))
+        return TR(line)
+
+    def __title_tag(self, label, html=False, **attributes):
+        if html:
+            return xml_tag('th', xml_escape(label), attributes)
+        return TH(label, **attributes)
 
     @property
     def build_editable_body(self):
+        return TBODY(list(self.editable_body_rows()))
+
+    def stream_editable_body(self):
+        '''
+        generate the markup of the editable body as escaped html chunks
+        (one chunk per row). the markup is the same as build_editable_body.
+        '''
+        yield '<tbody>'
+        for row in self.editable_body_rows(html=True):
+            yield row
+        yield '</tbody>'
 
+    def editable_body_rows(self, html=False):
+        '''
+        generate the rows of the editable body.
+            html : False: TR objects.
+                   True : escaped html strings.
+        '''
         def newrecord():
             record = Record({}, self.header)
             record[NEWRECORD_FLAG_FIELD] = True
@@ -749,27 +2359,37 @@ class EDITABLE(FORM):
             record[INPUT_HASH_FIELD] = self.generate_inputhash(record)
             return record
 
-        def set_record(rowno):
-            if rowno < len(self.record):
-                return self.record[rowno]
-            else:
-                return new_record
+        def body_records():
+            '''
+            (cells, key cell) of the rows. [(FieldInfo, value), ...]
+            '''
+            fields = list(self.record.header.all())
+            count = min(maxrow, len(self.record))
+            for _, values, key in zip(range(count), self.record_rows(),
+                                                        self.record_keys()):
+                yield list(zip(fields, values)), key
+            new_cells = (list(new_record.all()), self.key_cell(new_record))
+            for r in range(count, maxrow):
+                yield new_cells
 
         maxrow = self.maxrow if self.maxrow else len(self.record)
-        contents = []
+        offset = self.row_offset()
+        # the ids of the virtual mode use the row number of the whole table
+        base = offset if self.virtual else 0
 
-        for record in self.record:
-            record[INPUT_HASH_FIELD ] = self.generate_inputhash(record)
+        self.hash_records()
+        if hasattr(self, 'table'):
+            self.resolve_labels()
         new_record = newrecord()
 
         if self.vertical:
             first = True
-            for r in range(maxrow):
-                record = set_record(r)
-                line = [TH('{0:d}'.format(r+1))] if self.lineno else []
+            for r, (cells, key) in enumerate(body_records()):
+                line = [self.__title_tag('{0:d}'.format(offset+r+1), html)] \
+                                                        if self.lineno else []
                 if self.deletable:
-                    line.append(self.__deletable_tag(r))
-                for f, v in record.all():
+                    line.append(self.__deletable_tag(base+r, html))
+                for f, v in cells:
                     p_class = []
                     p_style = []
                     p_disabled = False
@@ -784,25 +2404,27 @@ class EDITABLE(FORM):
                         first = False
 
                     value = v if not v is None else ''
-                    line.append(self.__field_tag(f, value, r, p_class, p_style,
-                                                                    p_disabled))
-                line.append(self.__key_tag(record, r))
-                contents.append(TR(line))
+                    line.append(self.__field_tag(f, value, base+r, p_class,
+                                                    p_style, p_disabled, html))
+                line.append(self.__key_tag(key, base+r, html))
+                yield self.__row_tag(line, html)
         else:
+            rows = [(dict((f.name, v) for f, v in cells), key)
+                                            for cells, key in body_records()]
             if self.deletable:
-                line = [TH(self.deleteable_label, _class=DELETABLE_CLASS)]
+                line = [self.__title_tag(self.deleteable_label, html,
+                                                    _class=DELETABLE_CLASS)]
                 for r in range(maxrow):
-                    line.append(self.__deletable_tag(r))
-                contents.append(TR(line))
+                    line.append(self.__deletable_tag(r, html))
+                yield self.__row_tag(line, html)
 
             first = True
             for f in self.header.all():
                 line = []
                 if f.readable:
-                    line.append(TH(f.label))
+                    line.append(self.__title_tag(f.label, html))
 
                 for r in range(maxrow):
-                    record = set_record(r)
                     p_class = []
                     p_style = []
                     p_disabled = False
@@ -816,19 +2438,138 @@ class EDITABLE(FORM):
                         p_class.append(FIRST_CELL_CLASS)
                         first = False
 
-                    value = record[f.name] if not record[f.name] is None else ''
+                    value = rows[r][0].get(f.name)
+                    value = value if not value is None else ''
                     line.append(self.__field_tag(f, value, r, p_class, p_style,
-                                                                    p_disabled))
-                contents.append(TR(line))
+                                                              p_disabled, html))
+                yield self.__row_tag(line, html)
 
             line = []
-            line.append(self.__key_tag(None, None))     # title
+            line.append(self.__key_tag(None, None, html))     # title
             for r in range(maxrow):
-                record = set_record(r)
-                line.append(self.__key_tag(record, r))
-            contents.append(TR(line))
+                line.append(self.__key_tag(rows[r][1], r, html))
+            yield self.__row_tag(line, html)
+
+    def key_cell(self, record):
+        '''
+        (key value, recordhash, inputhash) of the record. None: no hash.
+        '''
+        return (self.compress_key_value(record),
+                record[RECORD_HASH_FIELD]
+                            if record.has_field(RECORD_HASH_FIELD) else None,
+                record[INPUT_HASH_FIELD]
+                            if record.has_field(INPUT_HASH_FIELD) else None)
+
+    def record_keys(self):
+        '''
+        key cell of each record (see key_cell).
+        the columnar RecordArray is read column by column.
+        '''
+        array = self.record
+        if getattr(array, 'columnar', False):
+            return zip(array.key_values(), array.column(RECORD_HASH_FIELD),
+                                            array.column(INPUT_HASH_FIELD))
+        return (self.key_cell(record) for record in array)
+
+    def record_rows(self):
+        '''
+        converted values of each record (in the order of the header).
+        the columnar RecordArray is read column by column.
+        '''
+        array = self.record
+        if getattr(array, 'columnar', False):
+            columns = [array.values(f) for f in array.header.all()]
+            return zip(*columns) if columns else [()] * len(array)
+        return ([v for _, v in record.all()] for record in array)
 
-        return TBODY(contents)
+    def hash_records(self):
+        '''
+        input hashes of the records and the tablehash in one pass.
+        the columnar RecordArray is read column by column.
+        '''
+        tablehash = self.new_hash() if self.table_hash_available and \
+                    self.table_hash_mode != TABLE_HASH_MODE_ROW else None
+        if getattr(self.record, 'columnar', False):
+            array = self.record
+            columns = [array.values(f) for f in array.header.writable()]
+            rows = zip(*columns) if columns else [()] * len(array)
+            array.set_column(INPUT_HASH_FIELD,
+                        [self.generate_inputhash_values(v) for v in rows])
+            if tablehash is not None:
+                for item in zip(array.key_values(),
+                                            array.column(RECORD_HASH_FIELD)):
+                    self.update_hash(tablehash, item)
+        else:
+            for record in self.record:
+                record[INPUT_HASH_FIELD ] = self.generate_inputhash(record)
+                if tablehash is not None:
+                    self.update_hash(tablehash,
+                                        (self.compress_key_value(record),
+                                         record[RECORD_HASH_FIELD]))
+        if tablehash is not None:
+            self.body_tablehash = tablehash.hexdigest()
+
+    def as_json(self, readonly=False):
+        '''
+        header, rows and key cells as compact json (without html).
+         {'header': [[field, label, type, readable, writable], ...],
+          'key'   : [key field, ...],
+          'inset' : {field: {'multiple': bool, 'items': [[value, label]]}},
+                     (autocomplete fields: the items of the values in rows)
+          'rows'  : [[value, ...], ...],              (in the order of header)
+          'cells' : [[key_value, record_hash, input_hash(, key_token)], ...],
+          'formkey': formkey, 'formname': formname,
+          'window': page window (paginate)}
+
+         - cells: key cell of each row (key_value is base64 like data-keyid).
+                  the changes are posted as the 'delta' payload with the
+                  formkey. (submit_mode='delta')
+
+        readonly: True: without cells & formkey. the result does not depend
+                        on the session (can be cached by a proxy).
+        '''
+        from gluon import current
+        current.response.headers['Content-Type'] = 'application/json'
+        start = time.time()
+        fields = list(self.header.all())
+        if hasattr(self, 'table'):
+            self.resolve_labels()
+        data = {'header': [[f.name, str(f.label), f.type, f.readable,
+                                                f.writable] for f in fields],
+                'key': self.header.key_list(),
+                'inset': dict((f.name, {
+                                    'multiple': bool(f.inset.get('multiple')),
+                                    'items': f.inset['items']})
+                                    for f in fields if f.has_attr('inset')),
+                # converted by the header like the html cells
+                'rows': [list(values) for values in self.record_rows()]}
+        for f in fields:
+            if f.has_attr('inset.remote'):
+                # the labels of the values in the rows only
+                data['inset'][f.name] = {'multiple': False, 'remote': True,
+                        'items': sorted(self.select_labels.get(f.name,
+                                                                {}).items())}
+        if self.window:
+            data['window'] = dict(self.window)
+        if not readonly:
+            self.hash_records()
+            cells = []
+            for key_value, recordhash, inputhash in self.record_keys():
+                cell = [base64.b64encode(key_value.encode()).decode(),
+                        recordhash or '', inputhash]
+                if self.table_hash_available and \
+                                self.table_hash_mode == TABLE_HASH_MODE_ROW:
+                    cell.append(self.generate_keytoken(key_value, recordhash))
+                cells.append(cell)
+            formkey = self.generate_formkey()
+            if self.table_hash_available:
+                self.generate_tablehash(formkey)
+            data.update(cells=cells, formkey=self.issue_formkey(formkey),
+                                                        formname=self.formname)
+        data = json.dumps(data, default=str, separators=(',', ':'))
+        self.metrics_render('json', start)
+        self.instrument_finish()
+        return data
 
     def process_dialog(self, message=''):
         if isinstance(message, str):
@@ -858,221 +2599,199 @@ class EDITABLE(FORM):
     def build_js(self):
         """
         build javascript for field check and ajax.
+        the logic is static/plugin_sqleditable/js/sqleditable.js (see init),
+        this script only passes the config of the instance.
+        """
+        return "jQuery(document).ready(function () {{sqleditable({0}, " \
+               "function () {{{1}}}, function () {{{2}}});}});\n".format(
+                    json.dumps(self.build_js_config(), default=float)
+                                                    .replace('</', '<\\/'),
+                    self.ajax_before, self.ajax_after)
+
+    def build_js_config(self):
+        """
+        config of sqleditable.js (ids, url, field rules).
         """
-        # js snipped
-        onload  = "jQuery(document).ready(function () {{{0}}});\n"
-        bind    = "jQuery('#{0}').on('load', function () {{{1}}});\n"
-        triger  = "jQuery('#{0}').trigger('load');\n".format(self.editable_id)
-        tb_js   = "jQuery('#{0}').editableTableWidget();\n".format(self.editable_id)
-        validate= "jQuery('#{0}').on('validate', 'td.{1}', function (evt, value) {{{2}}});\n"
-        if_js   = "if(!({0})){{return false;\n}}"
-        elif_js = "else if(!({0})){{return false;\n}}"
-        else_js = "else{{return !!({0});\n}}"
-        noif_js = "return !!({0});\n"
-        condition \
-          = {'range'  :"value >= {0} && value <= {1}",
-             'length' :"value.trim().length >= {0} && value.trim().length <= {1}",
-             'integer':"value == parseInt(value) || value == ''",
-             'number' :"(!isNaN(parseFloat(value)) && isFinite(value)) || value==''"}
-        focus  = "jQuery('.{0}').focus();".format(FIRST_CELL_CLASS)
-
-        ajax    = \
-"""
-jQuery('.{ajax_button_class}').on('click', function () {{
-    {ajax_before}
-    jQuery.ajax({{
-        url: '{url}',
-        type: 'POST',
-        dataType: 'html',
-        data: {{ {editable_id}: jQuery('#{editable_id}').html(),
-            formkey: jQuery('#{formkey_id}').val(),
-            formname: jQuery('#{formname_id}').val()
-        }},
-        beforeSend: function (xhr) {{
-            jQuery('.{process_dialog}').modal({{
-                backdrop: 'static',
-                keyboard: false
-            }});
-        }}
-    }})
-    .done(function (data) {{
-        jQuery('#{editable_id}').html(data);
-        if (document.getElementById('{msg_error_id}')) {{
-            jQuery('.{msg_failure}').show();
-            jQuery('.{msg_success}').hide();
-        }} else {{
-            jQuery('.{msg_success}').show();
-            jQuery('.{msg_failure}').hide();
-        }}
-    }})
-    .fail(function (data) {{
-        jQuery('.{msg_success}').hide();
-        jQuery('.{msg_failure}').show();
-    }})
-    .always(function (data) {{
-        jQuery('.{process_dialog}').modal('hide');
-        jQuery('.{first_cell}').focus();
-        {ajax_after}
-    }});
-}});
-""".format(url=self.url,
-           editable_id=self.editable_id,
-           ajax_button_class=self.ajax_button_class,
-           formkey_id=self.formkey_id,
-           formname_id=self.formname_id,
-           msg_success=self.msg_success_class,
-           msg_failure=self.msg_failure_class,
-           msg_error_id=self.msg_error_id,
-           process_dialog=self.process_dialog_class,
-           first_cell = FIRST_CELL_CLASS,
-           ajax_before=self.ajax_before,
-           ajax_after=self.ajax_after)
-
-        keydown_js =\
-"""
-jQuery(document).on('keydown', 'td:not(.{noedit},.{deletable})', function (e) {{
-    var child = jQuery(this).children(':checkbox, select');
-    if (child.is(':checkbox')) {{
-        if ( e.which === 13) {{
-            child.trigger('click');
-            return false;
-        }}
-    }} else if (child.is('select')) {{
-        if ( e.which === 13 ) {{
-            child.focus();
-            return false;
-        }}
-    }}
-}});
-jQuery(document).on('keydown', 'select', function (e) {{
-    if ( e.which === 13 || e.which === 9 || e.which === 27 ) {{
-        jQuery(this).parent('td').focus();
-	return false;
-    }}
-}});
-""".format(noedit=NO_EDIT_CLASS, deletable=DELETABLE_CLASS)
-
-        checkbox_js =\
-"""
-jQuery(document).on('click', ':checkbox', function (e) {{
-    if (jQuery(this).prop('checked')) {{
-        jQuery(this).val('on');
-    }} else {{
-        jQuery(this).val('off');
-    }}
-    e.stopPropagation();
-}});
-jQuery(document).on('click', 'td:not(.{noedit}):has(:checkbox)', function(e) {{
-    jQuery(this).children(':checkbox').trigger('click');
-}});
-""".format(noedit=NO_EDIT_CLASS)
-
-        select_js =\
-"""
-jQuery(document).on('change', 'td:not(.{noedit})>select', function () {{
-    jQuery(this).prev('div').text(jQuery(this).val());
-}});
-""".format(noedit=NO_EDIT_CLASS)
-
-        date_time_js = \
-"""
-jQuery(document).on('blur', 'input.{field_class}' , function (e) {{
-        var id = jQuery(this).attr('data-id');
-        jQuery(this).hide();
-        jQuery('#'+id).text(jQuery(this).val());
-}});
-jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
-    if ( e.which === 13 ) {{
-        var id = jQuery(this).attr('data-id');
-        jQuery(this).hide();
-        jQuery('#'+id).text(jQuery(this).val()).focus();
-        return false;
-    }}
-}});
-"""
-
-        # build logics
-        script = tb_js
         # javascript validate
+        validate = []
         if self.validate_js:
             for f in self.header.readable():
-                cond = []
+                rules = {}
                 if f.has_attr('range'):
-                    cond.append(condition['range'].format(*f.range))
+                    rules['range'] = f.range
                 if f.has_attr('length'):
-                    cond.append(condition['length'].format(*f.length))
+                    rules['length'] = f.length
                 if f.type == 'integer':
-                    cond.append(condition['integer'])
+                    rules['integer'] = True
                 elif f.type == 'number':
-                    cond.append(condition['number'])
-
-                js = ''
-                last = len(cond)-1
-                for n, cd in enumerate(cond):
-                    if n == 0 and last == 0:
-                        js += noif_js.format(cd)
-                    elif n == 0:
-                        js += if_js.format(cd)
-                    elif n > 0 and n < last:
-                        js += elif_js.format(cd)
-                    else:
-                        js += else_js.format(cd)
-                if js:
-                    script += validate.format(self.editable_id, FIELD_CLASS_PREFIX + str(f.name), js)
+                    rules['number'] = True
+                if rules:
+                    validate.append({'field_class': FIELD_CLASS_PREFIX + str(f.name),
+                                     'rules': rules})
         # date/time/checkbox/listbox
-        date = time = datetime= boolean = select = False
+        date_time = []
+        options = {}
+        boolean = select = False
         for f in self.header.readable():
-            if boolean is False and \
-               ((f.type == 'boolean' and f.writable == True) or self.deletable):
-                script += checkbox_js
+            if (f.type == 'boolean' and f.writable == True) or self.deletable:
                 boolean = True
-            if date is False and (f.type == 'date' and f.writable==True):
-                script += date_time_js.format(field_class=self.field_date_class)
-                date = True
-            if time is False and (f.type == 'time' and f.writable==True):
-                script += date_time_js.format(field_class=self.field_time_class)
-                time = True
-            if datetime is False and \
-                                    (f.type == 'datetime' and f.writable==True):
-                script += date_time_js.format(field_class=self.field_datetime_class)
-                datetime = True
-            if select is False and f.has_attr('inset'):
-                script += select_js
+            for type, field_class in (('date', self.field_date_class),
+                                      ('time', self.field_time_class),
+                                      ('datetime', self.field_datetime_class)):
+                if f.type == type and f.writable == True and \
+                                                field_class not in date_time:
+                    date_time.append(field_class)
+            if f.has_attr('inset'):
                 select = True
+                if f.has_attr('inset.remote') and f.writable:
+                    options[f.name] = {'multiple': False, 'items': [],
+                                       'remote': True}
+                elif self.select_mode == SELECT_MODE_SHARED and f.writable:
+                    multiple = f.has_attr('inset.multiple') and \
+                                                        bool(f.inset['multiple'])
+                    options[f.name] = {'multiple': multiple,
+                                       'items': [[str(v), str(l)] for v, l
+                                                    in f.inset['items'] or []]}
+        # pager / virtual rows
+        pager = None
+        virtual = None
+        if self.virtual:
+            chunk = self.maxrow
+            virtual = {'total': ((self.window.total or 0) // chunk + 1) * chunk,
+                       'chunk': chunk,
+                       'page_var': PAGE_VAR,
+                       'virtual_var': VIRTUAL_VAR,
+                       'height': self.virtual_height,
+                       'overscan': VIRTUAL_OVERSCAN,
+                       'spacer_class': VIRTUAL_SPACER_CLASS}
+        elif self.window:
+            pager = {'pager_class': PAGER_CLASS,
+                     'page_var': PAGE_VAR,
+                     'after_var': PAGE_AFTER_VAR,
+                     'before_var': PAGE_BEFORE_VAR}
+
+        return {'editable_id': self.editable_id,
+                'url': str(self.url),
+                'submit_mode': self.submit_mode,
+                'ajax_button_class': self.ajax_button_class,
+                'formkey_id': self.formkey_id,
+                'formname_id': self.formname_id,
+                'msg_success': self.msg_success_class,
+                'msg_failure': self.msg_failure_class,
+                'msg_error_id': self.msg_error_id,
+                'msg_error_class': MSG_ERROR_CLASS,
+                'cell_error': self.cell_error_class,
+                'noedit': NO_EDIT_CLASS,
+                'deletable': DELETABLE_CLASS,
+                'first_cell': FIRST_CELL_CLASS,
+                'process_dialog': self.process_dialog_class,
+                'dummy': DUMMY_RECORD_HASH_VALUE,
+                'fields': [f.name for f in self.header.writable()],
+                'validate': validate,
+                'checkbox': boolean,
+                'date_time': date_time,
+                'select': select,
+                'select_class': FIELD_SELECT_CLASS,
+                'select_box': FIELD_SELECT_BOX_CLASS,
+                'select_label': FIELD_SELECT_LABEL_CLASS,
+                'options': options or None,
+                'search': {'search_var': AUTOCOMPLETE_VAR,
+                           'field_var': AUTOCOMPLETE_FIELD_VAR,
+                           'min_length': AUTOCOMPLETE_MIN_LENGTH,
+                           'delay': AUTOCOMPLETE_DELAY,
+                           'input_class': AUTOCOMPLETE_INPUT_CLASS}
+                                                if self.autocomplete else None,
+                'pager': pager,
+                'virtual': virtual}
+
+    def build_editable_window(self):
+        '''
+        build the contents of editable (table, formkey/formname and pager).
+        '''
+        head = self.build_editable_header()
+        body = self.build_editable_body
+        contents = [head, body] if head else body
+        window = CAT(TABLE(contents, _class=self.table_class))
+        # formkey/formname & tablehash
+        formkey = self.generate_formkey()
+        if self.table_hash_available:
+            self.generate_tablehash(formkey)
+        window.append(self.set_formkey(self.issue_formkey(formkey)))
+        # pager
+        if self.window and not self.virtual:
+            window.append(self.build_pager())
+        return window
 
-        script += keydown_js
-        script = bind.format(self.editable_id, script)
-        script += triger
-        script += focus
-        script += ajax
-        script = onload.format(script)
-        return script
+    def build_pager(self):
+        '''
+        build the pager of the page window.
+        '''
+        window = self.window
+        prev_page = {'_data-page': window.page - 1}
+        next_page = {'_data-page': window.page + 1}
+        if window.keyset:
+            prev_page['_data-before'] = window.first
+            next_page['_data-after'] = window.last
+        return DIV(BUTTON(PAGER_PREV_LABEL, _type='button',
+                          _class=self.pager_button_class,
+                          _disabled=not window.has_prev, **prev_page),
+                   SPAN(current.T(PAGER_LABEL) % dict(page=window.page),
+                        _style='margin: 0 10px;'),
+                   BUTTON(PAGER_NEXT_LABEL, _type='button',
+                          _class=self.pager_button_class,
+                          _disabled=not window.has_next, **next_page),
+                   _class=PAGER_CLASS)
 
     def build_editable(self):
         # editable
+        editable = DIV(self.build_editable_window(), _id=self.editable_id)
+        # button
+        btn = self.add_button(None, self.ajax_button_value,
+                               self.ajax_button_class+' '+self.ajax_button_design_class,
+                               self.ajax_button_style)
+        # js
+        script = self.build_js()
+        # process dialog
+        dialog = self.process_dialog(self.msg_process_dialog)
+
+        return [editable, btn, dialog, SCRIPT(script, _type='text/javascript')]
+
+    def stream_editable(self):
+        '''
+        generate the markup of xml() as html chunks without building the
+        helper tree of the body.
+        e.g.) raise HTTP(200, editable.stream_editable(),
+                         **{'Content-Type': 'text/html; charset=utf-8'})
+        '''
+        def markup(el):
+            el = el.xml()
+            return el.decode('utf8') if isinstance(el, bytes) else el
+
+        yield '<div>' + xml_start_tag('div', {'_id': self.editable_id}) + \
+                        xml_start_tag('table', {'_class': self.table_class})
         head = self.build_editable_header()
-        body = self.build_editable_body
-        contents = [head, body] if head else body
-        editable = DIV(TABLE(contents, _class=self.table_class),
-                    _id=self.editable_id)
-        # formkey/formname
+        if head:
+            yield markup(head)
+        for chunk in self.stream_editable_body():
+            yield chunk
+        yield '</table>'
+        # formkey/formname & tablehash
         formkey = self.generate_formkey()
-        div = self.set_formkey(formkey)
-        e = editable.element(_id=self.editable_id)
-        e[0] = CAT(e[0], div)
-        # tablehash
         if self.table_hash_available:
             self.generate_tablehash(formkey)
-        # button
+        yield markup(self.set_formkey(self.issue_formkey(formkey)))
+        # pager
+        if self.window and not self.virtual:
+            yield markup(self.build_pager())
+        yield '</div>'
+        # button, process dialog, js
         btn = self.add_button(None, self.ajax_button_value,
                                self.ajax_button_class+' '+self.ajax_button_design_class,
                                self.ajax_button_style)
-        # js
         script = self.build_js()
-        # process dialog
         dialog = self.process_dialog(self.msg_process_dialog)
-
-        return [editable, btn, dialog, SCRIPT(script, _type='text/javascript')]
+        yield markup(CAT(btn, dialog, SCRIPT(script, _type='text/javascript')))
+        yield '</div>'
 
     def pick_element(self, editable, rowno, field=None, mode=None,
                                                                 special=None):
@@ -1091,16 +2810,16 @@ jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
         '''
         def field_element(field, mode=None):
             id = CELL_ID_FORMAT.format(field=field, row=rowno)
-            el = editable.element(_id=id)
+            el = self.element_by_id(editable, id)
             if mode=='td' and el.tag != 'td':
                     return el.parent
             return el
         def key_element():
             id = KEY_ID_FORMAT.format(row=rowno)
-            return editable.element(_id=id)
+            return self.element_by_id(editable, id)
         def deletable_element(mode=None):
             id = DELETABLE_ID_FORMAT.format(row=rowno)
-            el = editable.element(_id=id)
+            el = self.element_by_id(editable, id)
             if el and mode == 'td':
                 return el.parent
             return el
@@ -1123,10 +2842,40 @@ jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
             else:
                 return field_element(field, mode=mode)
 
+    def index_editable(self, editable):
+        '''
+        build the index of the elements (id -> element) of editable.
+        pick_element looks up the index instead of walking the tree.
+        '''
+        index = {}
+        stack = [editable]
+        while stack:
+            el = stack.pop()
+            id = el['_id']
+            if id and not str(id) in index:
+                index[str(id)] = el
+            stack.extend(c for c in reversed(el.components)
+                                                        if isinstance(c, DIV))
+        self.editable_index = (editable, index)
+        return index
+
+    def element_by_id(self, editable, id):
+        if self.editable_index is None or \
+                                        self.editable_index[0] is not editable:
+            self.index_editable(editable)
+        return self.editable_index[1].get(id)
+
     def update_field_element(self, editable, rowno, value, field=None,
                                                                 special=None):
+        # delta
+        if isinstance(editable, EditableDelta):
+            if special == 'key':
+                if isinstance(value, dict):
+                    editable.update_key(rowno, value)
+            elif field and value is not None:
+                editable.update_field(rowno, field, value)
         # key value & recordhash
-        if special == 'key':
+        elif special == 'key':
             if isinstance(value, dict):
                 el = self.pick_element(editable, rowno, special='key')
                 if el:
@@ -1136,6 +2885,9 @@ jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
                         el[RECORD_HASH_TAG_ATTR] = value['record_hash']
                     if 'input_hash' in value:
                         el[INPUT_HASH_TAG_ATTR] = value['input_hash']
+                    if 'key_token' in value:
+                        el[KEY_TOKEN_TAG_ATTR] = value['key_token']
+                    el[DIRTY_TAG_ATTR] = None
         # field
         elif field and value is not None:
             el = self.pick_element(editable, rowno, field)
@@ -1148,10 +2900,19 @@ jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
                 td = TD(value, _class=el['_class'], _id=el['_id'],
                                 _name=el['_name'], _tabindex=el['_tabindex'],
                                 _style=el['_style'])
-                editable.element(_id=str(el['_id']), replace=td)
+                parent = el.parent
+                for n, c in enumerate(parent.components):
+                    if c is el:
+                        parent.components[n] = td
+                        td.parent = parent
+                        break
+                # pick_element has indexed this editable
+                self.editable_index[1][str(el['_id'])] = td
 
     def set_error_class(self, editable, rowno, field=None):
-        if field:
+        if isinstance(editable, EditableDelta):
+            editable.set_error(rowno, field)
+        elif field:
             el = self.pick_element(editable, rowno, field, mode='td')
             el.add_class(self.cell_error_class)
         else:
@@ -1159,6 +2920,85 @@ jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
             for el in els:
                 el.add_class(self.cell_error_class)
 
+    def disable_record_element(self, editable, rowno):
+        if isinstance(editable, EditableDelta):
+            editable.disable(rowno)
+            return
+        els = self.pick_element(editable, rowno, mode='td-all')
+        for el in els:
+            el.add_class(NO_EDIT_CLASS)
+            for child in ['input', 'select', 'a', 'button']:
+                child_el = el.element(child)
+                if child_el:
+                    if child == 'a':
+                        child_el['_href'] = '#'
+                    child_el['_disabled'] = 'disabled'
+
+    def readout_delta(self, delta, table=None):
+        '''
+        readout delta payload & check error (if table exsit)
+        '''
+        records = RecordArray([], self.header)
+        validates = []
+        for row in delta.rows:
+            rowno = row.get('r')
+            cell = delta.key_cell(rowno)
+            if cell is None:
+                raise EditableRejected('Invalid delta payload.',
+                                                              reason='payload')
+            record = Record({}, self.header)
+            record[ROWNO_FIELD] = rowno
+            dummy_record = False
+            # key
+            (key_value, recordhash) = cell[:2]
+            value = self.compress_key_value(
+                                    base64.b64decode(key_value.encode()).decode())
+            if value and value[0]:
+                keys = list(zip(self.header.key(), value))
+                for k,v in keys:
+                    record[k.name] = v
+                record[STORED_KEY_VALUE] = dict([(k.name, v) for k, v in keys])
+            else:
+                record[NEWRECORD_FLAG_FIELD] = True
+            if recordhash:
+                record[RECORD_HASH_FIELD] = recordhash
+                if recordhash == DUMMY_RECORD_HASH_VALUE:
+                    dummy_record = True
+            if row.get('i'):
+                record[INPUT_HASH_FIELD] = row['i']
+            if len(cell) > 2:
+                record[KEY_TOKEN_FIELD] = cell[2]
+            # delete flag
+            if self.deletable and dummy_record is False and row.get('d') is True:
+                record[DELETE_FLAG_FIELD] = True
+            # fields
+            values = row.get('v', {})
+            for f in self.header.writable():
+                if not f.name in values:
+                    raise EditableRejected('Invalid delta payload.',
+                                                              reason='payload')
+                value = values[f.name]
+                if f.type == 'boolean' and not f.has_attr('inset'):
+                    value = True if value in (True, 'on') else False
+                elif not isinstance(value, string_types):
+                    value = '' if value is None else str(value)
+                if f.has_attr('inset.multiple') and f.inset['multiple'] and \
+                                                not isinstance(value, bool) and \
+                                                                ',' in value:
+                    record[f.name] = value.split(',')
+                else:
+                    record[f.name] = value
+            if self.check_inputhash(record):
+                if not record.has_field(DELETE_FLAG_FIELD):
+                    record[NOTCHANGED_FLAG_FIELD] = True
+            self.check_keytoken(record)
+            if table and self.validate_all is True and \
+                                    not record.has_field(NOTCHANGED_FLAG_FIELD):
+                validates.append((rowno, record))
+            records.append(record)
+        self.records_validate(validates, delta)
+        return records, delta
+
     def readout_editable(self, editable, table=None):
         '''
         readout editable & check error (if table exsit)
@@ -1172,7 +3012,8 @@ jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
                                         base64.b64decode(el[KEY_ID_TAG_ATTR].encode()).decode())
                 recordhash = el[RECORD_HASH_TAG_ATTR]
                 inputhash = el[INPUT_HASH_TAG_ATTR]
-                return (value, recordhash, inputhash), el
+                keytoken = el[KEY_TOKEN_TAG_ATTR]
+                return (value, recordhash, inputhash, keytoken), el
             elif special == 'deletable':
                 el = self.pick_element(editable, rowno, special='deletable')
                 if el is None:
@@ -1200,6 +3041,9 @@ jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
             value,el = readout_element(rowno, special='key')
             if el is None:
                 return None
+            elif self.dirty_tracking and not el[DIRTY_TAG_ATTR]:
+                # not touched by the client: the fields are not read
+                return False
             elif value:
                 if value[0]:
                     keys = list(zip(self.header.key(),value[0]))
@@ -1213,6 +3057,8 @@ jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
                         dummy_record = True
                 if value[2]:
                     record[INPUT_HASH_FIELD] = value[2]
+                if value[3]:
+                    record[KEY_TOKEN_FIELD] = value[3]
             if not value or (value and not value[0]):
                 record[NEWRECORD_FLAG_FIELD] = True
             # delete flag
@@ -1237,16 +3083,21 @@ jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
         # check editable object
         if not editable:
             return False
+        elif isinstance(editable, EditableDelta):
+            return self.readout_delta(editable, table)
         elif not isinstance(editable, DIV):
             editable = TAG(editable)
 
         # remove error message & error class
         editable.elements(_id=self.msg_error_id, replace=None)
+        if self.editable_index and self.editable_index[0] is editable:
+            self.editable_index[1].pop(self.msg_error_id, None)
         els = editable.elements('td.{0}'.format(self.cell_error_class))
         for el in els:
             el.remove_class(self.cell_error_class)
 
         records = RecordArray([], self.header)
+        validates = []
         r = 0
         cond = True
         while cond:
@@ -1254,36 +3105,65 @@ jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
             if record is None:
                 cond = False
                 break
+            elif record is False:
+                r += 1
+                continue
+            if self.dirty_tracking:
+                record[ROWNO_FIELD] = r
             if self.check_inputhash(record):
                 if not record.has_field(DELETE_FLAG_FIELD):
                     record[NOTCHANGED_FLAG_FIELD] = True
-            elif table and self.validate_all is True:
-                self.record_validate(record, r, editable)
+            self.check_keytoken(record)
+            if table and self.validate_all is True and \
+                                    not record.has_field(NOTCHANGED_FLAG_FIELD):
+                validates.append((r, record))
             records.append(record)
             r += 1
+        self.records_validate(validates, editable)
         return records, editable
 
     def as_dict(self, **kwargs):
-        if self.editable:
-            self.editable = self.refresh_editable(self.editable)
-            return self.editable
-        else:
-            editable = self.build_editable()
-            editable = {'editable':DIV(editable[0],editable[2]), 'button': editable[1],
+        start = time.time()
+        with self.instrument_phase('render'):
+            if self.editable:
+                self.editable = self.refresh_editable(self.editable)
+                editable = self.editable
+            elif self.is_search_request():
+                editable = self.fetch_search()
+            elif self.is_chunk_request():
+                editable = self.fetch_chunk()
+            elif self.is_page_request():
+                editable = self.fetch_window()
+            else:
+                editable = self.build_editable()
+                editable = {'editable':DIV(editable[0],editable[2]), 'button': editable[1],
                                                                         'script': editable[3]}
-            for k in kwargs:
-                v = kwargs[k]
-                if callable(v):
-                    v = v()
-                editable[k] = v
-            return editable
+                for k in kwargs:
+                    v = kwargs[k]
+                    if callable(v):
+                        v = v()
+                    editable[k] = v
+        self.metrics_render('dict', start)
+        self.instrument_finish()
+        return editable
 
     def xml(self):
-        if self.editable:
-            self.editable = self.refresh_editable(self.editable)
-            return self.editable
-        else:
-            return DIV(self.build_editable()).xml()
+        start = time.time()
+        with self.instrument_phase('render'):
+            if self.editable:
+                self.editable = self.refresh_editable(self.editable)
+                markup = self.editable
+            elif self.is_search_request():
+                markup = self.fetch_search()
+            elif self.is_chunk_request():
+                markup = self.fetch_chunk()
+            elif self.is_page_request():
+                markup = self.fetch_window().xml()
+            else:
+                markup = DIV(self.build_editable()).xml()
+        self.metrics_render('html', start)
+        self.instrument_finish()
+        return markup
 
     def is_ajax(self):
         from gluon import current
@@ -1293,6 +3173,57 @@ jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
         else:
             return False
 
+    def is_page_request(self):
+        from gluon import current
+        request = current.request
+        if self.window and request.ajax and PAGE_VAR in request.vars:
+            return True
+        else:
+            return False
+
+    def is_search_request(self):
+        from gluon import current
+        request = current.request
+        if self.autocomplete and request.ajax and \
+                                            AUTOCOMPLETE_VAR in request.vars:
+            return True
+        else:
+            return False
+
+    def is_chunk_request(self):
+        from gluon import current
+        request = current.request
+        if self.virtual and self.window and request.ajax and \
+                                                    VIRTUAL_VAR in request.vars:
+            return True
+        else:
+            return False
+
+    def fetch_chunk(self):
+        '''
+        rows of a chunk of the virtual mode as json (ajax).
+         {'offset': row number of the first row, 'rows': [html of tr, ...]}
+        the formkey is not consumed. the rows are signed with its salt.
+        '''
+        from gluon import current
+        current.response.headers['Content-Type'] = 'application/json'
+        self.restore_salt(current.request.vars.formkey)
+        if self.record_hash_available:
+            # db_read hashed the rows before the salt was known
+            for rec in self.record:
+                rec[RECORD_HASH_FIELD] = self.generate_recordhash(rec)
+        return json.dumps({'offset': self.row_offset(),
+                           'rows': list(self.editable_body_rows(html=True))})
+
+    def fetch_window(self):
+        '''
+        build the contents of editable for the pager (ajax).
+        the formkey of the replaced window is retired.
+        '''
+        from gluon import current
+        self.retire_formkey(current.request.vars.formkey)
+        return self.build_editable_window()
+
     def is_touch_device(self):
         from gluon import current
         user_agent = current.request.user_agent()
@@ -1330,51 +3261,168 @@ jQuery(document).on('keypress', 'input.{field_class}' , function (e) {{
             self.next = kwargs.get('next', None)
         self.errors = []
 
-        status = True
-        if not request_vars:
-            status = False
-        elif formname != request_vars.formname:
-            status = False
-        elif not self.check_formkey(request_vars.formkey):
-            status = False
-        elif self.table_hash_available and \
-            not self.check_tablehash(request_vars.formkey,
-                                     request_vars[self.editable_id]):
-            status = False
-        if status and request_vars[self.editable_id]:
-            table = {'table':self.table} if hasattr(self, 'table') else {}
-            self.o_record,self.editable = \
-                self.readout_editable(request_vars[self.editable_id], **table)
-            if self.errors:
+        editable = request_vars[self.editable_id] if request_vars else None
+        if isinstance(editable, string_types + (bytes,)):
+            self.instrument_count('payload', len(editable))
+        start = time.time()
+        try:
+            with self.instrument_phase('parse'):
+                if editable and self.submit_mode == SUBMIT_MODE_DELTA:
+                    editable = EditableDelta(editable)
+                elif editable and not isinstance(editable, DIV):
+                    editable = TAG(editable)
+
+            status = True
+            if not request_vars:
                 status = False
-        else:
-            status = False
+            elif formname != request_vars.formname:
+                status = False
+            else:
+                with self.instrument_phase('check_formkey'):
+                    if not self.check_formkey(request_vars.formkey):
+                        status = False
+                if status and self.table_hash_available:
+                    with self.instrument_phase('check_tablehash'):
+                        if not self.check_tablehash(request_vars.formkey,
+                                                                    editable):
+                            status = False
+            if status and editable:
+                table = {'table':self.table} if hasattr(self, 'table') else {}
+                with self.instrument_phase('readout_editable'):
+                    self.o_record,self.editable = \
+                        self.readout_editable(editable, **table)
+                if self.errors:
+                    status = False
+            else:
+                status = False
+        except RuntimeError as e:
+            self.metrics_error(e, start)
+            raise
         self.accepted = status
+        if editable and not hasattr(self, 'table'):
+            self.metrics_save(status, start)
         return status
 
 class SQLEDITABLE(EDITABLE):
     def __init__(self, table, record=None, deletable=False, header=None,
                  maxrow=None, lineno=True,  url=None, showid=True, editid=False,
                  validate_js=True, vertical=True, oninit=None,
-                 update_display_record=False, **kwargs):
+                 update_display_record=False, columnar=False, paginate=False,
+                 orderby=None, keyset=False, options_cache=None,
+                 header_cache=None, virtual=False, **kwargs):
 
         self.table = table
         self.showid = showid
         self.editid = editid
         self.update_display_record = update_display_record
+        self.columnar = columnar
+        self.orderby = orderby
+        self.options_cache = OPTIONS_CACHE if options_cache is None \
+                                                            else options_cache
+        self.header_cache = HEADER_CACHE if header_cache is None \
+                                                            else header_cache
         self.custom_types = DIV
 
+        if virtual:
+            kwargs.setdefault('submit_mode', SUBMIT_MODE_DELTA)
+            kwargs.setdefault('table_hash_mode', TABLE_HASH_MODE_ROW)
+            if kwargs['submit_mode'] != SUBMIT_MODE_DELTA or \
+                    kwargs['table_hash_mode'] != TABLE_HASH_MODE_ROW or \
+                                                                not vertical:
+                raise TypeError('virtual mode needs submit_mode "delta", table_hash_mode "row" and vertical=True.')
+            maxrow = maxrow or VIRTUAL_CHUNK_SIZE
+            (paginate, keyset) = (True, False)
+
         EDITABLE.__init__(self, record, header, maxrow, lineno, url,
                           validate_js, vertical, deletable, oninit, **kwargs)
 
         # record list
-        if self.is_ajax() is False:
-            if self.record == 'BLANK':
-                self.record = RecordArray([], self.header)
-            elif self.record and not isinstance(self.record, RecordArray):
-                self.record = self.db_read(self.record)
-            elif self.record is None:
-                self.record = self.db_read(None)
+        self.virtual = virtual
+        if self.is_ajax() is False and self.is_search_request() is False:
+            if paginate:
+                self.window = self.request_window(keyset)
+            with self.instrument_phase('db_read'):
+                if self.record == 'BLANK':
+                    self.record = RecordArray([], self.header,
+                                                        columnar=self.columnar)
+                elif self.record and not isinstance(self.record, RecordArray):
+                    self.record = self.db_read(self.record)
+                elif self.record is None:
+                    self.record = self.db_read(None)
+            if self.record:
+                self.instrument_count('rows_read', len(self.record))
+
+    def request_window(self, keyset=False):
+        '''
+        page window of the request.
+            keyset: True: address the window by the key of the neighbour row
+                          (request vars: _after/_before) instead of the offset.
+        '''
+        from gluon import current
+        request_vars = current.request.vars
+        if keyset and (self.orderby is not None or
+                                            len(list(self.header.key())) != 1):
+            raise TypeError('keyset pagination needs a single key field and no "orderby".')
+        if not self.maxrow:
+            self.maxrow = PAGE_SIZE
+        try:
+            page = max(int(request_vars[PAGE_VAR] or 1), 1)
+        except (TypeError, ValueError):
+            page = 1
+        window = Storage(page=page, keyset=keyset, after=None, before=None,
+                         first=None, last=None, has_prev=page > 1,
+                         has_next=False)
+        if keyset:
+            window.after = request_vars[PAGE_AFTER_VAR] or None
+            window.before = request_vars[PAGE_BEFORE_VAR] or None
+        return window
+
+    def read_window(self):
+        '''
+        read the rows of the page window.
+        one row more than maxrow is read to know the next window exists.
+        '''
+        window = self.window
+        size = self.maxrow
+        table = self.table
+        db = table._db
+        keys = [table[k.name] for k in self.header.key()]
+
+        if window.keyset and (window.after or window.before):
+            key = keys[0]
+            if window.before:
+                rows = db(key < window.before).select(orderby=~key,
+                                                    limitby=(0, size+1))
+            else:
+                rows = db(key > window.after).select(orderby=key,
+                                                    limitby=(0, size+1))
+            rows = rows.as_list(custom_types=self.custom_types)
+            more = len(rows) > size
+            rows = rows[:size]
+            if window.before:
+                rows.reverse()
+                window.has_prev, window.has_next = more, True
+            else:
+                window.has_prev, window.has_next = True, more
+        else:
+            orderby = self.orderby
+            if orderby is None:
+                orderby = keys[0]
+                for k in keys[1:]:
+                    orderby = orderby | k
+            offset = self.row_offset()
+            rows = db(table).select(orderby=orderby,
+                                    limitby=(offset, offset+size+1))\
+                                    .as_list(custom_types=self.custom_types)
+            if self.virtual and not self.is_chunk_request():
+                window.total = db(table).count()
+            window.has_prev = window.page > 1
+            window.has_next = len(rows) > size
+            rows = rows[:size]
+        if rows and window.keyset:
+            window.first = str(rows[0][keys[0].name])
+            window.last = str(rows[-1][keys[0].name])
+        return rows
 
     def define_header(self, fields=None, key_fields=None ,showid=True,
                                                                 editid=False):
@@ -1382,12 +3430,13 @@ class SQLEDITABLE(EDITABLE):
         define header list
         - table: Table object
         - fields: list of fields for header
+        the definition is cached by header_cache (see header_signature).
         '''
-        def check_validators(requires):
+        def check_validators(field, requires):
             h = {}
             if not isinstance(requires, (list, tuple)):
                 requires = [requires]
-            for validator in requires:
+            for i, validator in enumerate(requires):
                 s = str(validator)
                 if 'IS_EMPTY_OR' in s:
                     validator = validator.other
@@ -1401,11 +3450,20 @@ class SQLEDITABLE(EDITABLE):
                 elif 'IS_IN_SET' in s:
                     h['inset'] = {'multiple': validator.multiple,
                                   'zero': validator.zero,
-                                  'items': validator.options()}
+                                  'items': self.validator_options(field,
+                                                                validator)}
+                    positions[field] = i
+                elif 'IS_IN_DB' in s and field in self.autocomplete:
+                    if validator.multiple:
+                        raise TypeError('autocomplete needs a single-valued IS_IN_DB.')
+                    h['inset'] = {'multiple': False, 'zero': validator.zero,
+                                  'items': [], 'remote': True}
                 elif 'IS_IN_DB' in s:
                     h['inset'] = {'multiple': validator.multiple,
                                   'zero': validator.zero,
-                                  'items': validator.options()}
+                                  'items': self.validator_options(field,
+                                                                validator)}
+                    positions[field] = i
             return h
 
         def check_header_options(options):
@@ -1420,18 +3478,11 @@ class SQLEDITABLE(EDITABLE):
                 if not 'label' in options:
                     options['label'] = ''
                 if field in table and isinstance(table[field], Field.Method):
-                    if 'argument' in options and not callable(options['argument']):
-                        raise TypeError('"argument" value mast be callable in "header" parameter.')
-                    try:
-                        from pydal.objects import VirtualCommand
-                    except ImportError:
-                        from gluon.dal import VirtualCommand
                     options['method'] = True
-                    self.custom_types = (DIV, VirtualCommand)
                 return
 
             if not any(k in options for k in ('range', 'length', 'inset')):
-                options.update(check_validators(table[field].requires))
+                options.update(check_validators(field, table[field].requires))
             if not 'type' in options:
                 if table[field].type == 'integer' or table[field].type == 'bigint' :
                     options['type'] = 'integer'
@@ -1468,7 +3519,7 @@ class SQLEDITABLE(EDITABLE):
             if not 'default' in options:
                 if table[field].default is None:
                     if 'inset' in options:
-                        options['default'] = h['inset']['zero']
+                        options['default'] = options['inset']['zero']
                     elif options['type'] == 'boolean':
                         options['default'] = False
                     else:
@@ -1500,16 +3551,211 @@ class SQLEDITABLE(EDITABLE):
                 if fields_add:
                     fields.append(k)
         header = []
+        positions = {}
+
+        def build():
+            for f in fields:
+                if isinstance(f, dict):
+                    h = f.copy()
+                    check_header_options(h)
+                else:
+                    h = {'field': f}
+                    check_header_options(h)
+                header.append(h)
+            # cache entry: (header option, kept "fields" options,
+            #               position of IS_IN_SET/IS_IN_DB)
+            entry = []
+            for h, f in zip(header, fields):
+                h = h.copy()
+                field = h['field']
+                kept = [k for k in f if k != 'field' and h.get(k) is f[k]] \
+                                                if isinstance(f, dict) else []
+                for k in kept:
+                    h[k] = None
+                if field in table and not isinstance(table[field],
+                                                (Field.Virtual, Field.Method)):
+                    if not 'label' in kept:
+                        h['label'] = None
+                    if not 'default' in kept and \
+                                            table[field].default is not None:
+                        h['default'] = None
+                if field in positions:
+                    h['inset'] = dict(h['inset'], items=None)
+                entry.append((h, kept, positions.get(field)))
+            return entry
+
+        def refresh(entry):
+            for (h, kept, position), f in zip(entry, fields):
+                h = h.copy()
+                for k in kept:
+                    h[k] = f[k]
+                field = h['field']
+                if field in table and not isinstance(table[field],
+                                                (Field.Virtual, Field.Method)):
+                    if not 'label' in kept:
+                        h['label'] = table[field].label
+                    if not 'default' in kept and \
+                                            table[field].default is not None:
+                        h['default'] = table[field].default
+                    if position is not None:
+                        requires = table[field].requires
+                        if not isinstance(requires, (list, tuple)):
+                            requires = [requires]
+                        validator = requires[position]
+                        if 'IS_EMPTY_OR' in str(validator):
+                            validator = validator.other
+                        h['inset'] = dict(h['inset'],
+                                items=self.validator_options(field, validator))
+                header.append(h)
+
+        if self.header_cache:
+            key = self.header_signature(fields, key_fields, showid, editid)
+            entry = self.header_cache(key, build)
+            if not header:
+                refresh(entry)
+        else:
+            build()
+
+        for h in header:
+            if h.get('method'):
+                if 'argument' in h and not callable(h['argument']):
+                    raise TypeError('"argument" value mast be callable in "header" parameter.')
+                try:
+                    from pydal.objects import VirtualCommand
+                except ImportError:
+                    from gluon.dal import VirtualCommand
+                self.custom_types = (DIV, VirtualCommand)
+        return header
+
+    def header_signature(self, fields, key_fields, showid, editid):
+        '''
+        cache key of the header definition: tablename/signature.
+        the signature covers the table definition used by define_header, so
+        the changed definition does not hit the old entry.
+        '''
+        def validators_signature(requires):
+            if not isinstance(requires, (list, tuple)):
+                requires = [requires]
+            signature = []
+            for validator in requires:
+                if 'IS_EMPTY_OR' in str(validator):
+                    validator = validator.other
+                signature.append((type(validator).__name__,) +
+                            tuple(getattr(validator, a, None) for a in
+                                  ('minimum', 'maximum', 'minsize', 'maxsize',
+                                   'multiple', 'zero')))
+            return tuple(signature)
 
+        table = self.table
+        signature = []
         for f in fields:
             if isinstance(f, dict):
-                h = f.copy()
-                check_header_options(h)
+                name = f['field']
+                options = (tuple(sorted(f)),) + tuple(f.get(k) for k in
+                                    ('type', 'readable', 'writable', 'virtual'))
             else:
-                h = {'field': f}
-                check_header_options(h)
-            header.append(h)
-        return header
+                name = f
+                options = None
+            if name in table:
+                field = table[name]
+                if isinstance(field, (Field.Virtual, Field.Method)):
+                    definition = type(field).__name__
+                else:
+                    definition = (field.type, field.readable, field.writable,
+                                  field.default is None,
+                                  validators_signature(field.requires))
+            else:
+                definition = None
+            signature.append((name, options, definition))
+        signature = (getattr(table._db, '_uri_hash', None), tuple(signature),
+                     tuple(key_fields), showid, editid,
+                     tuple(sorted(self.autocomplete)))
+        return '{0}/{1}'.format(table._tablename,
+                                md5(to_bytes(repr(signature))).hexdigest())
+
+    def validator_options(self, field, validator):
+        '''
+        option list of IS_IN_SET/IS_IN_DB (cached by options_cache).
+            options_cache: LRUCache object. False: not cached.
+        '''
+        if not self.options_cache:
+            return validator.options()
+        key = options_cache_key(self.table[field], validator)
+        return self.options_cache(key, validator.options)
+
+    def remote_validator(self, field):
+        '''
+        IS_IN_DB of the autocomplete field.
+        '''
+        requires = self.table[field].requires
+        if not isinstance(requires, (list, tuple)):
+            requires = [requires]
+        for validator in requires:
+            if 'IS_EMPTY_OR' in str(validator):
+                validator = validator.other
+            if 'IS_IN_DB' in str(validator):
+                return validator
+        return None
+
+    def remote_rows(self, validator, query, **attributes):
+        '''
+        rows of the referenced table: [(value, label)]
+        '''
+        table = validator.dbset.db[validator.ktable]
+        if validator.fieldnames == '*':
+            fields = [table.ALL]
+        else:
+            fields = [table[k] for k in validator.fieldnames]
+        label = validator.label
+        return [(str(row[validator.kfield]),
+                 str(label(row) if callable(label) else label % row))
+                for row in validator.dbset(query).select(*fields, **attributes)]
+
+    def resolve_labels(self):
+        '''
+        read the labels of the values of the autocomplete fields in the
+        records (one query per field, only the values not read yet).
+        '''
+        if not self.autocomplete or not self.record:
+            return
+        for f in self.header.all():
+            if not f.has_attr('inset.remote'):
+                continue
+            labels = self.select_labels.setdefault(f.name, {})
+            validator = self.remote_validator(f.name)
+            key = validator.dbset.db[validator.ktable][validator.kfield]
+            values = set(str(v) for v in self.record.values(f)
+                                        if not v in (None, '')) - set(labels)
+            if key.type in ('id', 'integer'):
+                values = [int(v) for v in values if v.isdigit()]
+            if values:
+                labels.update(self.remote_rows(validator, key.belongs(values)))
+
+    def fetch_search(self):
+        '''
+        the options of the autocomplete field that start with the searched
+        text as json (ajax). [[value, label], ...]
+        '''
+        from gluon import current
+        current.response.headers['Content-Type'] = 'application/json'
+        request_vars = current.request.vars
+        field = request_vars[AUTOCOMPLETE_FIELD_VAR]
+        if not isinstance(field, string_types) or \
+                                not field in self.autocomplete or \
+                                self.header[field] is None or \
+                                not self.header[field].has_attr('inset.remote'):
+            raise RuntimeError('Invalid autocomplete field.')
+        validator = self.remote_validator(field)
+        table = validator.dbset.db[validator.ktable]
+        search = self.autocomplete[field] or (validator.kfield
+                    if validator.fieldnames == '*' else validator.fieldnames[0])
+        text = request_vars[AUTOCOMPLETE_VAR]
+        if not isinstance(text, string_types):
+            text = ''
+        items = self.remote_rows(validator, table[search].startswith(text),
+                                 orderby=table[search],
+                                 limitby=(0, AUTOCOMPLETE_LIMIT))
+        return json.dumps(items)
 
     def field_validate(self, requires, value):
         if not isinstance(requires, (list, tuple)):
@@ -1527,11 +3773,72 @@ class SQLEDITABLE(EDITABLE):
                 return value, error
         return value, None
 
-    def record_validate(self, record, rowno, editable=None):
+    def columns_validate(self, records, editable=None):
+        '''
+        validate the writable fields with the common validators column by
+        column (see compile_column_check).
+            records : [(rowno, Record)]
+        return value: (names of validated fields, set of failed rowno)
+        the values that the column check leaves are validated one by one
+        with field_validate, so the error messages are the same.
+        '''
+        if editable is None:
+            editable = self.editable
+        checked = []
+        failed = set()
+        if not records:
+            return checked, failed
+        for f in records[0][1].header.writable():
+            if not isinstance(self.table[f.name], Field):
+                continue
+            requires = self.table[f.name].requires
+            check = compile_column_check(requires, f.has_attr('inset.remote'))
+            if check is None:
+                continue
+            checked.append(f.name)
+            # decoded like field_validate
+            values = [v.decode() if isinstance(v, bytes) else v
+                            for v in (record[f.name] for r, record in records)]
+            for (r, record), v, value in zip(records, values, check(values)):
+                if value is VALIDATION_FALLBACK:
+                    value, error = self.field_validate(requires, v)
+                    if error:
+                        self.set_error_class(editable, r, f.name)
+                        if not error in self.errors:
+                            self.errors.append(error)
+                        self.metrics_inc('validation_failures_total')
+                        failed.add(r)
+                        continue
+                record[f.name] = value
+        return checked, failed
+
+    def records_validate(self, records, editable=None):
+        '''
+        validate the records: columns_validate, then record_validate for
+        the other fields and onvalidation.
+            records : [(rowno, Record)]
+        return value: {rowno: status}
+        '''
+        if not records:
+            return {}
+        with self.instrument_phase('validate'):
+            checked, failed = self.columns_validate(records, editable)
+            return dict([(r, self.record_validate(record, r, editable, checked,
+                                                        not r in failed))
+                                                    for r, record in records])
+
+    def record_validate(self, record, rowno, editable=None, checked=(),
+                                                                status=True):
+        '''
+        validate the record.
+            checked : the fields validated by columns_validate.
+            status  : the result of columns_validate.
+        '''
         def set_error(error, field=None):
             self.set_error_class(editable, rowno, field)
             if not error in self.errors:
                 self.errors.append(error)
+            self.metrics_inc('validation_failures_total')
 
         def call_as_list(f,*a,**b):
             if not isinstance(f, (list,tuple)):
@@ -1564,8 +3871,9 @@ class SQLEDITABLE(EDITABLE):
 
         if editable is None:
             editable = self.editable
-        status = True
         for f,v in record.writable():
+            if f.name in checked:
+                continue
             if isinstance(self.table[f.name], Field):
                 value,error = \
                         self.field_validate(self.table[f.name].requires, v)
@@ -1580,8 +3888,10 @@ class SQLEDITABLE(EDITABLE):
         return status
 
     def generate_recordhash(self, record):
-        serialized = '|'.join(str(v) for _, v in record.real() if v)
-        return self.generate_hash(serialized)
+        return self.generate_recordhash_values(v for _, v in record.real())
+
+    def generate_recordhash_values(self, values):
+        return self.update_hash(self.new_hash(), values).hexdigest()
 
     def table_set(self, record):
         cond = ''
@@ -1597,6 +3907,73 @@ class SQLEDITABLE(EDITABLE):
         else:
             return None
 
+    def record_key(self, record):
+        '''
+        record: Record obj -> tuple of str(key value)
+        '''
+        return tuple(str(v) for _, v in record.key_value())
+
+    def convert_key(self, values):
+        '''
+        key values (the order of key fields) -> tuple of str(key value)
+        converted by the key fields like the read rows.
+        (ex. '01' -> '1' of an id/integer key)
+        '''
+        key = []
+        for k, v in zip(self.header.key_list(), values):
+            type = self.table[k].type
+            if type in ('id', 'integer', 'bigint') or \
+                                                type.startswith('reference'):
+                try:
+                    v = int(v)
+                except (TypeError, ValueError):
+                    pass
+            key.append(str(v))
+        return tuple(key)
+
+    def key_chunks(self, keys):
+        '''
+        split the key list for the queries of table_keys_set.
+        '''
+        if len(self.header.key_list()) == 1:
+            chunk_size = READ_CHUNK_SIZE
+        else:
+            chunk_size = COMPOSITE_READ_CHUNK_SIZE
+        for n in range(0, len(keys), chunk_size):
+            yield keys[n:n + chunk_size]
+
+    def table_keys_set(self, keys):
+        '''
+        keys: list of key value lists (the order of key fields) -> Set obj
+        '''
+        key_fields = [self.table[k] for k in self.header.key_list()]
+        if len(key_fields) == 1:
+            cond = key_fields[0].belongs([k[0] for k in keys])
+        else:
+            cond = None
+            for key in keys:
+                c = None
+                for field, v in zip(key_fields, key):
+                    c = c & (field == v) if c is not None else field == v
+                cond = cond | c if cond is not None else c
+        return self.table._db(cond)
+
+    def table_rows_as_dict(self, keys):
+        '''
+        read the records of the keys with few queries.
+            keys : list of key value lists (the order of key fields)
+
+        return value: dict of {tuple of str(key value): Record obj}
+        '''
+        key_fields = self.header.key_list()
+        rows = {}
+        for chunk in self.key_chunks(keys):
+            for row in self.table_keys_set(chunk).select():
+                key = tuple(str(row[k]) for k in key_fields)
+                rows[key] = Record(row.as_dict(custom_types=self.custom_types),
+                                                                    self.header)
+        return rows
+
     def set_recordhash_error(self, rowno, changed=True):
         self.set_error_class(self.editable, rowno)
         from gluon import current
@@ -1604,9 +3981,42 @@ class SQLEDITABLE(EDITABLE):
             error = current.T(MSG_RECORD_HASH_CHANGED)
         else:
             error = current.T(MSG_RECORD_HASH_DELETED)
+        self.metrics_inc('hash_mismatches_total',
+                                    kind='changed' if changed else 'deleted')
         if not error in self.errors:
             self.errors.append(error)
 
+    def check_recordhashes(self, records):
+        '''
+        check the recordhash of the records with one keyed read.
+            records : list of (rowno, Record obj)
+
+        return value: dict of {rowno: status}
+                      (status is the same as the return value of
+                       check_recordhash)
+        '''
+        statuses = {}
+        targets = []
+        for r, rec in records:
+            if rec.has_field(NEWRECORD_FLAG_FIELD):
+                statuses[r] = True
+            elif rec.has_field(RECORD_HASH_FIELD) is False:
+                statuses[r] = False
+            elif rec[RECORD_HASH_FIELD] == DUMMY_RECORD_HASH_VALUE:
+                statuses[r] = 'dummy'
+            else:
+                targets.append((r, rec, self.record_key(rec)))
+
+        db_records = self.table_rows_as_dict([key for _, _, key in targets])
+        for r, rec, key in targets:
+            db_record = db_records.get(key)
+            if db_record is None:
+                statuses[r] = 'notexit'
+            else:
+                recordhash = self.generate_recordhash(db_record)
+                statuses[r] = recordhash == rec[RECORD_HASH_FIELD]
+        return statuses
+
     def check_recordhash(self, record=None, target='record'):
         '''
         record : check record (when target='record')
@@ -1619,32 +4029,20 @@ class SQLEDITABLE(EDITABLE):
                       'notexit': record is not exsit
                       'dummy': dummy record
         '''
-        def compare_recordhash(record):
-            if record.has_field(RECORD_HASH_FIELD) is False:
-                return False
-            if record[RECORD_HASH_FIELD] == DUMMY_RECORD_HASH_VALUE:
-                return 'dummy'
-
-            db_record = self.table_row_as_dict(record)
-            if db_record is None:
-                return 'notexit'
-            recordhash = self.generate_recordhash(db_record)
-            return recordhash == record[RECORD_HASH_FIELD]
-
         if target == 'record':
-            if record.has_field(NEWRECORD_FLAG_FIELD):
-                return True
-            else:
-                return compare_recordhash(record)
+            return self.check_recordhashes([(None, record)])[None]
         elif target == 'table' and self.o_record:
+            records = []
             for r, rec in enumerate(self.o_record):
-                if rec.has_field(NEWRECORD_FLAG_FIELD) is False:
-                    recordhash_status = self.compare_recordhash(rec)
-                    if recordhash_status in (False, 'notexit'):
-                        changed = False if recordhash_status == 'notexit' else\
-                                                                        True
-                        self.set_recordhash_error(r, changed=changed)
-                        return False
+                if rec.has_field(ROWNO_FIELD):
+                    r = rec[ROWNO_FIELD]
+                records.append((r, rec))
+            statuses = self.check_recordhashes(records)
+            for r, rec in records:
+                if statuses[r] in (False, 'notexit'):
+                    changed = False if statuses[r] == 'notexit' else True
+                    self.set_recordhash_error(r, changed=changed)
+                    return False
             return True
         return False
 
@@ -1661,6 +4059,12 @@ class SQLEDITABLE(EDITABLE):
                 from pydal.helpers.methods import bar_decode_string
             except ImportError:
                 from gluon.dal import bar_decode_string
+            if record_data.columnar:
+                for field in fields:
+                    record_data.set_column(field, [bar_decode_string(v)
+                            if isinstance(v, string_types) and '|' in v else v
+                            for v in record_data.column(field, COLUMN_MISSING)])
+                return record_data
             for record in record_data:
                 for field in fields:
                     if record[field] and '|' in record[field]:
@@ -1668,36 +4072,58 @@ class SQLEDITABLE(EDITABLE):
             return record_data
 
         if not record:
-            limit = (0, self.maxrow) if self.maxrow else None
-            record_data = self.table._db(self.table).select(limitby=limit)\
-                                                    .as_list(custom_types=self.custom_types)
-            record_data = RecordArray(record_data, self.header)
-            if self.record_hash_available:
+            if self.window:
+                record_data = self.read_window()
+            else:
+                limit = (0, self.maxrow) if self.maxrow else None
+                rows = self.table._db(self.table).select(
+                                        orderby=self.orderby, limitby=limit)
+                # columnar: the columns are filled row by row (no list of
+                # dicts of all rows)
+                record_data = (row.as_dict(custom_types=self.custom_types)
+                                        for row in rows) if self.columnar \
+                                else rows.as_list(custom_types=self.custom_types)
+            record_data = RecordArray(record_data, self.header,
+                                                        columnar=self.columnar)
+            if self.record_hash_available and self.columnar:
+                columns = [record_data.values(f)
+                                            for f in record_data.header.real()]
+                rows = zip(*columns) if columns else [()] * len(record_data)
+                record_data.set_column(RECORD_HASH_FIELD,
+                        [self.generate_recordhash_values(v) for v in rows])
+            elif self.record_hash_available:
                 for rec in record_data:
                     rec[RECORD_HASH_FIELD] = self.generate_recordhash(rec)
             return format_record_data(record_data)
         else:
-            record_data = RecordArray([], self.header)
-            if isinstance(record, (list,tuple)):
-                # repeated
-                new_record = []
-                for r in record:
-                    if not r in new_record:
-                        new_record.append(r)
-                record = new_record
-            elif isinstance(record, (int,str)):
+            record_data = RecordArray([], self.header, columnar=self.columnar)
+            if isinstance(record, (int,str)):
                 record = [record]
-            else:
-                pass
 
-            for i, r in enumerate(record):
-                if self.maxrow and i >= self.maxrow:
+            # repeated
+            keys = []
+            requested = set()
+            for r in record:
+                if self.maxrow and not self.window and \
+                                                    len(keys) >= self.maxrow:
                     break
                 if not isinstance(r, (list,tuple)):
                     r = [r]
-                rec = Record(dict([(k.name, f) for k, f in \
-                                    zip(self.header.key(), r)]), self.header)
-                rec = self.table_row_as_dict(rec)
+                key = self.convert_key(r)
+                if not key in requested:
+                    requested.add(key)
+                    keys.append(key)
+            # page window of the key list
+            if self.window:
+                offset = self.row_offset()
+                self.window.keyset = False
+                self.window.has_next = len(keys) > offset + self.maxrow
+                self.window.total = len(keys)
+                keys = keys[offset:offset + self.maxrow]
+
+            rows = self.table_rows_as_dict(keys)
+            for key in keys:
+                rec = rows.get(key)
                 if rec:
                     if self.record_hash_available:
                         rec[RECORD_HASH_FIELD] = self.generate_recordhash(rec)
@@ -1706,6 +4132,55 @@ class SQLEDITABLE(EDITABLE):
 
     def db_cud(self):
 
+        def refresh_record(record, rec, rowno, created=False):
+            value = {}
+            value['key_value'] = \
+                            base64.b64encode(self.compress_key_value(rec).encode()).decode()
+            if self.record_hash_available:
+                recordhash = self.generate_recordhash(rec)
+                value['record_hash'] = recordhash
+                record[RECORD_HASH_FIELD] = recordhash
+            value['input_hash'] = self.generate_inputhash(rec)
+            if self.table_hash_mode == TABLE_HASH_MODE_ROW:
+                value['key_token'] = self.generate_keytoken(
+                        self.compress_key_value(rec), value.get('record_hash'))
+            self.update_field_element(self.editable, rowno, value,
+                                                            special='key')
+            if created:
+                del record[NEWRECORD_FLAG_FIELD]
+                for key in record.key_list():
+                    self.update_field_element(self.editable, rowno,
+                                                            rec[key], key)
+            if self.update_display_record:
+                for f in record.header.readable():
+                    self.update_field_element(self.editable, rowno,
+                                                            rec[f.name], f.name)
+            else:
+                for f in record.header.virtual():
+                    self.update_field_element(self.editable, rowno,
+                                                            rec[f.name], f.name)
+
+        def refresh_deleted(record, rowno):
+            self.disable_record_element(self.editable, rowno)
+
+            if self.record_hash_available:
+                value = {'record_hash':DUMMY_RECORD_HASH_VALUE, 'input_hash':''}
+                record[RECORD_HASH_FIELD] = DUMMY_RECORD_HASH_VALUE
+                if self.table_hash_mode == TABLE_HASH_MODE_ROW:
+                    value['key_token'] = self.generate_keytoken(
+                                            self.compress_key_value(record),
+                                            DUMMY_RECORD_HASH_VALUE)
+                self.update_field_element(self.editable, rowno, value,
+                                                                special='key')
+
+        def set_key(record, result):
+            if isinstance(result, dict):
+                for key in record.key_list():
+                    record[key] = result[key]
+            else:
+                key = record.key_list()[0]
+                record[key] = result
+
         def db_create(record, rowno):
             fields = dict([(f.name,v) for f,v in record.real()])
             try:
@@ -1720,38 +4195,11 @@ class SQLEDITABLE(EDITABLE):
                 self.set_error_class(self.editable, rowno)
                 return result
             else:
-                if isinstance(result, dict):
-                    for key in record.key_list():
-                        record[key] = result[key]
-                else:
-                    key = record.key_list()[0]
-                    record[key] = result
+                set_key(record, result)
 
             rec = self.table_row_as_dict(record)
             if rec:
-                value = {}
-                value['key_value'] = \
-                                base64.b64encode(self.compress_key_value(rec).encode()).decode()
-                if self.record_hash_available:
-                    recordhash = self.generate_recordhash(rec)
-                    value['record_hash'] = recordhash
-                    record[RECORD_HASH_FIELD] = recordhash
-                value['input_hash'] = self.generate_inputhash(rec)
-                self.update_field_element(self.editable, rowno, value,
-                                                                special='key')
-                del record[NEWRECORD_FLAG_FIELD]
-
-                for key in record.key_list():
-                    self.update_field_element(self.editable, rowno,
-                                                                rec[key], key)
-                if self.update_display_record:
-                    for f in record.header.readable():
-                        self.update_field_element(self.editable, rowno,
-                                                                rec[f.name], f.name)
-                else:
-                    for f in record.header.virtual():
-                        self.update_field_element(self.editable, rowno,
-                                                                rec[f.name], f.name)
+                refresh_record(record, rec, rowno, created=True)
             return result
 
         def db_update(record, rowno):
@@ -1773,24 +4221,7 @@ class SQLEDITABLE(EDITABLE):
                 del record[STORED_KEY_VALUE]
                 rec = self.table_row_as_dict(record)
                 if rec:
-                    value = {}
-                    value['key_value'] = \
-                                base64.b64encode(self.compress_key_value(rec).encode()).decode()
-                    if self.record_hash_available:
-                        recordhash = self.generate_recordhash(rec)
-                        value['record_hash'] = recordhash
-                        record[RECORD_HASH_FIELD] = recordhash
-                    value['input_hash'] = self.generate_inputhash(rec)
-                    self.update_field_element(self.editable, rowno, value,
-                                                            special='key')
-                    if self.update_display_record:
-                        for f in record.header.readable():
-                            self.update_field_element(self.editable, rowno,
-                                                                    rec[f.name], f.name)
-                    else:
-                        for f in record.header.virtual():
-                            self.update_field_element(self.editable, rowno,
-                                                                    rec[f.name], f.name)
+                    refresh_record(record, rec, rowno)
                 return result
             else:
                 return False
@@ -1809,78 +4240,199 @@ class SQLEDITABLE(EDITABLE):
                     self.errors.append('[db delete error] ' + error)
                     return result
 
-            els = self.pick_element(self.editable, rowno, mode='td-all')
-            for el in els:
-                el.add_class(NO_EDIT_CLASS)
-                for child in ['input', 'select', 'a', 'button']:
-                    child_el = el.element(child)
-                    if child_el:
-                        if child == 'a':
-                            child_el['_href'] = '#'
-                        child_el['_disabled'] = 'disabled'
-
-            if self.record_hash_available:
-                value = {'record_hash':DUMMY_RECORD_HASH_VALUE, 'input_hash':''}
-                record[RECORD_HASH_FIELD] = DUMMY_RECORD_HASH_VALUE
-                self.update_field_element(self.editable, rowno, value,
-                                                                special='key')
+            refresh_deleted(record, rowno)
             return result
 
+        def db_bulk_write(creates, updates, deletes):
+            '''
+            insert & delete the records in batches, update them one by one
+            & re-read them with one query.
+                creates : list of (rowno, record) to insert (bulk_insert)
+                updates : list of (rowno, record) to update
+                          (one update() per record: the values differ by
+                           row, and the callbacks of the table are kept)
+                deletes : list of (rowno, record) to delete
+                          (the keys are read first: a row deleted meanwhile
+                           stops the write)
+            '''
+            # delete
+            stored = [(r, self.record_key(rec)) for r, rec in deletes
+                                if rec.has_field(NEWRECORD_FLAG_FIELD) is False]
+            keys = [key for _, key in stored]
+            key_fields = [self.table[k] for k in self.header.key_list()]
+            try:
+                # the rows deleted meanwhile stop the write before deleting
+                existing = set()
+                for chunk in self.key_chunks(keys):
+                    for row in self.table_keys_set(chunk).select(*key_fields):
+                        existing.add(tuple(str(row[f.name]) for f in key_fields))
+                missing = [r for r, key in stored if not key in existing]
+                if missing:
+                    for r in missing:
+                        self.set_recordhash_error(r, changed=False)
+                    return False
+                result = 0
+                for chunk in self.key_chunks(keys):
+                    result += self.table_keys_set(chunk).delete()
+            except Exception as e:
+                self.errors.append('[db delete error] ' + str(e))
+                return False
+            if result < len(keys):
+                self.errors.append('[db delete error] {0} of {1} records '
+                                   'deleted'.format(result, len(keys)))
+                return False
+            for r, rec in deletes:
+                refresh_deleted(rec, r)
+
+            # update
+            updated = []
+            for r, rec in updates:
+                fields = dict([(f.name, v) for f, v in rec.writable()])
+                if not fields:
+                    # no writable field: the row is kept as it is
+                    continue
+                try:
+                    result = self.table_set(rec).update(**fields)
+                except Exception as e:
+                    self.errors.append('[db update error] ' + str(e))
+                    return False
+                if not result:
+                    self.errors.append('[db update error] ')
+                    return False
+                del rec[STORED_KEY_VALUE]
+                updated.append((r, rec))
+
+            # insert
+            if creates:
+                items = [dict([(f.name, v) for f, v in rec.real()])
+                                                        for _, rec in creates]
+                try:
+                    results = self.table.bulk_insert(items)
+                except Exception as e:
+                    self.errors.append('[db insert error] ' + str(e))
+                    for r, _ in creates:
+                        self.set_error_class(self.editable, r)
+                    return False
+                for (r, rec), result in zip(creates, results):
+                    if not result:
+                        self.errors.append('[db insert error] ')
+                        self.set_error_class(self.editable, r)
+                        return False
+                    set_key(rec, result)
+
+            # re-read
+            written = updated + creates
+            db_records = self.table_rows_as_dict(
+                                    [self.record_key(rec) for _, rec in written])
+            for r, rec in written:
+                db_record = db_records.get(self.record_key(rec))
+                if db_record:
+                    refresh_record(rec, db_record, r,
+                                   created=rec.has_field(NEWRECORD_FLAG_FIELD))
+            return True
+
         # check recordhash for not parcel_update and not record_hash_available
         recordhash_status = False
         if self.record_hash_available:
             if self.parcel_update is False:
-                if self.check_recordhash(target='table') is False:
+                with self.instrument_phase('check_recordhash'):
+                    recordhash_status = self.check_recordhash(target='table')
+                if recordhash_status is False:
                     return False
                 recordhash_status = True
         else:
             recordhash_status = True
 
-        #create/update/delete
-        status = True
-        record_cud = False
+        # changed records
+        records = []
         for r, rec in enumerate(self.o_record):
+            if rec.has_field(ROWNO_FIELD):
+                r = rec[ROWNO_FIELD]
             if rec.has_field(NOTCHANGED_FLAG_FIELD):
                 continue
             if rec.has_field(RECORD_HASH_FIELD) and \
                         rec[RECORD_HASH_FIELD] == DUMMY_RECORD_HASH_VALUE:
                 continue
-            if status is False:
+            records.append((r, rec))
+        self.instrument_count('rows_changed', len(records))
+
+        # check recordhash of all changed records for parcel_update
+        if self.record_hash_available and self.parcel_update:
+            with self.instrument_phase('check_recordhash'):
+                recordhash_statuses = self.check_recordhashes(records)
+
+        # validate column by column the records to write
+        validates = []
+        for r, rec in records:
+            if self.record_hash_available and self.parcel_update and \
+                                        recordhash_statuses[r] is not True:
                 break
-            if self.record_hash_available:
-                if self.parcel_update:
-                    recordhash_status = self.check_recordhash(rec)
-                    if recordhash_status is False:
-                        self.set_recordhash_error(r, changed=True)
-                    elif recordhash_status == 'notexit':
-                        self.set_recordhash_error(r, changed=False)
+            if rec.has_field(DELETE_FLAG_FIELD) or not self.validate_all:
+                validates.append((r, rec))
+        validated = self.records_validate(validates)
 
-            if recordhash_status is True:
-                if rec.has_field(DELETE_FLAG_FIELD):
-                    if self.record_validate(rec, r):
-                        status = db_delete(rec, r)
-                        record_cud = True
+        #create/update/delete
+        written = 0
+        with self.instrument_phase('write'):
+            status = True
+            record_cud = False
+            creates = []
+            updates = []
+            deletes = []
+            for r, rec in records:
+                if status is False:
+                    break
+                if self.record_hash_available:
+                    if self.parcel_update:
+                        recordhash_status = recordhash_statuses[r]
+                        if recordhash_status is False:
+                            self.set_recordhash_error(r, changed=True)
+                        elif recordhash_status == 'notexit':
+                            self.set_recordhash_error(r, changed=False)
+
+                if recordhash_status is True:
+                    if rec.has_field(DELETE_FLAG_FIELD):
+                        if validated[r]:
+                            if self.bulk_write:
+                                deletes.append((r, rec))
+                            else:
+                                status = db_delete(rec, r)
+                            record_cud = True
+                            written += 1
+                    else:
+                        if self.validate_all or validated[r]:
+                            if self.bulk_write:
+                                if rec.has_field(NEWRECORD_FLAG_FIELD):
+                                    creates.append((r, rec))
+                                else:
+                                    updates.append((r, rec))
+                            elif rec.has_field(NEWRECORD_FLAG_FIELD):
+                                status = db_create(rec, r)
+                            else:
+                                status = db_update(rec, r)
+                            record_cud = True
+                            written += 1
                 else:
-                    if self.validate_all or self.record_validate(rec, r):
-                        if rec.has_field(NEWRECORD_FLAG_FIELD):
-                            status = db_create(rec, r)
-                        else:
-                            status = db_update(rec, r)
-                        record_cud = True
-            else:
-                    status = False
-        if status and record_cud:
-            self.table._db.commit()
+                        status = False
+            if status and record_cud and self.bulk_write:
+                status = db_bulk_write(creates, updates, deletes)
+            if status and record_cud:
+                self.table._db.commit()
+                if self.options_cache:
+                    self.options_cache.invalidate(self.table._tablename)
+                self.instrument_count('rows_written', written)
         return bool(status)
 
     def accepts(self, request_vars,session=None, formname='tb_{tablename}',
                 parcel_update=True, onvalidation=None, hideerror=False,
-                **kwargs):
+                bulk_write=False, **kwargs):
         if request_vars.__class__.__name__ == 'Request':
             request_vars = request_vars.post_vars
 
         self.parcel_update = parcel_update
+        self.bulk_write = bulk_write
         formname = formname.format(tablename=self.table._tablename)
+        start = time.time()
         status = EDITABLE.accepts(self, request_vars, session, formname,
                                                         onvalidation, **kwargs)
         if status:
@@ -1891,4 +4443,6 @@ class SQLEDITABLE(EDITABLE):
         if self.errors:
             status = False
         self.accepted = status
+        if request_vars and request_vars.get(self.editable_id):
+            self.metrics_save(status, start)
         return status
@@ -65,6 +65,8 @@ $.fn.editableTableWidget = function (options) {
 				active.text(text).trigger(evt, text);
 				if (evt.result === false) {
 					active.html(originalContent);
+				} else {
+					activeOptions.markDirty(active);
 				}
 			},
 			movement = function (element, keycode) {
@@ -155,6 +157,9 @@ $.fn.editableTableWidget.defaultOptions = {
 	cloneProperties: ['padding', 'padding-top', 'padding-bottom', 'padding-left', 'padding-right',
 					  'text-align', 'font', 'font-size', 'font-family', 'font-weight',
 					  'border', 'border-top', 'border-bottom', 'border-left', 'border-right'],
-	editor: $('<input>')
+	editor: $('<input>'),
+	markDirty: function (cell) {
+		cell.closest('tr').attr('data-dirty', '1');
+	}
 };
 
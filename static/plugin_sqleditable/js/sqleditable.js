@@ -0,0 +1,530 @@
+/*global jQuery, document, location, setTimeout*/
+/*
+ * SQLEDITABLE plugin for web2py flamework
+ * Copyrighted by Hitoshi Kato <hi21alt-gl@yahoo.co.jp>
+ * License: LGPLv3
+ *
+ * client script of EDITABLE/SQLEDITABLE.
+ * EDITABLE.build_js calls sqleditable(config, before, after) per instance.
+ */
+var sqleditable = function (config, before, after) {
+    'use strict';
+    var editable = jQuery('#' + config.editable_id),
+        virtual = config.virtual,
+        rowCache = {},
+        templates = {},
+        labels = {},
+        byId = function (id) {
+            var el = document.getElementById(id), m;
+            if (el === null && virtual) {
+                // rows of the virtual mode that are out of sight
+                m = /(\d+)/.exec(id);
+                if (m && rowCache[m[1]]) {
+                    return rowCache[m[1]].find('[id="' + id + '"]');
+                }
+            }
+            return jQuery(el);
+        },
+        conditions = {
+            range: function (value, rule) {
+                return (rule[0] === null || value >= rule[0]) &&
+                        (rule[1] === null || value <= rule[1]);
+            },
+            length: function (value, rule) {
+                var length = value.trim().length;
+                return length >= rule[0] && length <= rule[1];
+            },
+            integer: function (value) {
+                return value == parseInt(value, 10) || value == '';
+            },
+            number: function (value) {
+                return (!isNaN(parseFloat(value)) && isFinite(value)) || value == '';
+            }
+        },
+        validator = function (rules) {
+            return function (evt, value) {
+                var name;
+                for (name in rules) {
+                    if (rules.hasOwnProperty(name) && !conditions[name](value, rules[name])) {
+                        return false;
+                    }
+                }
+                return true;
+            };
+        },
+        showResult = function () {
+            if (document.getElementById(config.msg_error_id)) {
+                jQuery('.' + config.msg_failure).show();
+                jQuery('.' + config.msg_success).hide();
+            } else {
+                jQuery('.' + config.msg_success).show();
+                jQuery('.' + config.msg_failure).hide();
+            }
+        },
+        showFailure = function () {
+            jQuery('.' + config.msg_success).hide();
+            jQuery('.' + config.msg_failure).show();
+        },
+        showDialog = function () {
+            jQuery('.' + config.process_dialog).modal({
+                backdrop: 'static',
+                keyboard: false
+            });
+        },
+        hideDialog = function () {
+            jQuery('.' + config.process_dialog).modal('hide');
+            jQuery('.' + config.first_cell).focus();
+        },
+        editableDelta = function () {
+            var keys = [], rows = [], r = 0, cell, k, del, deleted, values,
+                readValue = function (i, f) {
+                    var cell = byId('cell_' + r + '_' + f + '_')[0];
+                    if (cell !== undefined) {
+                        values[f] = cell.tagName === 'INPUT' ? cell.value : jQuery(cell).text();
+                    }
+                };
+            while ((k = byId('k(' + r + ')')).length || (virtual && r < virtual.total)) {
+                if (!k.length) {
+                    // not fetched (virtual)
+                    keys.push(['', '']);
+                    r += 1;
+                    continue;
+                }
+                del = byId('d(' + r + ')')[0];
+                deleted = del !== undefined && del.value === 'on' &&
+                                            k.attr('data-rechash') !== config.dummy;
+                cell = [k.attr('data-keyid') || '', k.attr('data-rechash') || ''];
+                if (k.attr('data-keytoken') !== undefined) {
+                    cell.push(k.attr('data-keytoken'));
+                }
+                keys.push(cell);
+                if (k.attr('data-dirty') || deleted) {
+                    values = {};
+                    jQuery.each(config.fields, readValue);
+                    rows.push({r: r, i: k.attr('data-inphash') || '', d: deleted, v: values});
+                }
+                r += 1;
+            }
+            return JSON.stringify({keys: keys, rows: rows});
+        },
+        // shared select_mode: the options of the column are in config.options,
+        // the select is cloned from the template of the column on focus.
+        sharedField = function (cell) {
+            var m = /^cell_\d+_(.+)_$/.exec(cell.children('div').attr('id') || '');
+            return m && config.options[m[1]] && cell.children('.' + config.select_label).length ?
+                    m[1] : null;
+        },
+        sharedLabel = function (f, value) {
+            if (!labels[f]) {
+                labels[f] = {};
+                jQuery.each(config.options[f].items, function (i, item) {
+                    labels[f][item[0]] = item[1];
+                });
+            }
+            var values = config.options[f].multiple ? String(value).split(',') : [String(value)];
+            return jQuery.map(values, function (v) {
+                return labels[f].hasOwnProperty(v) ? labels[f][v] : v;
+            }).join(', ');
+        },
+        sharedOpen = function (cell) {
+            var f = sharedField(cell), text, select;
+            if (f === null || cell.children('select').length) {
+                return;
+            }
+            if (!templates[f]) {
+                templates[f] = jQuery('<select/>', {'class': config.select_box})
+                    .prop('multiple', config.options[f].multiple).css('width', '100%')
+                    .append(jQuery.map(config.options[f].items, function (item) {
+                        return jQuery('<option/>', {value: item[0]}).text(item[1])[0];
+                    }));
+            }
+            text = cell.children('div');
+            select = templates[f].clone().insertAfter(text);
+            if (config.options[f].remote) {
+                remoteSearch(cell, f, select);
+            }
+            select.val(String(text.text()).split(',')).on('change', function () {
+                cell.children('.' + config.select_label).text(select.children(':selected').map(function () {
+                    return jQuery(this).text();
+                }).get().join(', '));
+            });
+            cell.children('.' + config.select_label).hide();
+        },
+        // autocomplete fields: the select lists the result of the search
+        // (the current value first), the options are not in config.
+        remoteSearch = function (cell, f, select) {
+            var timer = null, searched = null,
+                current = jQuery('<option/>', {value: cell.children('div').text()})
+                    .text(cell.children('.' + config.select_label).text()),
+                input = jQuery('<input/>', {type: 'text', 'class': config.search.input_class})
+                    .css('width', '100%').prependTo(cell);
+            select.append(current);
+            input.on('input', function () {
+                clearTimeout(timer);
+                timer = setTimeout(function () {
+                    var data = {}, text = input.val();
+                    if (text.length < config.search.min_length || text === searched) {
+                        return;
+                    }
+                    searched = text;
+                    data[config.search.search_var] = text;
+                    data[config.search.field_var] = f;
+                    jQuery.ajax({
+                        url: config.url,
+                        type: 'POST',
+                        dataType: 'json',
+                        data: data
+                    })
+                        .done(function (items) {
+                            if (input.val() !== text) {
+                                return;
+                            }
+                            select.children().not(current).remove();
+                            select.append(jQuery.map(items, function (item) {
+                                return item[0] === current.val() ? null :
+                                        jQuery('<option/>', {value: item[0]}).text(item[1])[0];
+                            })).prop('size', Math.min(items.length + 1, 8));
+                        })
+                        .fail(showFailure);
+                }, config.search.delay);
+            }).on('keydown', function (e) {
+                if (e.which === 13 || e.which === 40) {
+                    select.focus();
+                } else if (e.which === 27 || e.which === 9) {
+                    cell.focus();
+                } else {
+                    e.stopPropagation();
+                    return;
+                }
+                return false;
+            });
+        },
+        sharedClose = function (cell) {
+            if (cell.children('select').length && sharedField(cell) !== null) {
+                cell.children('select, input.' + (config.search || {}).input_class).remove();
+                cell.children('.' + config.select_label).show();
+            }
+        },
+        editableRowCells = function (r) {
+            return (rowCache[r] || editable).find('[id="d(' + r + ')"],[id^="cell_' + r + '_"],[id^="parent_' + r + '_"]').closest('td');
+        },
+        editableApply = function (data) {
+            if (data.next) {
+                location.href = data.next;
+                return;
+            }
+            editable.children('div.' + config.msg_error_class).remove();
+            editable.find('td.' + config.cell_error).removeClass(config.cell_error);
+            jQuery('#' + config.formkey_id).val(data.formkey);
+            jQuery.each(data.rows, function (r, row) {
+                var k = byId('k(' + r + ')'), cells;
+                if (row.key) {
+                    if (row.key.key_value !== undefined) {
+                        k.attr('data-keyid', row.key.key_value);
+                    }
+                    if (row.key.record_hash !== undefined) {
+                        k.attr('data-rechash', row.key.record_hash);
+                    }
+                    if (row.key.input_hash !== undefined) {
+                        k.attr('data-inphash', row.key.input_hash);
+                    }
+                    if (row.key.key_token !== undefined) {
+                        k.attr('data-keytoken', row.key.key_token);
+                    }
+                    k.removeAttr('data-dirty');
+                }
+                jQuery.each(row.fields || {}, function (f, value) {
+                    var cell = byId('cell_' + r + '_' + f + '_')[0];
+                    if (cell === undefined) {
+                        return;
+                    }
+                    if (cell.tagName === 'INPUT') {
+                        jQuery(cell).val(value ? 'on' : 'off').prop('checked', !!value);
+                    } else {
+                        jQuery(cell).text(value).next('select').val(String(value).split(','));
+                        if (config.options && config.options[f]) {
+                            jQuery(cell).siblings('.' + config.select_label).text(sharedLabel(f, value));
+                        }
+                    }
+                });
+                if (row.disabled) {
+                    cells = editableRowCells(r).addClass(config.noedit);
+                    cells.find('a').attr('href', '#');
+                    cells.find('input, select, a, button').attr('disabled', 'disabled');
+                }
+            });
+            jQuery.each(data.errors, function (i, error) {
+                var cells = error[1] === null ? editableRowCells(error[0]) :
+                        byId('cell_' + error[0] + '_' + error[1] + '_')
+                            .add(byId('parent_' + error[0] + '_' + error[1] + '_')).closest('td');
+                cells.addClass(config.cell_error);
+            });
+            editable.prepend(jQuery.map(data.messages, function (message) {
+                return jQuery('<div/>', {id: config.msg_error_id, 'class': config.msg_error_class}).text(message)[0];
+            }));
+        },
+        editableDirty = function (id) {
+            var m = /^(?:cell_|parent_)(\d+)_|^d\((\d+)\)$/.exec(id || '');
+            if (m) {
+                byId('k(' + (m[1] || m[2]) + ')').attr('data-dirty', '1');
+            }
+        },
+        submit = function (data, dataType, done) {
+            jQuery.ajax({
+                url: config.url,
+                type: 'POST',
+                dataType: dataType,
+                data: data,
+                beforeSend: showDialog
+            })
+                .done(function (result) {
+                    done(result);
+                    showResult();
+                })
+                .fail(showFailure)
+                .always(function () {
+                    hideDialog();
+                    after();
+                });
+        },
+        rowHeight = 0,
+        chunks = {},
+        spacers = [],
+        scrolled = false,
+        virtualRender,
+        virtualSpacer = function (cells) {
+            return jQuery('<tr/>', {'class': virtual.spacer_class}).append(
+                jQuery('<td/>', {'class': config.noedit, colspan: cells}).css({padding: 0, border: 0})
+            );
+        },
+        virtualFetch = function (chunk) {
+            var data = {formkey: jQuery('#' + config.formkey_id).val()};
+            if (chunks[chunk]) {
+                return;
+            }
+            chunks[chunk] = true;
+            data[virtual.page_var] = chunk + 1;
+            data[virtual.virtual_var] = 1;
+            jQuery.ajax({
+                url: config.url,
+                type: 'POST',
+                dataType: 'json',
+                data: data
+            })
+                .done(function (result) {
+                    jQuery.each(result.rows, function (i, html) {
+                        var r = result.offset + i;
+                        if (!rowCache[r]) {
+                            rowCache[r] = jQuery(html);
+                            rowCache[r].children('td').prop('tabindex', 1);
+                        }
+                    });
+                    virtualRender();
+                })
+                .fail(function () {
+                    chunks[chunk] = false;
+                    showFailure();
+                });
+        };
+
+    // virtual mode: rows from the scroll position (+ overscan) are in the
+    // tbody, the others are kept in rowCache or are fetched by chunk.
+    virtualRender = function () {
+        var body = editable.find('tbody'),
+            active = document.activeElement,
+            top = Math.floor(editable.scrollTop() / rowHeight),
+            first = Math.max(top - virtual.overscan, 0),
+            last = Math.min(top + Math.ceil(editable.height() / rowHeight) +
+                                            virtual.overscan, virtual.total),
+            r;
+        body.children('tr').detach();
+        body.append(spacers[0].height(first * rowHeight));
+        for (r = first; r < last; r += 1) {
+            if (rowCache[r]) {
+                body.append(rowCache[r]);
+            } else {
+                virtualFetch(Math.floor(r / virtual.chunk));
+                body.append(spacers[0].clone().height(rowHeight));
+            }
+        }
+        body.append(spacers[1].height((virtual.total - last) * rowHeight));
+        if (active && jQuery.contains(body[0], active)) {
+            active.focus();
+        }
+    };
+
+    before = before || jQuery.noop;
+    after = after || jQuery.noop;
+
+    editable.on('load', function () {
+        editable.editableTableWidget({
+            markDirty: function (cell) {
+                editableDirty(cell.attr('id'));
+            }
+        });
+        // validate
+        jQuery.each(config.validate, function (i, rule) {
+            editable.on('validate', 'td.' + rule.field_class, validator(rule.rules));
+        });
+        // checkbox
+        if (config.checkbox) {
+            jQuery(document).on('click', ':checkbox', function (e) {
+                if (jQuery(this).prop('checked')) {
+                    jQuery(this).val('on');
+                } else {
+                    jQuery(this).val('off');
+                }
+                e.stopPropagation();
+            });
+            jQuery(document).on('click', 'td:not(.' + config.noedit + '):has(:checkbox)', function () {
+                jQuery(this).children(':checkbox').trigger('click');
+            });
+        }
+        // date/time/datetime
+        jQuery.each(config.date_time, function (i, field_class) {
+            jQuery(document).on('blur', 'input.' + field_class, function () {
+                var id = jQuery(this).attr('data-id');
+                jQuery(this).hide();
+                jQuery('#' + id).text(jQuery(this).val());
+            });
+            jQuery(document).on('keypress', 'input.' + field_class, function (e) {
+                if (e.which === 13) {
+                    var id = jQuery(this).attr('data-id');
+                    jQuery(this).hide();
+                    jQuery('#' + id).text(jQuery(this).val()).focus();
+                    return false;
+                }
+            });
+        });
+        // listbox
+        if (config.select) {
+            jQuery(document).on('change', 'td:not(.' + config.noedit + ')>select', function () {
+                jQuery(this).prev('div').text(jQuery(this).val());
+            });
+        }
+        if (config.options) {
+            editable.on('focusin', 'td.' + config.select_class + ':not(.' + config.noedit + ')', function () {
+                sharedOpen(jQuery(this));
+            });
+            editable.on('keydown', 'td.' + config.select_class, function (e) {
+                var input = jQuery(this).children('input');
+                if (e.which === 13 && e.target === this && input.length) {
+                    input.focus();
+                    return false;
+                }
+            });
+            editable.on('focusout', 'td.' + config.select_class, function () {
+                var cell = jQuery(this);
+                setTimeout(function () {
+                    if (!jQuery.contains(cell[0], document.activeElement) &&
+                                                    cell[0] !== document.activeElement) {
+                        sharedClose(cell);
+                    }
+                }, 0);
+            });
+        }
+        // keydown
+        jQuery(document).on('keydown', 'td:not(.' + config.noedit + ',.' + config.deletable + ')', function (e) {
+            var child = jQuery(this).children(':checkbox, select');
+            if (child.is(':checkbox')) {
+                if (e.which === 13) {
+                    child.trigger('click');
+                    return false;
+                }
+            } else if (child.is('select')) {
+                if (e.which === 13) {
+                    child.focus();
+                    return false;
+                }
+            }
+        });
+        jQuery(document).on('keydown', 'select', function (e) {
+            if (e.which === 13 || e.which === 9 || e.which === 27) {
+                jQuery(this).parent('td').focus();
+                return false;
+            }
+        });
+    });
+    editable.trigger('load');
+
+    // virtual rows
+    if (virtual) {
+        editable.find('tbody > tr').each(function (r) {
+            rowCache[r] = jQuery(this);
+        });
+        chunks[0] = true;
+        rowHeight = editable.find('tbody > tr').first().outerHeight() || 30;
+        spacers = [virtualSpacer(rowCache[0].children().length),
+                   virtualSpacer(rowCache[0].children().length)];
+        editable.css({height: virtual.height + 'px', 'overflow-y': 'auto'});
+        editable.find('thead th').css({position: 'sticky', top: 0, background: '#fff'});
+        editable.on('scroll', function () {
+            if (!scrolled) {
+                scrolled = true;
+                setTimeout(function () {
+                    scrolled = false;
+                    virtualRender();
+                }, 50);
+            }
+        });
+        virtualRender();
+    }
+    jQuery('.' + config.first_cell).focus();
+
+    // dirty rows (the text cells are flagged by editableTableWidget)
+    editable.on('click change', ':checkbox, select', function () {
+        editableDirty(this.id || jQuery(this).closest('td').attr('id'));
+    });
+    jQuery(document).on('blur', 'input[data-id]', function () {
+        editableDirty(jQuery(this).attr('data-id'));
+    });
+
+    // ajax
+    jQuery('.' + config.ajax_button_class).on('click', function () {
+        var data = {
+            formkey: jQuery('#' + config.formkey_id).val(),
+            formname: jQuery('#' + config.formname_id).val()
+        };
+        if (before.call(this) === false) {
+            return false;
+        }
+        if (config.submit_mode === 'delta') {
+            data[config.editable_id] = editableDelta();
+            submit(data, 'json', editableApply);
+        } else {
+            data[config.editable_id] = editable.html();
+            submit(data, 'html', function (html) {
+                editable.html(html);
+            });
+        }
+    });
+
+    // pager
+    if (config.pager) {
+        editable.on('click', '.' + config.pager.pager_class + ' button', function () {
+            var button = jQuery(this),
+                data = {formkey: jQuery('#' + config.formkey_id).val()};
+            data[config.pager.page_var] = button.attr('data-page');
+            if (button.attr('data-after') !== undefined) {
+                data[config.pager.after_var] = button.attr('data-after');
+            }
+            if (button.attr('data-before') !== undefined) {
+                data[config.pager.before_var] = button.attr('data-before');
+            }
+            jQuery.ajax({
+                url: config.url,
+                type: 'POST',
+                dataType: 'html',
+                data: data,
+                beforeSend: showDialog
+            })
+                .done(function (html) {
+                    editable.html(html).find('td').prop('tabindex', 1);
+                    jQuery('.' + config.msg_success).hide();
+                    jQuery('.' + config.msg_failure).hide();
+                })
+                .fail(showFailure)
+                .always(hideDialog);
+        });
+    }
+};